@@ -0,0 +1,101 @@
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Model file extension -> runtime
+BACKENDS = {'.keras': 'keras', '.h5': 'keras', '.onnx': 'onnx', '.tflite': 'tflite'}
+
+def backend_for(path):
+    backend = BACKENDS.get(os.path.splitext(path)[1].lower())
+    if backend is None:
+        raise ValueError(f"Unknown model format: {path} (expected one of {sorted(BACKENDS)})")
+    return backend
+
+class OnnxModel:
+    """ONNX Runtime session with the predict_on_batch interface of a Keras model"""
+
+    def __init__(self, path, intra_threads=None, inter_threads=None):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        if intra_threads:
+            options.intra_op_num_threads = intra_threads
+        if inter_threads:
+            options.inter_op_num_threads = inter_threads
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict_on_batch(self, batch):
+        return self.session.run(None, {self.input_name: np.ascontiguousarray(batch, dtype=np.float32)})[0]
+
+def _tflite_interpreter():
+    # Standalone runtimes first; full TensorFlow only as a last resort
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+class TFLiteModel:
+    """TFLite interpreter (float or int8) with the predict_on_batch interface of a Keras model
+
+    The input tensor is resized when the batch size changes, so the engine's
+    full batches and the shorter last batch each allocate once. The interpreter
+    has a single thread pool, so there are no inter-op threads to set.
+    """
+
+    def __init__(self, path, intra_threads=None):
+        Interpreter = _tflite_interpreter()
+        self.interpreter = Interpreter(model_path=path, num_threads=intra_threads or None)
+        self.input = self.interpreter.get_input_details()[0]
+        self.output = self.interpreter.get_output_details()[0]
+        self.batch_size = None
+
+    def _quantize(self, batch):
+        scale, zero_point = self.input['quantization']
+        if self.input['dtype'] == np.float32 or not scale:
+            return batch.astype(self.input['dtype'])
+        info = np.iinfo(self.input['dtype'])
+        return np.clip(np.round(batch / scale + zero_point), info.min, info.max).astype(self.input['dtype'])
+
+    def _dequantize(self, output):
+        scale, zero_point = self.output['quantization']
+        if self.output['dtype'] == np.float32 or not scale:
+            return output.astype(np.float32)
+        return (output.astype(np.float32) - zero_point) * scale
+
+    def predict_on_batch(self, batch):
+        if len(batch) != self.batch_size:
+            self.interpreter.resize_tensor_input(self.input['index'], [len(batch), *batch.shape[1:]])
+            self.interpreter.allocate_tensors()
+            self.input = self.interpreter.get_input_details()[0]
+            self.output = self.interpreter.get_output_details()[0]
+            self.batch_size = len(batch)
+        self.interpreter.set_tensor(self.input['index'], self._quantize(np.asarray(batch)))
+        self.interpreter.invoke()
+        return self._dequantize(self.interpreter.get_tensor(self.output['index']))
+
+def load_backend(path, intra_threads=None, inter_threads=None):
+    backend = backend_for(path)
+    if backend == 'onnx':
+        return OnnxModel(path, intra_threads, inter_threads)
+    if backend == 'tflite':
+        if inter_threads and inter_threads > 1:
+            logger.warning(f"Inter-op threads ({inter_threads}) only apply to ONNX and Keras models; "
+                           f"ignored for {path}")
+        return TFLiteModel(path, intra_threads)
+
+    import tensorflow as tf
+    if intra_threads:
+        tf.config.threading.set_intra_op_parallelism_threads(intra_threads)
+    if inter_threads:
+        tf.config.threading.set_inter_op_parallelism_threads(inter_threads)
+    return tf.keras.models.load_model(path)
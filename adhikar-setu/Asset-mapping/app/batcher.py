@@ -0,0 +1,106 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+import numpy as np
+
+class DynamicBatcher:
+    """One model shared by many threads, their predict_on_batch calls coalesced into larger batches
+
+    The first waiting request opens a window of max_latency seconds; the batch
+    runs when the window closes, max_batch patches are waiting, or every
+    registered client has a request waiting, whichever is first (so a lone job
+    never waits for the window). Requests larger than max_batch are run in
+    max_batch chunks. The model is only ever called from the batcher's own thread.
+    """
+
+    def __init__(self, model, max_batch, max_latency):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+        self.stats = {'batches': 0, 'requests': 0, 'patches': 0, 'busy_s': 0.0}
+        self.clients = 0
+        self._clients_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+        self._thread.start()
+
+    @contextmanager
+    def client(self):
+        # Registers a job that will send requests, for the early dispatch above
+        with self._clients_lock:
+            self.clients += 1
+        try:
+            yield self
+        finally:
+            with self._clients_lock:
+                self.clients -= 1
+
+    def predict_on_batch(self, batch):
+        future = Future()
+        self._queue.put((np.asarray(batch, dtype=np.float32).copy(), future))
+        return future.result()
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        requests = [first]
+        size = len(first[0])
+        deadline = time.monotonic() + self.max_latency
+        while size < self.max_batch and len(requests) < self.clients:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                # Finish this batch, then stop
+                self._queue.put(None)
+                break
+            requests.append(item)
+            size += len(item[0])
+        return requests
+
+    def _run(self):
+        while True:
+            requests = self._collect()
+            if requests is None:
+                return
+            started = time.perf_counter()
+            try:
+                batch = np.concatenate([patches for patches, _ in requests])
+                pred = np.concatenate([
+                    np.asarray(self.model.predict_on_batch(batch[start:start + self.max_batch]))
+                    for start in range(0, len(batch), self.max_batch)
+                ])
+            except Exception as e:
+                for _, future in requests:
+                    future.set_exception(e)
+                continue
+            start = 0
+            for patches, future in requests:
+                future.set_result(pred[start:start + len(patches)])
+                start += len(patches)
+            self.stats['batches'] += 1
+            self.stats['requests'] += len(requests)
+            self.stats['patches'] += len(batch)
+            self.stats['busy_s'] += time.perf_counter() - started
+
+    def summary(self):
+        batches = self.stats['batches']
+        return {
+            **self.stats,
+            'busy_s': round(self.stats['busy_s'], 3),
+            'mean_batch': round(self.stats['patches'] / batches, 1) if batches else None,
+            'mean_requests_per_batch': round(self.stats['requests'] / batches, 2) if batches else None,
+            'queued': self._queue.qsize(),
+        }
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
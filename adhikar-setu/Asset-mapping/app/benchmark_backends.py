@@ -0,0 +1,142 @@
+"""
+Compare classifier runtimes: load time, memory, latency and agreement.
+
+Each model file (.keras, .onnx, .tflite, float or int8) is loaded in its own
+fresh process, so start-up time and peak memory are not shared between
+runtimes. The same sample patches (from --tiles GeoTIFFs, or random noise
+without them) are classified in batches. Agreement is the share of patches
+whose class matches the first model, the Keras reference by default.
+
+Usage:
+    python benchmark_backends.py --tiles samples/*.tif
+    python benchmark_backends.py --models models/fra_land_classifier.keras models/fra_land_classifier_int8.tflite
+"""
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+import numpy as np
+
+from classifier import MODEL_DIR, MODEL_FILES, patch_size
+
+def _rss_mb():
+    # Peak resident set size of this process (Linux reports KB)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+def _run(model_path, patches_path, batch_size, threads, repeats, queue):
+    try:
+        patches = np.load(patches_path)
+        baseline = _rss_mb()
+        started = time.perf_counter()
+        from classifier import load_model
+        model = load_model(model_path, threads=threads)
+        # First call builds graphs / allocates tensors; timed separately
+        warmup_started = time.perf_counter()
+        model.predict_on_batch(patches[:batch_size])
+        load_s = warmup_started - started
+        warmup_s = time.perf_counter() - warmup_started
+        loaded = _rss_mb()
+
+        latencies, predictions = [], None
+        for _ in range(repeats):
+            outputs = []
+            for start in range(0, len(patches), batch_size):
+                batch = patches[start:start + batch_size]
+                t0 = time.perf_counter()
+                outputs.append(np.asarray(model.predict_on_batch(batch)))
+                latencies.append((time.perf_counter() - t0, len(batch)))
+            predictions = np.concatenate(outputs)
+
+        seconds = np.array([latency for latency, _ in latencies])
+        tiles = sum(count for _, count in latencies)
+        queue.put({
+            'model': model_path,
+            'size_mb': round(os.path.getsize(model_path) / 1e6, 3),
+            'load_s': round(load_s, 3),
+            'first_batch_s': round(warmup_s, 3),
+            'batch_p50_ms': round(float(np.percentile(seconds, 50)) * 1000, 2),
+            'batch_p95_ms': round(float(np.percentile(seconds, 95)) * 1000, 2),
+            'tiles_per_s': round(tiles / float(seconds.sum()), 1),
+            'rss_load_mb': round(loaded - baseline, 1),
+            'rss_peak_mb': round(_rss_mb(), 1),
+            'predictions': predictions.astype(np.float32).tolist(),
+        })
+    except Exception as e:
+        queue.put({'model': model_path, 'error': f"{type(e).__name__}: {e}"})
+
+def benchmark(model_path, patches_path, batch_size, threads, repeats):
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_run, args=(model_path, patches_path, batch_size, threads, repeats, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+def default_models():
+    candidates = [os.path.join(MODEL_DIR, MODEL_FILES['keras'])]
+    for pattern in ("*.onnx", "*.tflite"):
+        candidates += sorted(glob.glob(os.path.join(MODEL_DIR, pattern)))
+    return [path for path in candidates if os.path.exists(path)]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark classifier backends against the Keras model")
+    parser.add_argument("--models", nargs="+", default=None, help="Model files; the first is the reference")
+    parser.add_argument("--tiles", nargs="+", default=[], help="GeoTIFFs to sample patches from")
+    parser.add_argument("--samples", type=int, default=1024)
+    parser.add_argument("--batch", type=int, default=256)
+    parser.add_argument("--threads", type=int, default=None, help="Intra-op threads for every runtime")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    models = args.models or default_models()
+    if not models:
+        parser.error("No model files found")
+
+    paths = sorted({path for pattern in args.tiles for path in (glob.glob(pattern) or [pattern])})
+    if paths:
+        from export_model import sample_patches
+        patches = sample_patches(paths, args.samples, args.seed)
+    else:
+        patches = np.random.default_rng(args.seed).random((args.samples, patch_size, patch_size, 3), dtype=np.float32)
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="fra-bench-") as scratch:
+        patches_path = os.path.join(scratch, "patches.npy")
+        np.save(patches_path, patches)
+        for model_path in models:
+            results.append(benchmark(model_path, patches_path, args.batch, args.threads, args.repeats))
+
+    reference = next((np.array(r['predictions']) for r in results if 'predictions' in r), None)
+    for result in results:
+        predictions = result.pop('predictions', None)
+        if predictions is None or reference is None:
+            continue
+        predictions = np.array(predictions)
+        result['agreement'] = round(float((predictions.argmax(1) == reference.argmax(1)).mean()), 4)
+        result['max_prob_diff'] = round(float(np.abs(predictions - reference).max()), 4)
+
+    report = {'patches': len(patches), 'source': paths or 'random', 'batch': args.batch,
+              'threads': args.threads, 'results': results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    print(f"{'model':<40}{'MB':>7}{'load s':>8}{'p50 ms':>9}{'tiles/s':>10}{'RSS MB':>8}{'agree':>8}")
+    for r in results:
+        name = os.path.basename(r['model'])
+        if 'error' in r:
+            print(f"{name:<40} failed: {r['error']}")
+            continue
+        print(f"{name:<40}{r['size_mb']:>7.2f}{r['load_s']:>8.2f}{r['batch_p50_ms']:>9.1f}"
+              f"{r['tiles_per_s']:>10.0f}{r['rss_load_mb']:>8.0f}{r['agreement']:>8.2%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,498 @@
+import json
+import logging
+import math
+import os
+import time
+
+import cv2
+import numpy as np
+import rasterio
+import rasterio.shutil
+from rasterio.enums import MaskFlags, Resampling
+from rasterio.windows import Window
+
+from backends import load_backend
+from tile_cache import TileCache, file_hash, patch_key
+
+logger = logging.getLogger(__name__)
+
+# ---------------- CONFIG ----------------
+MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
+# keras (TensorFlow), onnx (ONNX Runtime) or tflite; the model file is picked by backend
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "keras")
+MODEL_FILES = {
+    'keras': "fra_land_classifier.keras",
+    'onnx': "fra_land_classifier.onnx",
+    'tflite': "fra_land_classifier.tflite",
+}
+MODEL_PATH = os.getenv("MODEL_PATH", os.path.join(MODEL_DIR, MODEL_FILES[MODEL_BACKEND]))
+# Runtime threads; 0 leaves the runtime default. Inter-op threads only apply to
+# ONNX and Keras models, TFLite runs with the intra-op count alone
+INTRA_OP_THREADS = int(os.getenv("INTRA_OP_THREADS", "0"))
+INTER_OP_THREADS = int(os.getenv("INTER_OP_THREADS", "1"))
+
+patch_size = 64
+stride = patch_size
+# Memory for one inference batch (inputs plus layer activations); sets the batch size
+BATCH_MEMORY_MB = float(os.getenv("BATCH_MEMORY_MB", "256"))
+# Memory for one strip of raster rows read at a time (input bands plus class rows)
+STRIP_MEMORY_MB = float(os.getenv("STRIP_MEMORY_MB", "256"))
+# Longest side of the overlay preview, read decimated instead of at full resolution
+PREVIEW_MAX_SIDE = int(os.getenv("PREVIEW_MAX_SIDE", "2048"))
+OUTPUT_BLOCK_SIZE = 256
+# Class rasters get internal overviews down to about this size (mode-resampled)
+OVERVIEW_MIN_SIDE = 256
+# Persistent per-patch class cache, off unless a path is set (e.g. ~/.cache/asset-mapping/tiles.sqlite)
+TILE_CACHE_PATH = os.getenv("TILE_CACHE_PATH", "")
+TILE_CACHE_MAX_ENTRIES = int(os.getenv("TILE_CACHE_MAX_ENTRIES", "1000000"))
+# Tiles with less valid data than this fraction (by the raster's nodata values or mask)
+# are written as no data (class 0) without inference
+EMPTY_TILE_MIN_VALID = float(os.getenv("EMPTY_TILE_MIN_VALID", "0.1"))
+NODATA_CLASS = 'no_data'
+# Coarse-to-fine: classify the raster downsampled by COARSE_FACTOR first; blocks of
+# COARSE_FACTOR x COARSE_FACTOR tiles that are confident and agree with their neighbours
+# take the coarse class, the rest are classified tile by tile
+COARSE_TO_FINE = os.getenv("COARSE_TO_FINE", "0") == "1"
+COARSE_FACTOR = int(os.getenv("COARSE_FACTOR", "4"))
+COARSE_MIN_CONFIDENCE = float(os.getenv("COARSE_MIN_CONFIDENCE", "0.9"))
+classes = ['agriculture', 'forest', 'water', 'homestead']
+color_map = {
+    1: (34, 139, 34),   # agriculture -> green
+    2: (0, 0, 255),     # forest -> blue
+    3: (255, 255, 0),   # water -> yellow
+    4: (255, 0, 0)      # homestead -> red
+}
+
+# ---------------- LOAD MODEL ----------------
+def load_model(path=MODEL_PATH, threads=None, inter_threads=None):
+    # The runtime follows the file extension (.keras, .onnx, .tflite) and is imported
+    # only here, so processes that never classify stay light
+    return load_backend(path, threads or INTRA_OP_THREADS or None, inter_threads or INTER_OP_THREADS or None)
+
+def open_tile_cache(model_path=MODEL_PATH, path=TILE_CACHE_PATH):
+    if not path:
+        return None
+    return TileCache(os.path.expanduser(path), file_hash(model_path), patch_size, TILE_CACHE_MAX_ENTRIES)
+
+# ---------------- TILING ENGINE ----------------
+def patch_bytes(model, patch_size):
+    # float32 input plus every layer's output for one patch
+    try:
+        sizes = [np.prod(layer.output.shape[1:]) for layer in model.layers]
+        return 4 * (patch_size * patch_size * 3 + int(sum(sizes)))
+    except (AttributeError, ValueError, TypeError):
+        return 4 * patch_size * patch_size * 3 * 16
+
+def batch_size_for(model, patch_size, memory_mb):
+    return max(1, int(memory_mb * 1024 * 1024) // patch_bytes(model, patch_size))
+
+def strip_rows(src, stride, memory_mb):
+    # Strips start on patch rows and stay within the memory budget (at least one patch
+    # row); they also span whole source and output blocks, or else whole output
+    # blocks, when such a height fits the budget
+    block_h = src.block_shapes[0][0]
+    row_bytes = src.width * (3 * np.dtype(src.dtypes[0]).itemsize + 1)
+    budget_rows = max(stride, int(memory_mb * 1024 * 1024) // row_bytes // stride * stride)
+    aligned = math.lcm(stride, block_h, OUTPUT_BLOCK_SIZE)
+    if aligned <= budget_rows:
+        return budget_rows // aligned * aligned
+    output_aligned = math.lcm(stride, OUTPUT_BLOCK_SIZE)
+    rows = budget_rows // output_aligned * output_aligned if output_aligned <= budget_rows else budget_rows
+    logger.warning(f"Strips spanning whole {block_h}-row source blocks need {aligned} rows, over the "
+                   f"{memory_mb} MB strip budget ({budget_rows} rows); using {rows}-row strips")
+    return rows
+
+def iter_strips(src, patch_size, stride, rows):
+    # Each strip reads patch_size - stride extra rows so its last patches are complete
+    halo = patch_size - stride
+    for row in range(0, src.height, rows):
+        height = min(rows, src.height - row)
+        read_h = min(height + halo, src.height - row)
+        strip = src.read([1, 2, 3], window=Window(0, row, src.width, read_h))
+        yield row, height, np.transpose(strip, (1, 2, 0))
+
+def iter_patches(strip, height, patch_size, stride):
+    for y in range(0, height, stride):
+        for x in range(0, strip.shape[1], stride):
+            win_w = min(patch_size, strip.shape[1] - x)
+            win_h = min(patch_size, strip.shape[0] - y)
+            patch = strip[y:y+win_h, x:x+win_w]
+            if (win_h != patch_size) or (win_w != patch_size):
+                patch = np.pad(
+                    patch,
+                    ((0, patch_size - win_h), (0, patch_size - win_w), (0, 0)),
+                    mode='reflect'
+                )
+            yield y, x, win_h, win_w, patch
+
+def strip_mask(src, strip, row):
+    # Valid pixels of a strip (a pixel is valid when any band is), or None when all are valid
+    flags = src.mask_flag_enums[:3]
+    if all(MaskFlags.all_valid in band for band in flags):
+        return None
+    nodata = src.nodatavals[:3]
+    if all(MaskFlags.nodata in band for band in flags) and None not in nodata:
+        # Plain nodata values: compared in memory instead of reading the mask
+        nodata = np.array(nodata, dtype=np.float64)
+        if np.isnan(nodata).any():
+            return ~(np.isnan(strip) | (strip == nodata)).all(axis=2)
+        return (strip != nodata).any(axis=2)
+    # Alpha bands and internal / sidecar masks
+    return src.dataset_mask(window=Window(0, row, src.width, strip.shape[0])) > 0
+
+def empty_tile(valid):
+    # True for tiles that are mostly no data; valid is the tile's part of strip_mask
+    return valid is not None and int(valid.sum()) < max(1, EMPTY_TILE_MIN_VALID * valid.size)
+
+def uniform_value(window):
+    # The band values of a tile whose pixels are all the same (water, fill-like flat
+    # land cover), or None; such tiles are classified once per value
+    first = window[0, 0]
+    return tuple(first.tolist()) if (window == first).all() else None
+
+def open_class_raster(src, path):
+    profile = {
+        'driver': 'GTiff', 'width': src.width, 'height': src.height, 'count': 1, 'dtype': 'uint8',
+        'crs': src.crs, 'transform': src.transform, 'nodata': 0,
+        'tiled': True, 'blockxsize': OUTPUT_BLOCK_SIZE, 'blockysize': OUTPUT_BLOCK_SIZE,
+        'compress': 'deflate',
+    }
+    dst = rasterio.open(path, 'w', **profile)
+    palette = {0: (0, 0, 0, 0)}
+    palette.update({idx: (*color_map[idx], 255) for idx in range(1, len(classes) + 1)})
+    dst.write_colormap(1, palette)
+    return dst
+
+def overview_factors(width, height):
+    factors = []
+    factor = 2
+    while max(width, height) / factor >= OVERVIEW_MIN_SIDE:
+        factors.append(factor)
+        factor *= 2
+    return factors
+
+def write_cog(path, output_path):
+    # Cloud-optimized copy: deflate tiles, mode-resampled overviews, colour table kept
+    with rasterio.Env() as env:
+        has_cog = 'COG' in env.drivers()
+    if has_cog:
+        rasterio.shutil.copy(
+            path, output_path, driver='COG', compress='deflate', blocksize=OUTPUT_BLOCK_SIZE,
+            overview_resampling='mode', overviews='AUTO'
+        )
+        os.remove(path)
+    else:
+        # GDAL < 3.1: same content, overviews appended to the tiled GeoTIFF
+        with rasterio.open(path, 'r+') as dst:
+            dst.build_overviews(overview_factors(dst.width, dst.height), Resampling.mode)
+            dst.update_tags(ns='rio_overview', resampling='mode')
+        os.replace(path, output_path)
+    return output_path
+
+def normalize_patch(patch):
+    if patch.max() > 2.0:
+        return patch.astype('float32') / 255.0
+    return patch.astype('float32')
+
+def classify_raster(model, src, dst, patch_size, stride, batch_size, strip_memory_mb, on_progress=None, cache=None,
+                    coarse=None):
+    # Streams the raster in block-aligned strips and writes each strip's classes to dst,
+    # so memory is bounded by the strip and batch budgets rather than the raster size.
+    # Patches are normalized one by one and predicted batch_size at a time; empty
+    # patches (no data), patches inside accepted coarse blocks, uniform patches whose
+    # value was already classified and patches found in the tile cache skip inference.
+    counts = {c: 0 for c in classes}
+    counts[NODATA_CLASS] = 0
+    cache_stats = {'hits': 0, 'misses': 0}
+    uniform = {}
+    pixel_counts = np.zeros(len(classes) + 1, dtype=np.int64)
+    total = ((src.height + stride - 1) // stride) * ((src.width + stride - 1) // stride)
+    batch = np.empty((batch_size, patch_size, patch_size, 3), dtype=np.float32)
+    slots = []
+    done = 0
+
+    def assign(classified, y, x, win_h, win_w, cls_idx):
+        classified[y:y+win_h, x:x+win_w] = cls_idx + 1
+        counts[classes[cls_idx]] += 1
+
+    def flush(classified):
+        nonlocal done
+        pred = model.predict_on_batch(batch[:len(slots)])
+        fresh = {}
+        for (y, x, win_h, win_w, key, value), cls_idx in zip(slots, np.argmax(np.asarray(pred), axis=1)):
+            assign(classified, y, x, win_h, win_w, cls_idx)
+            fresh[key] = cls_idx + 1
+            if value is not None:
+                uniform[value] = cls_idx + 1
+        if cache is not None:
+            cache.store(fresh)
+        done += len(slots)
+        slots.clear()
+        if on_progress:
+            on_progress(done, total)
+
+    rows = strip_rows(src, stride, strip_memory_mb)
+    for row, height, strip in iter_strips(src, patch_size, stride, rows):
+        classified = np.zeros(strip.shape[:2], dtype=np.uint8)
+        mask = strip_mask(src, strip, row)
+        patches = []
+        # Uniform tiles whose value is already being classified in this strip
+        waiting = {}
+        for y, x, win_h, win_w, patch in iter_patches(strip, height, patch_size, stride):
+            if empty_tile(mask[y:y+win_h, x:x+win_w] if mask is not None else None):
+                # Left as class 0, which is the class raster's nodata and not in any area
+                counts[NODATA_CLASS] += 1
+                done += 1
+                continue
+            if coarse is not None and coarse.lookup(row + y, x):
+                assign(classified, y, x, win_h, win_w, coarse.lookup(row + y, x) - 1)
+                coarse.skipped += 1
+                done += 1
+                continue
+            value = uniform_value(strip[y:y+win_h, x:x+win_w])
+            if value in uniform:
+                assign(classified, y, x, win_h, win_w, uniform[value] - 1)
+                done += 1
+            elif value in waiting:
+                waiting[value].append((y, x, win_h, win_w))
+            else:
+                if value is not None:
+                    waiting[value] = []
+                patches.append((y, x, win_h, win_w, patch, value))
+        keys = [patch_key(patch) for *_, patch, _ in patches] if cache is not None else [None] * len(patches)
+        cached = cache.lookup(keys) if cache is not None else {}
+        for (y, x, win_h, win_w, patch, value), key in zip(patches, keys):
+            if key in cached:
+                assign(classified, y, x, win_h, win_w, cached[key] - 1)
+                if value is not None:
+                    uniform[value] = cached[key]
+                cache_stats['hits'] += 1
+                done += 1
+                continue
+            cache_stats['misses'] += 1
+            batch[len(slots)] = normalize_patch(patch)
+            slots.append((y, x, win_h, win_w, key, value))
+            if len(slots) == batch_size:
+                flush(classified)
+        if slots:
+            flush(classified)
+        for value, tiles in waiting.items():
+            for y, x, win_h, win_w in tiles:
+                assign(classified, y, x, win_h, win_w, uniform[value] - 1)
+                done += 1
+        if on_progress:
+            on_progress(done, total)
+        if mask is not None:
+            # No-data pixels inside classified tiles do not count either
+            classified[~mask] = 0
+        # Halo rows are classified again, and overwritten, by the next strip
+        classified = classified[:height]
+        dst.write(classified, 1, window=Window(0, row, src.width, height))
+        pixel_counts += np.bincount(classified.ravel(), minlength=len(classes) + 1)
+
+    if cache is not None:
+        cache.evict()
+    lookups = cache_stats['hits'] + cache_stats['misses']
+    cache_stats['hit_rate'] = round(cache_stats['hits'] / lookups, 4) if cache is not None and lookups else None
+    return pixel_counts, counts, done, cache_stats
+
+def preview_shape(height, width, max_side):
+    scale = max(1, math.ceil(max(height, width) / max_side))
+    return max(1, height // scale), max(1, width // scale)
+
+def read_preview(path, bands, shape):
+    # Opens the smallest overview level still at least as large as shape, so the full
+    # raster is never read; rasters without overviews fall back to a decimated read
+    with rasterio.open(path) as dataset:
+        factors = dataset.overviews(bands[0])
+        height, width = dataset.height, dataset.width
+    level = None
+    for index, factor in enumerate(factors):
+        if math.ceil(height / factor) >= shape[0] and math.ceil(width / factor) >= shape[1]:
+            level = index
+    options = {} if level is None else {'overview_level': level}
+    with rasterio.open(path, **options) as dataset:
+        return dataset.read(bands, out_shape=(len(bands), *shape), resampling=Resampling.nearest)
+
+# ---------------- COARSE-TO-FINE ----------------
+def class_probabilities(pred):
+    # Softmax outputs pass through; logits are normalized
+    pred = np.asarray(pred, dtype=np.float32)
+    if pred.min() >= 0 and np.allclose(pred.sum(axis=1), 1.0, atol=1e-3):
+        return pred
+    exp = np.exp(pred - pred.max(axis=1, keepdims=True))
+    return exp / exp.sum(axis=1, keepdims=True)
+
+class CoarseGrid:
+    """Coarse classes of blocks of factor x factor tiles; 0 where tiles must be classified"""
+
+    def __init__(self, classes, factor, block, blocks):
+        self.classes = classes
+        self.factor = factor
+        self.block = block
+        self.blocks = blocks
+        self.skipped = 0
+
+    def lookup(self, y, x):
+        return int(self.classes[y // self.block, x // self.block])
+
+    def stats(self, tiles):
+        accepted = int((self.classes > 0).sum())
+        return {
+            'factor': self.factor,
+            'blocks': self.blocks,
+            'accepted_blocks': accepted,
+            'tiles_skipped': self.skipped,
+            'skipped_fraction': round(self.skipped / tiles, 4) if tiles else 0.0,
+        }
+
+def accepted_blocks(block_classes, confidence, empty, min_confidence):
+    # A block is accepted when it is confident and every non-empty neighbour (8-connected)
+    # has the same coarse class; raster edges and empty blocks do not veto
+    ok = (confidence >= min_confidence) & ~empty
+    padded = np.pad(block_classes, 1)
+    padded_valid = np.pad(~empty, 1)
+    rows, cols = block_classes.shape
+    for dy in (-1, 0, 1):
+        for dx in (-1, 0, 1):
+            if dy == dx == 0:
+                continue
+            neighbour = padded[1 + dy:1 + dy + rows, 1 + dx:1 + dx + cols]
+            neighbour_valid = padded_valid[1 + dy:1 + dy + rows, 1 + dx:1 + dx + cols]
+            ok &= ~neighbour_valid | (neighbour == block_classes)
+    return np.where(ok, block_classes, 0).astype(np.uint8)
+
+def coarse_pass(model, src, patch_size, batch_size, factor=COARSE_FACTOR, min_confidence=COARSE_MIN_CONFIDENCE):
+    # Each patch_size patch of the raster read at 1/factor resolution covers a block of
+    # factor x factor full-resolution tiles; one row of blocks is read at a time
+    block = patch_size * factor
+    rows, cols = math.ceil(src.height / block), math.ceil(src.width / block)
+    block_classes = np.zeros((rows, cols), dtype=np.uint8)
+    confidence = np.zeros((rows, cols), dtype=np.float32)
+    empty = np.zeros((rows, cols), dtype=bool)
+    batch = np.empty((batch_size, patch_size, patch_size, 3), dtype=np.float32)
+    slots = []
+
+    def flush():
+        probs = class_probabilities(model.predict_on_batch(batch[:len(slots)]))
+        for (r, c), prob in zip(slots, probs):
+            block_classes[r, c] = int(np.argmax(prob)) + 1
+            confidence[r, c] = prob.max()
+        slots.clear()
+
+    out_w = math.ceil(src.width / factor)
+    masked = not all(MaskFlags.all_valid in band for band in src.mask_flag_enums[:3])
+    for r in range(rows):
+        row = r * block
+        height = min(block, src.height - row)
+        window = Window(0, row, src.width, height)
+        out_h = math.ceil(height / factor)
+        strip = src.read([1, 2, 3], window=window, out_shape=(3, out_h, out_w), resampling=Resampling.average)
+        strip = np.transpose(strip, (1, 2, 0))
+        mask = src.dataset_mask(window=window, out_shape=(out_h, out_w)) > 0 if masked else None
+        for y, x, win_h, win_w, patch in iter_patches(strip, strip.shape[0], patch_size, patch_size):
+            c = x // patch_size
+            if empty_tile(mask[y:y+win_h, x:x+win_w] if mask is not None else None):
+                empty[r, c] = True
+                continue
+            batch[len(slots)] = normalize_patch(patch)
+            slots.append((r, c))
+            if len(slots) == batch_size:
+                flush()
+    if slots:
+        flush()
+    return CoarseGrid(accepted_blocks(block_classes, confidence, empty, min_confidence), factor, block, rows * cols)
+
+def raster_agreement(path, reference_path, rows=1024):
+    # Share of the reference's classified pixels (class > 0) that have the same class in path
+    same = total = 0
+    with rasterio.open(path) as a, rasterio.open(reference_path) as b:
+        for row in range(0, b.height, rows):
+            window = Window(0, row, b.width, min(rows, b.height - row))
+            ref = b.read(1, window=window)
+            classified = ref > 0
+            same += int((a.read(1, window=window)[classified] == ref[classified]).sum())
+            total += int(classified.sum())
+    return round(same / total, 4) if total else None
+
+# ---------------- RESULTS ----------------
+def area_summary(pixel_counts, transform):
+    pixel_area = abs(transform.a * transform.e)
+    area_per_class_m2 = {}
+    for idx, cls in enumerate(classes, start=1):
+        area_per_class_m2[cls] = int(pixel_counts[idx]) * pixel_area
+
+    total_area_m2 = sum(area_per_class_m2.values())
+    area_percent = {k: (v / total_area_m2) * 100 if total_area_m2 else 0.0 for k, v in area_per_class_m2.items()}
+    return area_per_class_m2, area_percent
+
+def overlay_preview(input_path, classified_path, max_side=PREVIEW_MAX_SIDE):
+    # Returns (original, overlay) RGB uint8 arrays at preview resolution
+    with rasterio.open(input_path) as src:
+        shape = preview_shape(src.height, src.width, max_side)
+    orig = read_preview(input_path, [1, 2, 3], shape)
+    orig = np.transpose(orig, (1, 2, 0))
+    if orig.max() > 2.0:
+        orig_uint8 = ((orig / orig.max()) * 255).astype(np.uint8)
+    else:
+        orig_uint8 = (orig * 255).astype(np.uint8)
+
+    classified = read_preview(classified_path, [1], shape)[0]
+    mask_rgb = np.zeros_like(orig_uint8, dtype=np.uint8)
+    for idx in range(1, len(classes)+1):
+        mask_rgb[classified == idx] = color_map.get(idx, (128, 128, 128))
+
+    overlay = cv2.addWeighted(orig_uint8, 0.6, mask_rgb, 0.4, 0)
+    return orig_uint8, overlay
+
+def write_overlay(overlay, path):
+    cv2.imwrite(path, cv2.cvtColor(overlay, cv2.COLOR_RGB2BGR))
+    return path
+
+def classify_file(model, input_path, output_dir, on_progress=None, overlay=True, cache=None,
+                  coarse_to_fine=COARSE_TO_FINE, verify_coarse=False, batch_size=None):
+    # Classifies one GeoTIFF into output_dir and returns its summary. With verify_coarse
+    # a coarse-to-fine run is also classified exhaustively (into output_dir/exhaustive)
+    # and the summary reports how well the two agree.
+    os.makedirs(output_dir, exist_ok=True)
+    started = time.perf_counter()
+    classified_path = os.path.join(output_dir, "classified.tif")
+    strips_path = os.path.join(output_dir, "classified.strips.tif")
+    with rasterio.open(input_path) as src:
+        batch_size = batch_size or batch_size_for(model, patch_size, BATCH_MEMORY_MB)
+        coarse = coarse_pass(model, src, patch_size, batch_size) if coarse_to_fine else None
+        with open_class_raster(src, strips_path) as dst:
+            pixel_counts, counts, total_tiles, cache_stats = classify_raster(
+                model, src, dst, patch_size, stride, batch_size, STRIP_MEMORY_MB,
+                on_progress=on_progress, cache=cache, coarse=coarse
+            )
+        area_per_class_m2, area_percent = area_summary(pixel_counts, src.transform)
+        nodata_m2 = int(pixel_counts[0]) * abs(src.transform.a * src.transform.e)
+        size = {'width': src.width, 'height': src.height}
+    write_cog(strips_path, classified_path)
+
+    summary = {
+        'input': input_path,
+        'classified': classified_path,
+        **size,
+        'tiles': total_tiles,
+        'tile_counts': counts,
+        'area_m2': area_per_class_m2,
+        'area_percent': area_percent,
+        'nodata_m2': nodata_m2,
+        'cache': cache_stats,
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+    if coarse is not None:
+        summary['coarse'] = coarse.stats(total_tiles)
+        if verify_coarse:
+            exhaustive = classify_file(model, input_path, os.path.join(output_dir, "exhaustive"), overlay=False,
+                                       cache=cache, coarse_to_fine=False, batch_size=batch_size)
+            summary['coarse']['agreement'] = raster_agreement(classified_path, exhaustive['classified'])
+            summary['coarse']['exhaustive_seconds'] = exhaustive['seconds']
+    if overlay:
+        _, overlay_rgb = overlay_preview(input_path, classified_path)
+        summary['overlay'] = write_overlay(overlay_rgb, os.path.join(output_dir, "classified_overlay.png"))
+    with open(os.path.join(output_dir, "summary.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+    return summary
@@ -0,0 +1,185 @@
+"""
+Classify GeoTIFFs without the Streamlit app.
+
+Inputs are files and/or directories (searched for *.tif / *.tiff). Files
+are spread over a process pool; each worker loads the model once and
+classifies the files it is given into <output-dir>/<name>/ (classified.tif,
+classified_overlay.png, summary.json). With --cache (or TILE_CACHE_PATH)
+workers share a persistent tile cache; with --claims each output directory
+also gets zonal.csv, the land cover of every claim polygon. --coarse-to-fine
+classifies tile by tile only where a downsampled first pass is not confident;
+--verify-coarse also runs the exhaustive classification and reports their
+agreement. A summary table of every file is written to
+<output-dir>/summary.csv and summary.json.
+
+Usage:
+    python cli.py data/district_tiles --output-dir outputs/batch --workers 4
+    python cli.py a.tif b.tif --no-overlay
+    python cli.py tiles/ --cache ~/.cache/asset-mapping/tiles.sqlite
+    python cli.py tiles/ --model models/fra_land_classifier_int8.tflite
+    python cli.py mosaic.tif --coarse-to-fine --verify-coarse
+"""
+import argparse
+import csv
+import glob
+import json
+import multiprocessing
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from classifier import COARSE_TO_FINE, MODEL_PATH, NODATA_CLASS, TILE_CACHE_PATH, classes
+
+RASTER_PATTERNS = ("*.tif", "*.tiff", "*.TIF", "*.TIFF")
+
+# Model and tile cache of this worker process, opened once by the pool initializer
+_model = None
+_cache = None
+
+def _init_worker(model_path, threads, cache_path):
+    global _model, _cache
+    from classifier import load_model, open_tile_cache
+    _model = load_model(model_path, threads=threads)
+    _cache = open_tile_cache(model_path, cache_path)
+
+def _classify(input_path, output_dir, overlay, claims, coarse_to_fine, verify_coarse):
+    from classifier import classify_file
+    try:
+        summary = classify_file(_model, input_path, output_dir, overlay=overlay, cache=_cache,
+                                coarse_to_fine=coarse_to_fine, verify_coarse=verify_coarse)
+        if claims:
+            from zonal import write_csv, zonal_stats
+            results = zonal_stats(summary['classified'], claims)
+            # Claims outside this raster are left out of its table
+            summary['zonal'] = write_csv([r for r in results if r['covered_ha'] > 0],
+                                         os.path.join(output_dir, "zonal.csv"))
+        return summary
+    except Exception as e:
+        return {'input': input_path, 'error': f"{type(e).__name__}: {e}", 'traceback': traceback.format_exc()}
+
+def collect_inputs(paths, recursive=False):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for pattern in RASTER_PATTERNS:
+                pattern = os.path.join(path, "**", pattern) if recursive else os.path.join(path, pattern)
+                files.extend(glob.glob(pattern, recursive=recursive))
+        else:
+            files.append(path)
+    # Case-insensitive patterns overlap on some filesystems
+    return sorted(set(os.path.abspath(f) for f in files))
+
+def output_dirs(files, output_dir):
+    # One directory per input, named after the file; repeated names get a suffix
+    dirs, seen = {}, {}
+    for path in files:
+        name = os.path.splitext(os.path.basename(path))[0]
+        seen[name] = seen.get(name, 0) + 1
+        dirs[path] = os.path.join(output_dir, name if seen[name] == 1 else f"{name}_{seen[name]}")
+    return dirs
+
+def write_summary(results, output_dir):
+    rows = []
+    for result in results:
+        row = {'input': result['input'], 'status': 'failed' if 'error' in result else 'ok'}
+        if 'error' in result:
+            row['error'] = result['error']
+        else:
+            row.update(width=result['width'], height=result['height'], tiles=result['tiles'], seconds=result['seconds'],
+                       empty_tiles=result['tile_counts'][NODATA_CLASS], nodata_ha=round(result['nodata_m2'] / 10000.0, 4),
+                       cache_hits=result['cache']['hits'], cache_misses=result['cache']['misses'],
+                       cache_hit_rate=result['cache']['hit_rate'])
+            if 'coarse' in result:
+                row.update(coarse_skipped_fraction=result['coarse']['skipped_fraction'],
+                           coarse_agreement=result['coarse'].get('agreement'))
+            for cls in classes:
+                row[f'{cls}_ha'] = round(result['area_m2'][cls] / 10000.0, 4)
+                row[f'{cls}_pct'] = round(result['area_percent'][cls], 2)
+            row['classified'] = result['classified']
+        rows.append(row)
+
+    fields = ['input', 'status', 'width', 'height', 'tiles', 'empty_tiles', 'cache_hits', 'cache_misses', 'cache_hit_rate',
+              'coarse_skipped_fraction', 'coarse_agreement', 'seconds', 'nodata_ha']
+    fields += [f'{cls}_{unit}' for cls in classes for unit in ('ha', 'pct')] + ['classified', 'error']
+    with open(os.path.join(output_dir, "summary.csv"), "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+    with open(os.path.join(output_dir, "summary.json"), "w") as f:
+        json.dump(results, f, indent=2)
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Classify GeoTIFFs into land-cover rasters")
+    parser.add_argument("inputs", nargs="+", help="GeoTIFF files and/or directories")
+    parser.add_argument("--output-dir", default="outputs/batch")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 1) // 2),
+                        help="Worker processes, each with its own model")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="Intra-op threads per worker (default: CPUs / workers)")
+    parser.add_argument("--model", default=MODEL_PATH, help="Model file; .keras, .onnx or .tflite selects the runtime")
+    parser.add_argument("--recursive", action="store_true", help="Search directories recursively")
+    parser.add_argument("--no-overlay", action="store_true", help="Skip the PNG overlay previews")
+    parser.add_argument("--claims", nargs="+", help="Claim GeoJSON / processed document JSON for per-claim statistics")
+    parser.add_argument("--cache", default=TILE_CACHE_PATH, help="Tile cache database (default: TILE_CACHE_PATH, none if unset)")
+    parser.add_argument("--no-cache", action="store_true", help="Classify every tile, without the tile cache")
+    parser.add_argument("--coarse-to-fine", action="store_true", default=COARSE_TO_FINE,
+                        help="Skip tiles inside confident, uniform regions of a downsampled first pass")
+    parser.add_argument("--verify-coarse", action="store_true",
+                        help="With --coarse-to-fine, also classify exhaustively and report the agreement")
+    args = parser.parse_args()
+
+    files = collect_inputs(args.inputs, args.recursive)
+    if not files:
+        parser.error("No GeoTIFF inputs found")
+    os.makedirs(args.output_dir, exist_ok=True)
+    dirs = output_dirs(files, args.output_dir)
+    claims = None
+    if args.claims:
+        from zonal import load_claims
+        claims = load_claims(sorted({path for pattern in args.claims for path in (glob.glob(pattern) or [pattern])}))
+    workers = max(1, min(args.workers, len(files)))
+    threads = args.threads or max(1, (os.cpu_count() or 1) // workers)
+
+    started = time.perf_counter()
+    results = []
+    # spawn: TensorFlow is not fork-safe, and workers should not inherit parent state
+    context = multiprocessing.get_context("spawn")
+    cache_path = None if args.no_cache else args.cache or None
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(args.model, threads, cache_path)) as pool:
+        futures = {pool.submit(_classify, path, dirs[path], not args.no_overlay, claims,
+                               args.coarse_to_fine, args.verify_coarse): path for path in files}
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if 'error' in result:
+                status = f"failed: {result['error']}"
+            else:
+                status = f"{result['tiles']} tiles in {result['seconds']}s"
+                if result['tile_counts'][NODATA_CLASS]:
+                    status += f", {result['tile_counts'][NODATA_CLASS]} empty"
+                if result['cache']['hit_rate'] is not None:
+                    status += f", cache hit rate {result['cache']['hit_rate']:.1%}"
+                if 'coarse' in result:
+                    status += f", {result['coarse']['skipped_fraction']:.1%} skipped by the coarse pass"
+                    if result['coarse'].get('agreement') is not None:
+                        status += f" ({result['coarse']['agreement']:.2%} agreement)"
+            print(f"[{len(results)}/{len(files)}] {os.path.basename(futures[future])}: {status}", flush=True)
+
+    results.sort(key=lambda result: result['input'])
+    rows = write_summary(results, args.output_dir)
+    failed = sum(1 for row in rows if row['status'] == 'failed')
+    # No data and repeated uniform tiles never reach the cache, so the rate is over lookups
+    hits = sum(row.get('cache_hits') or 0 for row in rows)
+    lookups = hits + sum(row.get('cache_misses') or 0 for row in rows)
+    if cache_path and lookups:
+        print(f"Tile cache: {hits}/{lookups} looked-up tiles reused ({hits / lookups:.1%})")
+    print(f"Classified {len(rows) - failed}/{len(rows)} files in {time.perf_counter() - started:.1f}s "
+          f"({workers} workers x {threads} threads); summary in {os.path.join(args.output_dir, 'summary.csv')}")
+    if failed:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
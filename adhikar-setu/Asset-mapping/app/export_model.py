@@ -0,0 +1,127 @@
+"""
+Export the Keras land classifier to ONNX or TFLite for lighter CPU inference.
+
+With --int8 the export is post-training quantized: weights and activations
+become int8, with activation ranges calibrated on patches sampled from the
+--calibration GeoTIFFs (normalized exactly as the classifier does). Inputs
+and outputs stay float32, so the exported model drops into the tiling
+engine unchanged; point MODEL_PATH (or cli.py --model) at it.
+
+Usage:
+    python export_model.py --format tflite --int8 --calibration samples/*.tif
+    python export_model.py --format onnx --output models/fra_land_classifier.onnx
+"""
+import argparse
+import glob
+import os
+import random
+import tempfile
+
+import numpy as np
+import rasterio
+
+from classifier import (MODEL_DIR, MODEL_FILES, empty_tile, iter_patches, iter_strips, normalize_patch, patch_size,
+                        strip_mask, stride, strip_rows)
+
+def sample_patches(paths, count, seed=0, strip_memory_mb=64):
+    """Up to count normalized patches, drawn uniformly from the non-empty tiles of all rasters (reservoir sampling)"""
+    rng = random.Random(seed)
+    samples = []
+    seen = 0
+    for path in paths:
+        with rasterio.open(path) as src:
+            rows = strip_rows(src, stride, strip_memory_mb)
+            for row, height, strip in iter_strips(src, patch_size, stride, rows):
+                mask = strip_mask(src, strip, row)
+                for y, x, win_h, win_w, patch in iter_patches(strip, height, patch_size, stride):
+                    # The classifier never sees empty tiles, so they do not calibrate it either
+                    if empty_tile(mask[y:y+win_h, x:x+win_w] if mask is not None else None):
+                        continue
+                    seen += 1
+                    if len(samples) < count:
+                        samples.append(normalize_patch(patch))
+                    else:
+                        slot = rng.randrange(seen)
+                        if slot < count:
+                            samples[slot] = normalize_patch(patch)
+    return np.stack(samples) if samples else np.empty((0, patch_size, patch_size, 3), dtype=np.float32)
+
+def export_tflite(model, output_path, calibration=None):
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if calibration is not None:
+        def representative_dataset():
+            for patch in calibration:
+                yield [patch[np.newaxis]]
+
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    with open(output_path, "wb") as f:
+        f.write(converter.convert())
+    return output_path
+
+def export_onnx(model, output_path, calibration=None, opset=17):
+    import tensorflow as tf
+    import tf2onnx
+
+    spec = (tf.TensorSpec((None, patch_size, patch_size, 3), tf.float32, name="input"),)
+    if calibration is None:
+        tf2onnx.convert.from_keras(model, input_signature=spec, opset=opset, output_path=output_path)
+        return output_path
+
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+
+    class PatchReader(CalibrationDataReader):
+        def __init__(self, patches, batch_size=32):
+            self.batches = iter([patches[i:i + batch_size] for i in range(0, len(patches), batch_size)])
+
+        def get_next(self):
+            batch = next(self.batches, None)
+            return None if batch is None else {"input": batch}
+
+    with tempfile.TemporaryDirectory(prefix="fra-onnx-") as scratch:
+        float_path = os.path.join(scratch, "float.onnx")
+        tf2onnx.convert.from_keras(model, input_signature=spec, opset=opset, output_path=float_path)
+        quantize_static(
+            float_path, output_path, PatchReader(calibration),
+            quant_format=QuantFormat.QDQ, per_channel=True,
+            activation_type=QuantType.QInt8, weight_type=QuantType.QInt8,
+        )
+    return output_path
+
+def default_output(fmt, int8):
+    name, _ = os.path.splitext(MODEL_FILES[fmt])
+    return os.path.join(MODEL_DIR, f"{name}_int8.{fmt}" if int8 else f"{name}.{fmt}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the land classifier to ONNX or TFLite")
+    parser.add_argument("--format", choices=["onnx", "tflite"], required=True)
+    parser.add_argument("--model", default=os.path.join(MODEL_DIR, MODEL_FILES['keras']), help="Keras model to export")
+    parser.add_argument("--output", help="Output file (default: next to the Keras model)")
+    parser.add_argument("--int8", action="store_true", help="Post-training int8 quantization")
+    parser.add_argument("--calibration", nargs="+", default=[], help="GeoTIFFs to sample calibration patches from")
+    parser.add_argument("--samples", type=int, default=500, help="Calibration patches")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    calibration = None
+    if args.int8:
+        paths = sorted({path for pattern in args.calibration for path in (glob.glob(pattern) or [pattern])})
+        if not paths:
+            parser.error("--int8 needs --calibration GeoTIFFs")
+        calibration = sample_patches(paths, args.samples, args.seed)
+        if not len(calibration):
+            parser.error("No calibration patches found")
+        print(f"Calibrating on {len(calibration)} patches from {len(paths)} rasters")
+
+    import tensorflow as tf
+    model = tf.keras.models.load_model(args.model)
+    output = args.output or default_output(args.format, args.int8)
+    export = export_onnx if args.format == "onnx" else export_tflite
+    export(model, output, calibration)
+    print(f"Wrote {output} ({os.path.getsize(output) / 1e6:.2f} MB; Keras model {os.path.getsize(args.model) / 1e6:.2f} MB)")
+
+if __name__ == "__main__":
+    main()
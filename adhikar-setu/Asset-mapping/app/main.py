@@ -1,107 +1,110 @@
 import streamlit as st
-import numpy as np
-import cv2
-import rasterio
-import tensorflow as tf
 import json
 import os
-from rasterio.windows import Window
 
-# ---------------- CONFIG ----------------
-MODEL_PATH = "models/fra_land_classifier.keras"
-OUTPUT_DIR = "outputs"
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+import requests
+
+from classifier import COARSE_TO_FINE, NODATA_CLASS
 
-patch_size = 64
-stride = patch_size
-classes = ['agriculture', 'forest', 'water', 'homestead']
-color_map = {
-    1: (34, 139, 34),   # agriculture -> green
-    2: (0, 0, 255),     # forest -> blue
-    3: (255, 255, 0),   # water -> yellow
-    4: (255, 0, 0)      # homestead -> red
-}
+# ---------------- CONFIG ----------------
+# Inference service (server.py) that owns the model and runs every session's jobs
+SERVER_URL = os.getenv("INFERENCE_SERVER_URL", "http://127.0.0.1:8600")
+# Event streams that time out are reopened (the server replays past events) this many times
+STREAM_RECONNECTS = 5
 
-# ---------------- LOAD MODEL ----------------
 st.title("🌍 Land Cover Classification App")
 st.write("Upload an aerial GeoTIFF image and get predicted resource distribution.")
 
-@st.cache_resource
-def load_model():
-    return tf.keras.models.load_model(MODEL_PATH)
-
-model = load_model()
+def submit_job(uploaded_file, claims_file, coarse_to_fine):
+    files = {'file': (uploaded_file.name, uploaded_file.getvalue(), "image/tiff")}
+    if claims_file is not None:
+        files['claims'] = (claims_file.name, claims_file.getvalue(), "application/json")
+    response = requests.post(f"{SERVER_URL}/jobs", files=files, params={'coarse_to_fine': coarse_to_fine}, timeout=300)
+    response.raise_for_status()
+    return response.json()['job_id']
+
+def stream_events(job_id):
+    # Yields the job's progress events until it completes or fails
+    with requests.get(f"{SERVER_URL}/jobs/{job_id}/events", stream=True, timeout=(10, 60)) as response:
+        response.raise_for_status()
+        for line in response.iter_lines(decode_unicode=True):
+            if line and line.startswith("data: "):
+                yield json.loads(line[len("data: "):])
+
+def follow_job(job_id, progress):
+    # Returns the completed summary, or raises RuntimeError when the job failed
+    for attempt in range(STREAM_RECONNECTS + 1):
+        try:
+            for event in stream_events(job_id):
+                if event['type'] == 'progress':
+                    progress.progress(min(1.0, event['progress']))
+                elif event['type'] == 'completed':
+                    progress.progress(1.0)
+                    return event['summary']
+                elif event['type'] == 'failed':
+                    raise RuntimeError(event['error'])
+        except (requests.Timeout, requests.exceptions.ChunkedEncodingError):
+            # Stalled server or proxy: the job keeps running, so reattach to its events
+            if attempt == STREAM_RECONNECTS:
+                raise
+    raise requests.Timeout(f"Event stream of job {job_id} ended before the job finished")
+
+def job_file(job_id, name):
+    response = requests.get(f"{SERVER_URL}/jobs/{job_id}/files/{name}", timeout=60)
+    response.raise_for_status()
+    return response.content
 
 uploaded_file = st.file_uploader("Upload a GeoTIFF image", type=["tif", "tiff"])
+claims_file = st.file_uploader("Optional: FRA claim polygons (GeoJSON or processed document JSON)",
+                               type=["geojson", "json"])
+coarse_to_fine = st.checkbox("Coarse-to-fine (faster on large homogeneous areas)", value=COARSE_TO_FINE)
 
 if uploaded_file is not None:
-    input_path = os.path.join(OUTPUT_DIR, "uploaded_input.tif")
-    with open(input_path, "wb") as f:
-        f.write(uploaded_file.read())
-
-    st.success("✅ File uploaded successfully!")
-    st.write("Processing... this may take a while ⏳")
-
-    src = rasterio.open(input_path)
-    classified = np.zeros((src.height, src.width), dtype=np.uint8)
-    counts = {c: 0 for c in classes}
-    total_tiles = 0
-
-    for y in range(0, src.height, stride):
-        for x in range(0, src.width, stride):
-            win_w = min(patch_size, src.width - x)
-            win_h = min(patch_size, src.height - y)
-            window = Window(x, y, win_w, win_h)
-            patch = src.read([1, 2, 3], window=window)
-            patch = np.transpose(patch, (1, 2, 0))
-            if (win_h != patch_size) or (win_w != patch_size):
-                patch = np.pad(
-                    patch,
-                    ((0, patch_size - win_h), (0, patch_size - win_w), (0, 0)),
-                    mode='reflect'
-                )
-
-            if patch.max() > 2.0:
-                patch_in = patch.astype('float32') / 255.0
+    # One job per upload and options in this session; reruns reattach to it
+    job_key = (uploaded_file.name, uploaded_file.size, claims_file.name if claims_file else None, coarse_to_fine)
+    summary = None
+    try:
+        if st.session_state.get('job_key') != job_key:
+            st.session_state['job_id'] = submit_job(uploaded_file, claims_file, coarse_to_fine)
+            st.session_state['job_key'] = job_key
+        job_id = st.session_state['job_id']
+
+        st.success("✅ File uploaded successfully!")
+        st.write("Processing... this may take a while ⏳")
+        progress = st.progress(0.0)
+        summary = follow_job(job_id, progress)
+    except RuntimeError as e:
+        st.error(f"Classification failed: {e}")
+    except requests.ConnectionError:
+        st.error(f"Inference service not reachable at {SERVER_URL}; start it with `python server.py`")
+        st.stop()
+    except requests.RequestException as e:
+        st.error(f"Inference service error: {e}")
+        st.stop()
+
+    if summary is not None:
+        if summary['tile_counts'][NODATA_CLASS]:
+            st.caption(f"{summary['tile_counts'][NODATA_CLASS]} of {summary['tiles']} tiles are no data and "
+                       f"were not classified ({summary['nodata_m2'] / 10000.0:.2f} ha left out of the areas)")
+        if 'coarse' in summary:
+            st.caption(f"Coarse pass: {summary['coarse']['tiles_skipped']} of {summary['tiles']} tiles "
+                       f"({summary['coarse']['skipped_fraction']:.0%}) taken from confident uniform regions")
+        if summary['cache']['hit_rate'] is not None:
+            lookups = summary['cache']['hits'] + summary['cache']['misses']
+            st.caption(f"Tile cache: {summary['cache']['hits']} of {lookups} looked-up tiles reused "
+                       f"({summary['cache']['hit_rate']:.0%})")
+
+        st.image(job_file(job_id, "original.png"), caption="Original Image", use_column_width=True)
+        st.image(job_file(job_id, "classified_overlay.png"), caption="Classified Overlay", use_column_width=True)
+        st.download_button("Download classified GeoTIFF", job_file(job_id, "classified.tif"),
+                           file_name="classified.tif", mime="image/tiff")
+
+        st.subheader("📊 Land Cover Percentage")
+        st.json(summary['area_percent'])
+
+        if claims_file is not None:
+            st.subheader("🗺️ Land Cover per Claim (ha)")
+            if summary.get('zonal'):
+                st.dataframe(summary['zonal'])
             else:
-                patch_in = patch.astype('float32')
-
-            pred = model.predict(np.expand_dims(patch_in, 0), verbose=0)
-            cls_idx = int(np.argmax(pred, axis=1)[0])
-            classified[y:y+win_h, x:x+win_w] = cls_idx + 1
-            counts[classes[cls_idx]] += 1
-            total_tiles += 1
-
-    # Area calculation
-    transform = src.transform
-    pixel_area = abs(transform.a * transform.e)
-    area_per_class_m2 = {}
-    for idx, cls in enumerate(classes, start=1):
-        mask = (classified == idx)
-        pixel_count = int(mask.sum())
-        area_per_class_m2[cls] = pixel_count * pixel_area
-
-    total_area_m2 = sum(area_per_class_m2.values())
-    area_percent = {k: (v / total_area_m2) * 100 for k, v in area_per_class_m2.items()}
-
-    # Overlay image
-    orig = src.read([1, 2, 3])
-    orig = np.transpose(orig, (1, 2, 0))
-    if orig.max() > 2.0:
-        orig_uint8 = ((orig / orig.max()) * 255).astype(np.uint8)
-    else:
-        orig_uint8 = (orig * 255).astype(np.uint8)
-
-    mask_rgb = np.zeros_like(orig_uint8, dtype=np.uint8)
-    for idx in range(1, len(classes)+1):
-        mask_rgb[classified == idx] = color_map.get(idx, (128, 128, 128))
-
-    overlay = cv2.addWeighted(orig_uint8, 0.6, mask_rgb, 0.4, 0)
-    overlay_path = os.path.join(OUTPUT_DIR, "classified_overlay.png")
-    cv2.imwrite(overlay_path, cv2.cvtColor(overlay, cv2.COLOR_RGB2BGR))
-
-    st.image(orig_uint8, caption="Original Image", use_column_width=True)
-    st.image(overlay, caption="Classified Overlay", use_column_width=True)
-
-    st.subheader("📊 Land Cover Percentage")
-    st.json(area_percent)
+                st.warning("No claim polygons found in the uploaded file")
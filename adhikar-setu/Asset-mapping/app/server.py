@@ -0,0 +1,219 @@
+"""
+Local inference service: one model, many sessions.
+
+The service loads the classifier once and runs uploaded GeoTIFFs as jobs, each
+in its own directory under JOBS_DIR (input.tif, classified.tif, original.png,
+classified_overlay.png, summary.json, zonal.csv). Jobs run on JOB_WORKERS
+threads; their patch batches go through one DynamicBatcher, which coalesces
+them within MAX_BATCH_LATENCY_MS, so concurrent jobs share full batches
+instead of contending for the CPU with small ones.
+
+Endpoints:
+    POST   /jobs                    upload a GeoTIFF (and optional claims JSON); returns job_id
+    GET    /jobs/{job_id}           status, progress and summary
+    GET    /jobs/{job_id}/events    progress as Server-Sent Events, ending with completed/failed
+    GET    /jobs/{job_id}/files/{name}
+    DELETE /jobs/{job_id}
+    GET    /health                  job counts and batching statistics
+
+Usage:
+    python server.py
+    uvicorn server:app --port 8600
+"""
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, File, HTTPException, Query, UploadFile
+from fastapi.responses import FileResponse, StreamingResponse
+
+from batcher import DynamicBatcher
+from classifier import (BATCH_MEMORY_MB, COARSE_TO_FINE, MODEL_PATH, batch_size_for, classify_file, load_model,
+                        open_tile_cache, overlay_preview, patch_size, write_overlay)
+
+# ---------------- CONFIG ----------------
+SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8600"))
+JOBS_DIR = os.getenv("JOBS_DIR", os.path.join("outputs", "jobs"))
+# Concurrent jobs; their batches are coalesced, so more jobs do not mean more model copies
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+# Patches per request a job sends to the batcher, kept small so jobs interleave
+JOB_BATCH_SIZE = int(os.getenv("JOB_BATCH_SIZE", "32"))
+MAX_BATCH_LATENCY_MS = float(os.getenv("MAX_BATCH_LATENCY_MS", "20"))
+# Finished jobs and their directories are removed after this long
+JOB_RETENTION_HOURS = float(os.getenv("JOB_RETENTION_HOURS", "24"))
+JOB_FILES = ("input.tif", "classified.tif", "original.png", "classified_overlay.png", "summary.json", "zonal.csv")
+TERMINAL_EVENTS = ('completed', 'failed')
+
+# In-memory job store; job directories hold the results
+jobs = {}
+jobs_lock = threading.Lock()
+service = {}
+
+@asynccontextmanager
+async def lifespan(app):
+    model = load_model()
+    service['batcher'] = DynamicBatcher(model, batch_size_for(model, patch_size, BATCH_MEMORY_MB),
+                                        MAX_BATCH_LATENCY_MS / 1000.0)
+    service['cache'] = open_tile_cache()
+    service['executor'] = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    yield
+    service['executor'].shutdown(wait=True, cancel_futures=True)
+    service['batcher'].close()
+
+app = FastAPI(title="Asset-mapping inference service", lifespan=lifespan)
+
+# ---------------- JOBS ----------------
+def publish(job, event_type, **details):
+    # Appends a progress event and wakes the job's event streams
+    with job['changed']:
+        job['events'].append({'type': event_type, 'job_id': job['job_id'], 'timestamp': time.time(), **details})
+        job['changed'].notify_all()
+
+def run_job(job, coarse_to_fine):
+    work_dir = job['work_dir']
+    input_path = os.path.join(work_dir, "input.tif")
+    last = -1
+
+    def on_progress(done, total):
+        nonlocal last
+        percent = int(100 * done / total) if total else 100
+        if percent != last:
+            last = percent
+            job['progress'] = done / total if total else 1.0
+            publish(job, 'progress', done=done, total=total, progress=round(job['progress'], 4))
+
+    job['status'] = 'running'
+    publish(job, 'started')
+    try:
+        with service['batcher'].client() as model:
+            summary = classify_file(model, input_path, work_dir, on_progress=on_progress, overlay=False,
+                                    cache=service['cache'], coarse_to_fine=coarse_to_fine, batch_size=JOB_BATCH_SIZE)
+        original, overlay = overlay_preview(input_path, summary['classified'])
+        write_overlay(original, os.path.join(work_dir, "original.png"))
+        summary['overlay'] = write_overlay(overlay, os.path.join(work_dir, "classified_overlay.png"))
+        claims_path = os.path.join(work_dir, "claims.json")
+        if os.path.exists(claims_path):
+            from zonal import load_claims, write_csv, zonal_stats
+            summary['zonal'] = zonal_stats(summary['classified'], load_claims([claims_path]))
+            write_csv(summary['zonal'], os.path.join(work_dir, "zonal.csv"))
+        job['summary'] = summary
+        job['status'] = 'completed'
+        job['progress'] = 1.0
+        publish(job, 'completed', summary=summary)
+    except Exception as e:
+        job['status'] = 'failed'
+        job['error'] = f"{type(e).__name__}: {e}"
+        publish(job, 'failed', error=job['error'])
+    finally:
+        job['completed_at'] = time.time()
+
+def prune_jobs():
+    cutoff = time.time() - JOB_RETENTION_HOURS * 3600
+    with jobs_lock:
+        expired = [job for job in jobs.values() if (job.get('completed_at') or cutoff + 1) < cutoff]
+        for job in expired:
+            jobs.pop(job['job_id'], None)
+    for job in expired:
+        shutil.rmtree(job['work_dir'], ignore_errors=True)
+
+def get_job(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+def job_info(job):
+    return {key: job.get(key) for key in ('job_id', 'status', 'filename', 'created_at', 'completed_at',
+                                          'progress', 'summary', 'error')}
+
+# ---------------- ENDPOINTS ----------------
+@app.post("/jobs")
+def submit_job(
+    file: UploadFile = File(...),
+    claims: UploadFile = File(None),
+    coarse_to_fine: bool = Query(COARSE_TO_FINE, description="Skip tiles in confident uniform regions"),
+):
+    """Start classifying an uploaded GeoTIFF in a fresh job directory"""
+    prune_jobs()
+    job_id = uuid.uuid4().hex
+    work_dir = os.path.join(JOBS_DIR, job_id)
+    os.makedirs(work_dir)
+    with open(os.path.join(work_dir, "input.tif"), "wb") as f:
+        shutil.copyfileobj(file.file, f)
+    if claims is not None:
+        with open(os.path.join(work_dir, "claims.json"), "wb") as f:
+            shutil.copyfileobj(claims.file, f)
+
+    job = {
+        'job_id': job_id, 'status': 'queued', 'filename': file.filename, 'work_dir': work_dir,
+        'created_at': time.time(), 'completed_at': None, 'progress': 0.0, 'summary': None, 'error': None,
+        'events': [], 'changed': threading.Condition(),
+    }
+    with jobs_lock:
+        jobs[job_id] = job
+    publish(job, 'queued', filename=file.filename)
+    service['executor'].submit(run_job, job, coarse_to_fine)
+    return {'job_id': job_id, 'status': job['status']}
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    return job_info(get_job(job_id))
+
+@app.get("/jobs/{job_id}/events")
+def job_events(job_id: str, keepalive: float = Query(15.0, gt=0)):
+    """Past and future events of a job as Server-Sent Events, ending with completed/failed"""
+    job = get_job(job_id)
+
+    def event_stream():
+        position = 0
+        while True:
+            with job['changed']:
+                job['changed'].wait_for(lambda: len(job['events']) > position, timeout=keepalive)
+                pending = job['events'][position:]
+            if not pending:
+                yield ": keepalive\n\n"
+                continue
+            position += len(pending)
+            for event in pending:
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+                if event['type'] in TERMINAL_EVENTS:
+                    return
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/jobs/{job_id}/files/{name}")
+def job_file(job_id: str, name: str):
+    job = get_job(job_id)
+    path = os.path.join(job['work_dir'], name)
+    if name not in JOB_FILES or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="File not found")
+    return FileResponse(path, filename=name)
+
+@app.delete("/jobs/{job_id}")
+def delete_job(job_id: str):
+    job = get_job(job_id)
+    if job['status'] not in TERMINAL_EVENTS:
+        raise HTTPException(status_code=409, detail="Job is still running")
+    with jobs_lock:
+        jobs.pop(job_id, None)
+    shutil.rmtree(job['work_dir'], ignore_errors=True)
+    return {'job_id': job_id, 'deleted': True}
+
+@app.get("/health")
+def health():
+    statuses = {}
+    for job in list(jobs.values()):
+        statuses[job['status']] = statuses.get(job['status'], 0) + 1
+    return {'model': MODEL_PATH, 'jobs': statuses, 'batching': service['batcher'].summary()}
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host=SERVER_HOST, port=SERVER_PORT)
@@ -0,0 +1,101 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+# Keys per SQL statement, under SQLite's host-parameter limit
+CHUNK = 500
+
+def file_hash(path):
+    # Content hash of a model file, so retrained models never reuse old classes
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def patch_key(patch):
+    # Raw (pre-normalization) pixels plus dtype and shape
+    digest = hashlib.blake2b(patch.tobytes(), digest_size=16)
+    digest.update(f"{patch.dtype.str}{patch.shape}".encode())
+    return digest.digest()
+
+class TileCache:
+    """Patch classes keyed on (patch hash, model hash, patch size), evicted least recently used first
+
+    One SQLite file can be shared by several processes (WAL mode); eviction
+    keeps it at max_entries rows.
+    """
+
+    def __init__(self, path, model_hash, patch_size, max_entries):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.model_hash = model_hash
+        self.patch_size = patch_size
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tiles ("
+            " patch BLOB NOT NULL, model TEXT NOT NULL, patch_size INTEGER NOT NULL,"
+            " class INTEGER NOT NULL, last_used REAL NOT NULL,"
+            " PRIMARY KEY (patch, model, patch_size)) WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS tiles_last_used ON tiles (last_used)")
+        self._conn.commit()
+
+    def lookup(self, keys):
+        """Cached class of each known key; hits are marked as recently used"""
+        found = {}
+        unique = list(set(keys))
+        with self._lock:
+            for start in range(0, len(unique), CHUNK):
+                chunk = unique[start:start + CHUNK]
+                rows = self._conn.execute(
+                    f"SELECT patch, class FROM tiles WHERE model = ? AND patch_size = ?"
+                    f" AND patch IN ({','.join('?' * len(chunk))})",
+                    [self.model_hash, self.patch_size, *chunk]
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE tiles SET last_used = ? WHERE patch = ? AND model = ? AND patch_size = ?",
+                    [(now, key, self.model_hash, self.patch_size) for key in found]
+                )
+                self._conn.commit()
+        return found
+
+    def store(self, classes):
+        """Save {key: class} for freshly classified patches"""
+        if not classes:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO tiles (patch, model, patch_size, class, last_used) VALUES (?, ?, ?, ?, ?)",
+                [(key, self.model_hash, self.patch_size, int(cls), now) for key, cls in classes.items()]
+            )
+            self._conn.commit()
+
+    def evict(self):
+        """Drop least recently used rows beyond max_entries; returns how many"""
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM tiles").fetchone()[0]
+            excess = count - self.max_entries
+            if excess <= 0:
+                return 0
+            self._conn.execute(
+                "DELETE FROM tiles WHERE (patch, model, patch_size) IN"
+                " (SELECT patch, model, patch_size FROM tiles ORDER BY last_used LIMIT ?)",
+                (excess,)
+            )
+            self._conn.commit()
+        return excess
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
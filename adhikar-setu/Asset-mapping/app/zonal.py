@@ -0,0 +1,213 @@
+"""
+Per-claim land-cover breakdown of a classified raster.
+
+Claim polygons come from GeoJSON (FeatureCollection, Feature or bare
+geometry, e.g. public/data/claims.json) or from processed FRA documents
+(extracted_fields.coordinates_geojson). They are reprojected to the raster
+CRS and burned into a label raster strip by strip, only the claims touching
+each strip. One bincount over label * (classes + 1) + class, weighted by the
+ground area of each pixel, then gives the area of every class inside every
+claim.
+
+Hectares are ground areas: on geographic (lon/lat) rasters every row of
+pixels is measured on the WGS84 ellipsoid, and claim polygons always are.
+
+A pixel belongs to a claim when its centre is inside the polygon. Claims
+whose bounding boxes overlap (e.g. individual claims inside a community
+forest claim) go to separate layers, each rasterized on its own, so every
+claim gets all of its pixels.
+
+Usage:
+    python zonal.py outputs/batch/village/classified.tif --claims ../../front-end/public/data/claims.json
+    python zonal.py classified.tif --claims processed/*.json --output zonal.csv
+"""
+import argparse
+import csv
+import glob
+import json
+import math
+import os
+
+import numpy as np
+import rasterio
+from pyproj import Geod
+from rasterio.features import rasterize
+from rasterio.warp import transform_geom
+from rasterio.windows import Window
+from shapely.geometry import shape
+from shapely.geometry.polygon import orient
+
+from classifier import STRIP_MEMORY_MB, classes
+
+CLAIM_CRS = "EPSG:4326"
+geod = Geod(ellps="WGS84")
+
+def _claim(geometry, properties, fallback_id):
+    claim_id = (properties.get('claim_id') or properties.get('document_id')
+                or properties.get('id') or fallback_id)
+    return {'claim_id': str(claim_id), 'properties': properties, 'geometry': geometry}
+
+def claims_from_json(data, source):
+    """Claims in a GeoJSON object or a processed document"""
+    name = os.path.splitext(os.path.basename(source))[0]
+    if isinstance(data, list):
+        return [claim for index, item in enumerate(data) for claim in claims_from_json(item, f"{name}_{index}")]
+    if not isinstance(data, dict):
+        return []
+    if data.get('type') == 'FeatureCollection':
+        return [
+            _claim(feature['geometry'], {**(feature.get('properties') or {}), 'feature_id': feature.get('id')},
+                   f"{name}_{feature.get('id', index)}")
+            for index, feature in enumerate(data.get('features', [])) if feature.get('geometry')
+        ]
+    if data.get('type') == 'Feature':
+        return [_claim(data['geometry'], data.get('properties') or {}, name)] if data.get('geometry') else []
+    if data.get('type') in ('Polygon', 'MultiPolygon'):
+        return [_claim(data, {}, name)]
+    if 'extracted_fields' in data:
+        fields = data['extracted_fields'] or {}
+        geometry = (fields.get('coordinates_geojson') or {}).get('value')
+        if not isinstance(geometry, dict):
+            return []
+        properties = {
+            'document_id': data.get('document_id', name),
+            'claimant_name': (fields.get('claimant_name') or {}).get('value'),
+            'village': (fields.get('village') or {}).get('value'),
+            'area_ha': (fields.get('area_ha') or {}).get('value'),
+        }
+        return [_claim(geometry, properties, name)]
+    return []
+
+def load_claims(paths):
+    claims = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            claims.extend(claims_from_json(json.load(f), path))
+    return claims
+
+def _pixel_rows(bounds, transform):
+    # Raster rows spanned by a bounding box in raster coordinates
+    inverse = ~transform
+    left, bottom, right, top = bounds
+    rows = [(inverse * corner)[1] for corner in ((left, top), (right, top), (left, bottom), (right, bottom))]
+    return math.floor(min(rows)), math.ceil(max(rows))
+
+def claim_layers(bounds):
+    """Split claims into layers whose bounding boxes do not intersect; returns the layer of each claim"""
+    layers = []  # per layer: array of (left, bottom, right, top)
+    assignment = []
+    for box in bounds:
+        for index, boxes in enumerate(layers):
+            overlap = ((boxes[:, 0] <= box[2]) & (boxes[:, 2] >= box[0])
+                       & (boxes[:, 1] <= box[3]) & (boxes[:, 3] >= box[1]))
+            if not overlap.any():
+                layers[index] = np.vstack([boxes, box])
+                assignment.append(index)
+                break
+        else:
+            layers.append(np.array([box], dtype=np.float64))
+            assignment.append(len(layers) - 1)
+    return assignment
+
+def geodesic_ha(geometry):
+    # Ellipsoidal area of a lon/lat (Multi)Polygon; holes must wind opposite to their shell
+    geometry = shape(geometry)
+    polygons = geometry.geoms if geometry.geom_type == 'MultiPolygon' else [geometry]
+    return sum(abs(geod.geometry_area_perimeter(orient(polygon))[0]) for polygon in polygons) / 10000.0
+
+def row_pixel_areas(src, row, height):
+    # Ground area (m2) of one pixel in each of the rows row..row + height
+    transform = src.transform
+    if src.crs is None or not src.crs.is_geographic:
+        unit = src.crs.linear_units_factor[1] if src.crs is not None else 1.0
+        return np.full(height, abs(transform.a * transform.e) * unit ** 2)
+    if transform.b or transform.d:
+        raise ValueError(f"Rotated geographic rasters are not supported: {src.name}")
+    # All pixels of a row span the same latitudes, so they have the same area
+    lats = transform.f + transform.e * np.arange(row, row + height + 1)
+    lons = [transform.c, transform.c + transform.a, transform.c + transform.a, transform.c]
+    return np.array([abs(geod.polygon_area_perimeter(lons, [top, top, bottom, bottom])[0])
+                     for top, bottom in zip(lats[:-1], lats[1:])])
+
+def zonal_stats(class_raster_path, claims, strip_memory_mb=STRIP_MEMORY_MB, claim_crs=CLAIM_CRS):
+    """Hectares of every class inside every claim"""
+    n_labels = len(claims) + 1
+    n_classes = len(classes) + 1  # 0 is unclassified / no data
+
+    with rasterio.open(class_raster_path) as src:
+        geometries = [transform_geom(claim_crs, src.crs, claim['geometry']) for claim in claims] if claims else []
+        bounds = [shape(geometry).bounds for geometry in geometries]
+        spans = [_pixel_rows(box, src.transform) for box in bounds]
+        layers = claim_layers(bounds)
+
+        # Label (uint32) plus class (uint8) per pixel
+        block_h = src.block_shapes[0][0]
+        rows = max(1, int(strip_memory_mb * 1024 * 1024) // (src.width * 5 * block_h)) * block_h
+        # Ground area (m2) of every class in every claim
+        areas = np.zeros(n_labels * n_classes, dtype=np.float64)
+
+        for row in range(0, src.height, rows):
+            height = min(rows, src.height - row)
+            by_layer = {}
+            for label, (geometry, (top, bottom), layer) in enumerate(zip(geometries, spans, layers), start=1):
+                if bottom >= row and top < row + height:
+                    by_layer.setdefault(layer, []).append((geometry, label))
+            if not by_layer:
+                continue
+            window = Window(0, row, src.width, height)
+            class_strip = src.read(1, window=window)
+            pixel_areas = np.broadcast_to(row_pixel_areas(src, row, height)[:, None], (height, src.width))
+            for shapes in by_layer.values():
+                labels = rasterize(shapes, out_shape=(height, src.width), transform=src.window_transform(window),
+                                   fill=0, dtype='uint32')
+                inside = labels > 0
+                areas += np.bincount(labels[inside].astype(np.int64) * n_classes + class_strip[inside],
+                                     weights=pixel_areas[inside], minlength=n_labels * n_classes)
+
+    areas = areas.reshape(n_labels, n_classes) / 10000.0
+    results = []
+    for label, claim in enumerate(claims, start=1):
+        claim_ha = areas[label]
+        classified = float(claim_ha[1:].sum())
+        result = {
+            'claim_id': claim['claim_id'],
+            'polygon_ha': round(geodesic_ha(transform_geom(claim_crs, CLAIM_CRS, claim['geometry'])), 4),
+            'covered_ha': round(float(claim_ha.sum()), 4),
+            'unclassified_ha': round(float(claim_ha[0]), 4),
+        }
+        for idx, cls in enumerate(classes, start=1):
+            result[f'{cls}_ha'] = round(float(claim_ha[idx]), 4)
+            result[f'{cls}_pct'] = round(100.0 * float(claim_ha[idx]) / classified, 2) if classified else None
+        results.append(result)
+    return results
+
+def write_csv(results, path):
+    fields = ['claim_id', 'polygon_ha', 'covered_ha', 'unclassified_ha']
+    fields += [f'{cls}_{unit}' for cls in classes for unit in ('ha', 'pct')]
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(results)
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-claim land-cover hectares from a classified raster")
+    parser.add_argument("classified", help="Class raster written by the classifier (classified.tif)")
+    parser.add_argument("--claims", nargs="+", required=True, help="GeoJSON or processed document JSON files (globs allowed)")
+    parser.add_argument("--claims-crs", default=CLAIM_CRS, help="CRS of the claim coordinates")
+    parser.add_argument("--output", help="CSV output (default: print JSON)")
+    args = parser.parse_args()
+
+    paths = sorted({path for pattern in args.claims for path in (glob.glob(pattern) or [pattern])})
+    claims = load_claims(paths)
+    if not claims:
+        parser.error("No claim polygons found")
+    results = zonal_stats(args.classified, claims, claim_crs=args.claims_crs)
+    if args.output:
+        write_csv(results, args.output)
+        print(f"{len(results)} claims written to {args.output}")
+    else:
+        print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
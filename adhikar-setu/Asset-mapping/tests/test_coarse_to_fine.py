@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+import rasterio
+from affine import Affine
+
+from classifier import accepted_blocks, classify_file
+
+class DominantBandModel:
+    """Confident stand-in for the classifier: the class is the brightest band (agriculture, forest, water)"""
+
+    def predict_on_batch(self, batch):
+        means = np.asarray(batch).mean(axis=(1, 2))
+        probs = np.full((len(means), 4), 0.01, dtype=np.float32)
+        probs[np.arange(len(means)), means.argmax(axis=1)] = 0.97
+        return probs
+
+@pytest.fixture
+def two_region_tif(tmp_path):
+    # Left half red, right half blue, with pixel noise so no tile is uniform
+    height, width = 512, 1024
+    rng = np.random.default_rng(0)
+    data = rng.integers(0, 20, (3, height, width), dtype=np.uint8)
+    data[0, :, :width // 2] += 180
+    data[2, :, width // 2:] += 180
+    path = str(tmp_path / "regions.tif")
+    with rasterio.open(path, "w", driver="GTiff", width=width, height=height, count=3, dtype="uint8",
+                       crs="EPSG:32644", transform=Affine(0.5, 0, 500000, 0, -0.5, 2500000)) as dst:
+        dst.write(data)
+    return path
+
+def test_coarse_to_fine_agrees_with_exhaustive(two_region_tif, tmp_path):
+    summary = classify_file(DominantBandModel(), two_region_tif, str(tmp_path / "out"), overlay=False,
+                            coarse_to_fine=True, verify_coarse=True, batch_size=16)
+    coarse = summary['coarse']
+    # Blocks are 4x4 tiles; the two next to the class boundary are refined tile by tile
+    assert coarse['accepted_blocks'] == 4
+    assert coarse['tiles_skipped'] == 4 * (4 * 4)
+    assert coarse['agreement'] == 1.0
+    assert summary['tile_counts']['agriculture'] == summary['tile_counts']['water'] == summary['tiles'] // 2
+
+def test_accepted_blocks_need_confident_agreeing_neighbours():
+    block_classes = np.array([[1, 1, 2],
+                              [1, 1, 2]], dtype=np.uint8)
+    confidence = np.array([[0.95, 0.95, 0.95],
+                           [0.5, 0.95, 0.95]], dtype=np.float32)
+    empty = np.zeros_like(block_classes, dtype=bool)
+    accepted = accepted_blocks(block_classes, confidence, empty, min_confidence=0.9)
+    assert accepted.tolist() == [[1, 0, 0],
+                                 [0, 0, 0]]
+
+    # Empty neighbours do not veto
+    empty[:, 2] = True
+    accepted = accepted_blocks(block_classes, confidence, empty, min_confidence=0.9)
+    assert accepted.tolist() == [[1, 1, 0],
+                                 [0, 1, 0]]
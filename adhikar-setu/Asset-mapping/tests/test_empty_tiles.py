@@ -0,0 +1,39 @@
+import numpy as np
+import rasterio
+from affine import Affine
+
+from classifier import NODATA_CLASS, classify_file
+
+class CountingModel:
+    """Classifies by brightest band and counts the patches it is given"""
+
+    def __init__(self):
+        self.patches = 0
+
+    def predict_on_batch(self, batch):
+        self.patches += len(batch)
+        means = np.asarray(batch).mean(axis=(1, 2))
+        probs = np.zeros((len(means), 4), dtype=np.float32)
+        probs[np.arange(len(means)), means.argmax(axis=1)] = 1.0
+        return probs
+
+def test_uniform_tiles_are_classified_once_and_nodata_is_skipped(tmp_path):
+    # 4x4 tiles: a uniform blue (water) top half, a nodata bottom-left quarter, noisy red elsewhere
+    rng = np.random.default_rng(0)
+    data = rng.integers(150, 250, (3, 256, 256), dtype=np.uint8)
+    data[1:] //= 4
+    data[:, :128] = np.array([20, 40, 200], dtype=np.uint8)[:, None, None]
+    data[:, 128:, :128] = 0
+    path = str(tmp_path / "tiles.tif")
+    with rasterio.open(path, "w", driver="GTiff", width=256, height=256, count=3, dtype="uint8", nodata=0,
+                       crs="EPSG:32644", transform=Affine(0.5, 0, 500000, 0, -0.5, 2500000)) as dst:
+        dst.write(data)
+
+    model = CountingModel()
+    summary = classify_file(model, path, str(tmp_path / "out"), overlay=False, coarse_to_fine=False, batch_size=8)
+    counts = summary['tile_counts']
+    assert counts['water'] == 8
+    assert counts[NODATA_CLASS] == 4
+    assert counts['agriculture'] == 4
+    # One patch for the uniform value, one per noisy tile
+    assert model.patches == 1 + 4
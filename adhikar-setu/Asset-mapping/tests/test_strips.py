@@ -0,0 +1,42 @@
+import numpy as np
+import rasterio
+from affine import Affine
+
+from classifier import OUTPUT_BLOCK_SIZE, iter_strips, strip_rows
+
+class Source:
+    """Just the attributes strip_rows reads"""
+
+    def __init__(self, width, block_h, dtype="uint8"):
+        self.width = width
+        self.block_shapes = [(block_h, width)]
+        self.dtypes = [dtype]
+
+def strip_mb(src, rows):
+    return rows * src.width * (3 * np.dtype(src.dtypes[0]).itemsize + 1) / 2 ** 20
+
+def test_strips_align_to_blocks_when_they_fit():
+    src = Source(10000, 256)
+    rows = strip_rows(src, 64, 256)
+    assert rows % OUTPUT_BLOCK_SIZE == 0 and strip_mb(src, rows) <= 256
+
+def test_large_source_blocks_do_not_exceed_the_budget():
+    src = Source(10000, 1000)
+    rows = strip_rows(src, 64, 16)
+    assert rows % 64 == 0 and strip_mb(src, rows) <= 16
+    # Output block alignment is kept while it fits
+    assert rows % OUTPUT_BLOCK_SIZE == 0
+
+def test_strips_are_at_least_one_patch_row():
+    assert strip_rows(Source(200000, 1), 64, 1) == 64
+
+def test_strips_cover_the_raster(tmp_path):
+    path = str(tmp_path / "r.tif")
+    data = np.random.default_rng(0).integers(0, 255, (3, 300, 70), dtype=np.uint8)
+    with rasterio.open(path, "w", driver="GTiff", width=70, height=300, count=3, dtype="uint8",
+                       crs="EPSG:32644", transform=Affine(0.5, 0, 500000, 0, -0.5, 2500000)) as dst:
+        dst.write(data)
+    with rasterio.open(path) as src:
+        strips = list(iter_strips(src, 64, 64, 128))
+    assert [(row, height) for row, height, _ in strips] == [(0, 128), (128, 128), (256, 44)]
+    np.testing.assert_array_equal(np.concatenate([strip for *_, strip in strips]), np.transpose(data, (1, 2, 0)))
@@ -0,0 +1,53 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import tile_cache
+from tile_cache import TileCache, patch_key
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Strictly increasing last_used stamps, so the LRU order does not depend on timer resolution
+    ticks = itertools.count(1)
+    monkeypatch.setattr(tile_cache.time, "time", lambda: float(next(ticks)))
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    cache = TileCache(str(tmp_path / "cache" / "tiles.sqlite"), "model-a", 64, max_entries=3)
+    yield cache
+    cache.close()
+
+def test_lookup_returns_stored_classes(cache):
+    assert cache.lookup([b"a", b"b"]) == {}
+    cache.store({b"a": 1, b"b": 3})
+    assert cache.lookup([b"a", b"b", b"c", b"a"]) == {b"a": 1, b"b": 3}
+
+def test_entries_are_scoped_to_model_and_patch_size(cache):
+    cache.store({b"a": 1})
+    other_model = TileCache(cache.path, "model-b", 64, max_entries=3)
+    other_size = TileCache(cache.path, "model-a", 32, max_entries=3)
+    try:
+        assert other_model.lookup([b"a"]) == {}
+        assert other_size.lookup([b"a"]) == {}
+    finally:
+        other_model.close()
+        other_size.close()
+
+def test_evict_drops_least_recently_used(cache):
+    cache.store({b"a": 1})
+    cache.store({b"b": 2})
+    cache.store({b"c": 3})
+    # Reading a makes b the least recently used
+    cache.lookup([b"a"])
+    cache.store({b"d": 4, b"e": 1})
+
+    assert cache.evict() == 2
+    assert cache.lookup([b"a", b"b", b"c", b"d", b"e"]) == {b"a": 1, b"d": 4, b"e": 1}
+    assert cache.evict() == 0
+
+def test_patch_key_covers_dtype_and_shape():
+    patch = np.zeros((64, 64, 3), dtype=np.uint8)
+    assert patch_key(patch) == patch_key(patch.copy())
+    assert patch_key(patch) != patch_key(patch.astype(np.uint16))
+    assert patch_key(patch) != patch_key(patch.reshape(32, 128, 3))
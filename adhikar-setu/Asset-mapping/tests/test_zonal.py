@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+import rasterio
+from affine import Affine
+from pyproj import Geod
+
+from classifier import classes
+from zonal import zonal_stats
+
+def write_classes(path, crs, transform, data):
+    with rasterio.open(path, "w", driver="GTiff", width=data.shape[1], height=data.shape[0], count=1,
+                       dtype="uint8", crs=crs, transform=transform) as dst:
+        dst.write(data, 1)
+
+def box(left, bottom, right, top):
+    return {'type': 'Polygon', 'coordinates': [[[left, bottom], [right, bottom], [right, top],
+                                                [left, top], [left, bottom]]]}
+
+def test_geographic_raster_areas_are_ground_hectares(tmp_path):
+    # 0.001 degree pixels (about 100 m) at 21 N: top half the first class, bottom half the second
+    data = np.ones((40, 40), dtype=np.uint8)
+    data[20:] = 2
+    path = str(tmp_path / "classes.tif")
+    write_classes(path, "EPSG:4326", Affine(0.001, 0, 79.0, 0, -0.001, 21.04), data)
+    claim = {'claim_id': 'c1', 'properties': {}, 'geometry': box(79.0, 21.0, 79.04, 21.04)}
+
+    result, = zonal_stats(path, [claim])
+    expected = abs(Geod(ellps="WGS84").polygon_area_perimeter([79.0, 79.04, 79.04, 79.0],
+                                                              [21.0, 21.0, 21.04, 21.04])[0]) / 10000.0
+    # Not the 0.0016 square degrees of the planar area
+    assert expected == pytest.approx(1842, rel=0.001)
+    assert result['polygon_ha'] == pytest.approx(expected, rel=1e-4)
+    assert result['covered_ha'] == pytest.approx(expected, rel=1e-4)
+    # Rows further from the equator are smaller
+    assert result[f'{classes[0]}_ha'] < result[f'{classes[1]}_ha']
+    assert result[f'{classes[0]}_pct'] + result[f'{classes[1]}_pct'] == pytest.approx(100.0)
+
+def test_projected_raster_areas_use_pixel_size(tmp_path):
+    path = str(tmp_path / "classes.tif")
+    write_classes(path, "EPSG:32644", Affine(10, 0, 500000, 0, -10, 2330000), np.ones((50, 50), dtype=np.uint8))
+    claim = {'claim_id': 'c1', 'properties': {}, 'geometry': box(500100, 2329600, 500300, 2329900)}
+
+    result, = zonal_stats(path, [claim], claim_crs="EPSG:32644")
+    assert result['covered_ha'] == pytest.approx(6.0)
+    assert result[f'{classes[0]}_ha'] == pytest.approx(6.0)
+    assert result['polygon_ha'] == pytest.approx(6.0, rel=0.01)
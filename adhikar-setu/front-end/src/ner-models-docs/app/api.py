@@ -1,15 +1,22 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, BackgroundTasks, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+import hashlib
+import json
 import uuid
 import os
 from datetime import datetime
-from typing import List
+from typing import Dict, List, Optional
 
 from app.config import config
 from app.models import ParseResponse, ParseRequest, TrainingRequest
 from app.ingestion import ingest_file
 from app.worker import process_document
 from app.ner.train_ner import train_ner_model
+from app.gazetteer import gazetteer, reload_gazetteer
+from app.result_store import result_store
+from app.ocr_store import load_ocr_blocks
+from app.progress import TERMINAL_EVENTS, channels, get_channel, publish
+from app.metrics import JOBS_ACTIVE, JOBS_TOTAL, QUEUE_DEPTH, record_cache
 from app.logger import setup_logger
 
 router = APIRouter()
@@ -18,10 +25,16 @@ logger = setup_logger(__name__)
 # In-memory job store (replace with Redis in production)
 jobs = {}
 
+# Result keys sent with the final progress event
+COMPLETION_EVENT_FIELDS = "extracted_fields,processing_summary"
+
 @router.post("/parse", response_model=ParseResponse)
 async def parse_document(
     background_tasks: BackgroundTasks,
-    file: UploadFile = File(...)
+    file: UploadFile = File(...),
+    profile: bool = Query(False, description="Sample-profile this job and store the profile with its result"),
+    budget: Optional[float] = Query(None, gt=0, description="Latency budget in seconds; the pipeline is degraded to fit it"),
+    early_exit: Optional[bool] = Query(None, description="Stop once the required fields are confident (default: EARLY_EXIT)")
 ):
     """Parse a single document"""
     try:
@@ -37,11 +50,15 @@ async def parse_document(
             "document_id": document_id,
             "status": "processing",
             "created_at": datetime.now(),
+            "budget": budget,
+            "early_exit": early_exit,
             "result": None
         }
+        publish(job_id, "queued", document_id=document_id)
+        QUEUE_DEPTH.inc()
         
         # Process document in background
-        background_tasks.add_task(process_document_task, job_id, document_id)
+        background_tasks.add_task(process_document_task, job_id, document_id, profile, budget, early_exit)
         
         return ParseResponse(
             job_id=job_id,
@@ -53,20 +70,184 @@ async def parse_document(
         logger.error(f"Error parsing document: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def job_etag(job: Dict, variant: str = "") -> str:
+    """Weak ETag from job state; changes whenever the status, upgrade or result changes"""
+    completed_at = job.get("completed_at")
+    stamp = completed_at.timestamp() if completed_at else 0
+    upgrade = job.get("upgrade") or {}
+    state = f"{job['status']}|{stamp}|{upgrade.get('status', '')}|{upgrade.get('version', 0)}"
+    digest = hashlib.md5(f"{state}|{variant}".encode()).hexdigest()[:16]
+    return f'W/"{job["job_id"]}-{digest}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check If-None-Match against the current ETag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    matched = header.strip() == "*" or etag in [tag.strip() for tag in header.split(",")]
+    record_cache("parse_result_etag", matched)
+    return matched
+
+def project_result(result: Optional[Dict], fields: Optional[str]) -> Optional[Dict]:
+    """Keep only the requested top-level result keys"""
+    if result is None or not fields:
+        return result
+    wanted = [name.strip() for name in fields.split(",") if name.strip()]
+    return {name: result[name] for name in wanted if name in result}
+
 @router.get("/parse/{job_id}", response_model=ParseResponse)
-async def get_parse_result(job_id: str):
+async def get_parse_result(
+    job_id: str,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(None, description="Comma-separated result keys, e.g. extracted_fields,processing_summary")
+):
     """Get result of a parsing job"""
     if job_id not in jobs:
         raise HTTPException(status_code=404, detail="Job not found")
     
     job = jobs[job_id]
+    etag = job_etag(job, fields or "")
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    
+    if job["status"] != "completed":
+        message = "Job still processing"
+    elif job.get("upgrade", {}).get("status") == "processing":
+        message = "Job completed at reduced quality; full-quality upgrade in progress"
+    else:
+        message = "Job completed successfully"
+    
     return ParseResponse(
         job_id=job_id,
         status=job["status"],
-        result=job["result"],
-        message="Job completed successfully" if job["status"] == "completed" else "Job still processing"
+        result=project_result(job["result"], fields),
+        message=message
     )
 
+@router.get("/parse/{job_id}/events")
+async def stream_parse_events(job_id: str):
+    """Stream job progress as Server-Sent Events, ending with a completed/failed event"""
+    if job_id not in jobs:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    job = jobs[job_id]
+    # Held from here on, so the stream keeps its history even if the channel is dropped meanwhile
+    channel = channels.get(job_id)
+    final_event = None
+    if channel is None and job["status"] in TERMINAL_EVENTS:
+        # The channel is dropped once a finished job has no subscribers; replay the outcome
+        if job["status"] == "completed":
+            final_event = {"type": "completed", "job_id": job_id,
+                           "result": project_result(job["result"], COMPLETION_EVENT_FIELDS)}
+        else:
+            final_event = {"type": "failed", "job_id": job_id, "error": job.get("error")}
+    
+    async def event_stream():
+        if final_event is not None:
+            yield f"event: {final_event['type']}\ndata: {json.dumps(final_event, default=str)}\n\n"
+            return
+        async for event in (channel or get_channel(job_id)).subscribe():
+            if event is None:
+                yield ": keepalive\n\n"
+                continue
+            yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/parse/{job_id}/pages")
+async def get_parse_pages(
+    job_id: str,
+    request: Request,
+    response: Response,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100)
+):
+    """Get a page range of a completed parsing job"""
+    if job_id not in jobs:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    job = jobs[job_id]
+    if job["status"] != "completed" or not job["result"]:
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    
+    etag = job_etag(job, f"pages:{offset}:{limit}")
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    
+    pages = job["result"].get("pages", [])
+    return {
+        "job_id": job_id,
+        "total": len(pages),
+        "offset": offset,
+        "limit": limit,
+        "pages": pages[offset:offset + limit]
+    }
+
+@router.get("/parse/{job_id}/ocr-blocks")
+async def get_ocr_blocks(job_id: str, page: Optional[int] = Query(None, ge=1)):
+    """Load per-word OCR blocks of a completed job from its sidecar"""
+    if job_id not in jobs:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    result = jobs[job_id]["result"]
+    sidecar = result.get("ocr_sidecar") if result else None
+    if not sidecar or not os.path.exists(sidecar):
+        raise HTTPException(status_code=404, detail="OCR blocks not available")
+    
+    pages = load_ocr_blocks(sidecar, page_number=page)
+    if page is not None and page not in pages:
+        raise HTTPException(status_code=404, detail="Page not found")
+    return {
+        "job_id": job_id,
+        "pages": [{"page_number": number, "ocr_blocks": blocks} for number, blocks in pages.items()]
+    }
+
+def result_degradations(result: Optional[Dict]) -> List[str]:
+    """Degradations a result was produced with (empty for full quality)"""
+    plan = ((result or {}).get("processing_summary") or {}).get("plan") or {}
+    return plan.get("degradations", [])
+
+def deferred_pages(result: Optional[Dict]) -> List[int]:
+    """Pages left over by early exit that are due for background processing"""
+    early_exit = ((result or {}).get("processing_summary") or {}).get("early_exit") or {}
+    return early_exit.get("deferred_pages", []) if early_exit.get("remainder") == "defer" else []
+
+def start_upgrade(job: Dict, degradations: List[str]) -> Dict:
+    job["upgrade"] = {
+        "status": "processing",
+        "version": job.get("upgrade", {}).get("version", 0) + 1,
+        "requested_at": datetime.now().isoformat(),
+        "degradations": degradations
+    }
+    return job["upgrade"]
+
+@router.post("/parse/{job_id}/upgrade", status_code=202)
+async def upgrade_parse_result(job_id: str, background_tasks: BackgroundTasks):
+    """Re-run a degraded job at full quality (or finish pages left by early exit); the result is replaced when done"""
+    if job_id not in jobs:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    job = jobs[job_id]
+    if job["status"] != "completed":
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    if job.get("upgrade", {}).get("status") == "processing":
+        return {"job_id": job_id, "upgrade": job["upgrade"]}
+    
+    degradations = result_degradations(job["result"])
+    if not degradations:
+        return {"job_id": job_id, "upgrade": {"status": "not_needed"}}
+    
+    upgrade = start_upgrade(job, degradations)
+    background_tasks.add_task(upgrade_document_task, job_id)
+    return {"job_id": job_id, "upgrade": upgrade}
+
 @router.post("/parse/batch")
 async def parse_batch(files: List[UploadFile] = File(...)):
     """Parse multiple documents in batch"""
@@ -91,16 +272,83 @@ async def train_ner(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/results")
+async def list_results(state: str = None, district: str = None, limit: int = Query(100, ge=1, le=10000)):
+    """Query extracted fields across documents from the result store"""
+    return {"results": result_store.query(state=state, district=district, limit=limit)}
 
+@router.get("/gazetteer")
+async def gazetteer_status():
+    """Get the active gazetteer version"""
+    snapshot = gazetteer.snapshot
+    return {
+        "version": snapshot.version,
+        "entries": len(snapshot.data),
+        "loaded_at": snapshot.loaded_at,
+        "reloading": gazetteer.reloading
+    }
 
-async def process_document_task(job_id: str, document_id: str):
-    """Background task to process document"""
+@router.post("/gazetteer/reload", status_code=202)
+async def gazetteer_reload(token: str = Depends(validate_training_token)):
+    """Rebuild the gazetteer in the background and swap it in when ready"""
+    started = reload_gazetteer()
+    return {
+        "message": "Gazetteer reload started" if started else "Gazetteer reload already in progress",
+        "active_version": gazetteer.version
+    }
+
+def process_document_task(job_id: str, document_id: str, profile: bool = False, budget: Optional[float] = None,
+                          early_exit: Optional[bool] = None):
+    """Background task to process document (runs in the threadpool, off the event loop)"""
+    publish(job_id, "started", document_id=document_id)
+    QUEUE_DEPTH.dec()
+    JOBS_ACTIVE.inc()
     try:
-        result = process_document(document_id)
+        result = process_document(
+            document_id,
+            progress_callback=lambda event: publish(job_id, "progress", **event),
+            profile=profile,
+            budget=budget,
+            early_exit=early_exit
+        )
         jobs[job_id]["status"] = "completed"
         jobs[job_id]["result"] = result
         jobs[job_id]["completed_at"] = datetime.now()
+        publish(job_id, "completed", result=project_result(result, COMPLETION_EVENT_FIELDS))
+        JOBS_TOTAL.inc(status="completed")
     except Exception as e:
         jobs[job_id]["status"] = "failed"
         jobs[job_id]["error"] = str(e)
-        logger.error(f"Error processing document {document_id}: {str(e)}")
\ No newline at end of file
+        logger.error(f"Error processing document {document_id}: {str(e)}")
+        publish(job_id, "failed", error=str(e))
+        JOBS_TOTAL.inc(status="failed")
+        return
+    finally:
+        JOBS_ACTIVE.dec()
+    
+    # Deferred pages are finished lazily, after the early result has been published
+    if deferred_pages(result):
+        start_upgrade(jobs[job_id], result_degradations(result))
+        upgrade_document_task(job_id)
+
+def upgrade_document_task(job_id: str):
+    """Background full-quality rerun of a degraded job; keeps the degraded result if it fails
+
+    A job whose only degradation is early exit keeps its processed pages
+    and only the left-over pages are run.
+    """
+    job = jobs[job_id]
+    JOBS_ACTIVE.inc()
+    try:
+        resume = job["result"] if result_degradations(job["result"]) == ["early_exit"] else None
+        result = process_document(job["document_id"], early_exit=False, resume=resume)
+        job["result"] = result
+        job["completed_at"] = datetime.now()
+        job["upgrade"].update(status="completed", completed_at=job["completed_at"].isoformat())
+        JOBS_TOTAL.inc(status="upgraded")
+    except Exception as e:
+        job["upgrade"].update(status="failed", error=str(e))
+        logger.error(f"Error upgrading job {job_id}: {str(e)}")
+        JOBS_TOTAL.inc(status="upgrade_failed")
+    finally:
+        JOBS_ACTIVE.dec()
@@ -7,28 +7,67 @@ class Config:
     # Environment
     ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
     
+    # Logging
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_LEVELS = os.getenv("LOG_LEVELS", "")  # per module, e.g. app.ocr_provider=WARNING,app.worker=DEBUG
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # text, json
+    LOG_FILE = os.getenv("LOG_FILE", "app.log")
+    
     # File paths
     DATA_RAW = os.getenv("DATA_RAW", "data/raw")
     DATA_PROCESSED = os.getenv("DATA_PROCESSED", "data/processed")
     DATA_ANNOTATIONS = os.getenv("DATA_ANNOTATIONS", "data/annotations")
     MODELS_DIR = os.getenv("MODELS_DIR", "models")
     
+    # Result Storage
+    RESULT_STORE_PATH = os.getenv("RESULT_STORE_PATH", "data/processed/results.db")
+    RESULT_STORE_BATCH_SIZE = int(os.getenv("RESULT_STORE_BATCH_SIZE", "200"))
+    RESULT_STORE_FLUSH_INTERVAL = float(os.getenv("RESULT_STORE_FLUSH_INTERVAL", "2.0"))  # seconds
+    RESULT_STORE_WRITE_RETRIES = int(os.getenv("RESULT_STORE_WRITE_RETRIES", "4"))
+    # Rows that still fail after the retries are kept here and written after the next successful flush
+    RESULT_STORE_FALLBACK_PATH = os.getenv("RESULT_STORE_FALLBACK_PATH", "data/processed/results.pending.jsonl")
+    EXPORT_DOCUMENT_FILES = os.getenv("EXPORT_DOCUMENT_FILES", "true").lower() == "true"
+    OCR_SIDECAR_DIR = os.getenv("OCR_SIDECAR_DIR", "data/processed/ocr")
+    
     # OCR Configuration
     OCR_PROVIDER = os.getenv("OCR_PROVIDER", "tesseract")  # tesseract, google, aws
     TESSERACT_LANG = os.getenv("TESSERACT_LANG", "eng+hin")
     DPI = int(os.getenv("DPI", "300"))
+    OCR_PSM_MODES = [int(mode) for mode in os.getenv("OCR_PSM_MODES", "6,8,11,13").split(",") if mode.strip()]
+    
+    # Preprocessing (adaptive threshold and denoise)
+    THRESHOLD_BLOCK_SIZE = int(os.getenv("THRESHOLD_BLOCK_SIZE", "11"))  # odd, pixels
+    THRESHOLD_C = float(os.getenv("THRESHOLD_C", "2"))
+    MEDIAN_BLUR_KSIZE = int(os.getenv("MEDIAN_BLUR_KSIZE", "3"))  # odd; 1 or less disables
     
     # NER Configuration
     NER_MODEL_NAME = os.getenv("NER_MODEL_NAME", "models/ner")
     NER_CONFIDENCE_THRESHOLD = float(os.getenv("NER_CONFIDENCE_THRESHOLD", "0.7"))
     
+    # Early exit: stop OCR once the required fields clear NER_CONFIDENCE_THRESHOLD (opt-in)
+    EARLY_EXIT = os.getenv("EARLY_EXIT", "false").lower() == "true"
+    EARLY_EXIT_REQUIRED_FIELDS = [
+        name.strip() for name in os.getenv(
+            "EARLY_EXIT_REQUIRED_FIELDS", "claimant_name,guardian_name,village,district,area_ha,coordinates_geojson"
+        ).split(",") if name.strip()
+    ]
+    EARLY_EXIT_REMAINDER = os.getenv("EARLY_EXIT_REMAINDER", "defer")  # defer (background job) or skip
+    
     # Gazetteer Configuration
     GAZETTEER_PATH = os.getenv("GAZETTEER_PATH", "docs/gazetteer.csv")
     FUZZY_MATCH_THRESHOLD = int(os.getenv("FUZZY_MATCH_THRESHOLD", "85"))
     
+    # Geometry Configuration
+    AREA_MISMATCH_TOLERANCE = float(os.getenv("AREA_MISMATCH_TOLERANCE", "0.2"))  # relative deviation
+    
+    # Profiling (per job, opt-in)
+    PROFILE_JOBS = os.getenv("PROFILE_JOBS", "false").lower() == "true"
+    PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+    
     # API Configuration
     API_HOST = os.getenv("API_HOST", "0.0.0.0")
     API_PORT = int(os.getenv("API_PORT", "8000"))
+    EVENT_LOOP_PROBE_INTERVAL = float(os.getenv("EVENT_LOOP_PROBE_INTERVAL", "0.5"))  # seconds, 0 disables
     
     # Security
     ENCRYPTION_KEY = os.getenv("ENCRYPTION_KEY", "dev-key-change-in-production")
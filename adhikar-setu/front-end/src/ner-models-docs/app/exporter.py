@@ -5,19 +5,28 @@ from datetime import datetime
 from typing import Dict, List, Any , Optional
 from app.config import config
 from app.logger import setup_logger
+from app.result_store import result_store
 
 logger = setup_logger(__name__)
 
+def audit_record(profile: Optional[Dict] = None) -> Dict:
+    """Audit record of a processed document, linking its job profile when one was taken"""
+    audit = {
+        'created_at': datetime.now().isoformat(),
+        'pipeline_version': '1.0.0',
+        'logs': []
+    }
+    # Collapsed stacks + stage wall/CPU breakdown
+    if profile:
+        audit['logs'].append(profile)
+    return audit
+
 def export_to_json(document_data: Dict, output_path: str = None) -> str:
     """Export document data to JSON format"""
     try:
         # Add audit information
         if 'audit' not in document_data:
-            document_data['audit'] = {
-                'created_at': datetime.now().isoformat(),
-                'pipeline_version': '1.0.0',
-                'logs': []
-            }
+            document_data['audit'] = audit_record(document_data.get('profile'))
         
         # Generate output filename if not provided
         if not output_path:
@@ -115,17 +124,24 @@ def export_to_geojson(document_data: Dict, output_path: str = None) -> Optional[
         logger.error(f"Error exporting to GeoJSON: {str(e)}")
         return None
 
-def export_all_formats(document_data: Dict, base_path: str = None) -> Dict:
-    """Export document data to all available formats"""
+def export_all_formats(document_data: Dict, base_path: str = None, document_files: bool = None) -> Dict:
+    """Export document data to the result store and, optionally, per-document files"""
     try:
+        # Batched append to the shared result table
+        result_store.append(document_data)
+        results = {'result_store': result_store.path}
+        
+        if document_files is None:
+            document_files = config.EXPORT_DOCUMENT_FILES
+        if not document_files:
+            return results
+        
         if not base_path:
             doc_id = document_data.get('document_id')
             base_path = os.path.join(config.DATA_PROCESSED, doc_id)
         
-        results = {
-            'json': export_to_json(document_data, f"{base_path}.json"),
-            'csv': export_to_csv(document_data, f"{base_path}.csv")
-        }
+        results['json'] = export_to_json(document_data, f"{base_path}.json")
+        results['csv'] = export_to_csv(document_data, f"{base_path}.csv")
         
         # Only export GeoJSON if coordinates are available
         geojson_path = export_to_geojson(document_data, f"{base_path}.geojson")
@@ -1,3 +1,7 @@
+import hashlib
+import os
+import threading
+from datetime import datetime
 import pandas as pd
 from rapidfuzz import process, fuzz
 from typing import Dict, Optional, List
@@ -6,34 +10,112 @@ from app.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+class GazetteerSnapshot:
+    """Immutable gazetteer version with its prebuilt match index"""
+
+    def __init__(self, data: pd.DataFrame, version: str):
+        self.data = data
+        self.version = version
+        self.loaded_at = datetime.now().isoformat()
+        # Built once per snapshot instead of on every match
+        self.village_names = data['village'].astype(str).tolist() if 'village' in data else []
+
+    @property
+    def empty(self) -> bool:
+        return self.data.empty
+
+def file_version(path: str) -> str:
+    """Content hash used as gazetteer version"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+def build_snapshot(path: str = None) -> GazetteerSnapshot:
+    """Load a gazetteer CSV into a new snapshot"""
+    path = path or config.GAZETTEER_PATH
+    try:
+        version = file_version(path)
+        data = pd.read_csv(path)
+        logger.info(f"Loaded gazetteer version {version} with {len(data)} entries")
+    except Exception as e:
+        logger.error(f"Could not load gazetteer: {str(e)}")
+        # Create empty dataframe as fallback
+        version = 'empty'
+        data = pd.DataFrame(columns=['village', 'district', 'state', 'code'])
+    return GazetteerSnapshot(data, version)
+
 class Gazetteer:
     def __init__(self):
-        self.data = None
+        self._snapshot = None
+        self._reload_lock = threading.Lock()
+        self._reload_thread = None
         self.load_gazetteer()
     
-    def load_gazetteer(self) -> None:
-        """Load village gazetteer from CSV"""
-        try:
-            self.data = pd.read_csv(config.GAZETTEER_PATH)
-            logger.info(f"Loaded gazetteer with {len(self.data)} entries")
-        except Exception as e:
-            logger.error(f"Could not load gazetteer: {str(e)}")
-            # Create empty dataframe as fallback
-            self.data = pd.DataFrame(columns=['village', 'district', 'state', 'code'])
+    @property
+    def snapshot(self) -> GazetteerSnapshot:
+        return self._snapshot
+
+    @property
+    def version(self) -> Optional[str]:
+        return self._snapshot.version if self._snapshot else None
+
+    @property
+    def data(self) -> pd.DataFrame:
+        return self._snapshot.data
+
+    def load_gazetteer(self, path: str = None) -> Dict:
+        """Build a new snapshot and swap it in atomically"""
+        # Serialize reloads so at most one extra snapshot is in memory
+        with self._reload_lock:
+            path = path or config.GAZETTEER_PATH
+            current = self._snapshot
+            try:
+                if current and os.path.exists(path) and file_version(path) == current.version:
+                    logger.info(f"Gazetteer version {current.version} already active")
+                    return {'version': current.version, 'reloaded': False}
+            except OSError:
+                pass
+
+            snapshot = build_snapshot(path)
+            if current and snapshot.empty and not current.empty:
+                # Keep serving the old snapshot rather than swapping in an empty one
+                logger.error("Gazetteer reload produced no entries, keeping current version")
+                return {'version': current.version, 'reloaded': False}
+
+            # Single reference assignment; readers hold on to whichever snapshot they started with
+            self._snapshot = snapshot
+            previous = current.version if current else None
+            logger.info(f"Gazetteer version {previous} -> {snapshot.version}")
+            return {'version': snapshot.version, 'previous_version': previous, 'reloaded': True}
+
+    def reload_async(self, path: str = None) -> bool:
+        """Rebuild the gazetteer in a background thread; returns False if a reload is running"""
+        if self._reload_thread and self._reload_thread.is_alive():
+            return False
+        self._reload_thread = threading.Thread(
+            target=self.load_gazetteer, args=(path,), name="gazetteer-reload", daemon=True
+        )
+        self._reload_thread.start()
+        return True
+
+    @property
+    def reloading(self) -> bool:
+        return bool(self._reload_thread and self._reload_thread.is_alive())
     
     def match_village(self, village_name: str, district: str = None, state: str = None) -> Optional[Dict]:
         """Fuzzy match village name with gazetteer"""
-        if not village_name or self.data.empty:
+        # Pin the snapshot for the whole match so a concurrent reload cannot mix versions
+        snapshot = self._snapshot
+        if not village_name or snapshot.empty:
             return None
         
         try:
-            # Get all village names for matching
-            village_names = self.data['village'].astype(str).tolist()
-            
             # Find best match using fuzzy matching
             matches = process.extract(
                 village_name, 
-                village_names, 
+                snapshot.village_names,
                 scorer=fuzz.token_sort_ratio,
                 limit=5
             )
@@ -46,7 +128,7 @@ class Gazetteer:
             
             # Get the best match
             best_match_name, best_score, best_index = valid_matches[0]
-            best_match = self.data.iloc[best_index].to_dict()
+            best_match = snapshot.data.iloc[best_index].to_dict()
             
             # Additional filtering by district/state if provided
             if district and best_match.get('district'):
@@ -65,7 +147,8 @@ class Gazetteer:
                 'district': best_match.get('district', ''),
                 'state': best_match.get('state', ''),
                 'score': best_score,
-                'match_type': 'fuzzy'
+                'match_type': 'fuzzy',
+                'gazetteer_version': snapshot.version
             }
             
         except Exception as e:
@@ -74,13 +157,14 @@ class Gazetteer:
     
     def search_villages(self, query: str, limit: int = 10) -> List[Dict]:
         """Search villages by query"""
-        if not query or self.data.empty:
+        snapshot = self._snapshot
+        if not query or snapshot.empty:
             return []
         
         try:
             matches = process.extract(
                 query, 
-                self.data['village'].astype(str).tolist(), 
+                snapshot.village_names,
                 scorer=fuzz.token_sort_ratio,
                 limit=limit
             )
@@ -88,13 +172,14 @@ class Gazetteer:
             results = []
             for match_name, score, index in matches:
                 if score >= config.FUZZY_MATCH_THRESHOLD:
-                    match_data = self.data.iloc[index].to_dict()
+                    match_data = snapshot.data.iloc[index].to_dict()
                     results.append({
                         'id': match_data.get('code', ''),
                         'village': match_data.get('village', ''),
                         'district': match_data.get('district', ''),
                         'state': match_data.get('state', ''),
-                        'score': score
+                        'score': score,
+                        'gazetteer_version': snapshot.version
                     })
             
             return results
@@ -108,4 +193,8 @@ gazetteer = Gazetteer()
 
 def match_village(name: str, district: str = None, state: str = None) -> Optional[Dict]:
     """Convenience function to match village"""
-    return gazetteer.match_village(name, district, state)
\ No newline at end of file
+    return gazetteer.match_village(name, district, state)
+
+def reload_gazetteer(path: str = None) -> bool:
+    """Trigger a background gazetteer reload"""
+    return gazetteer.reload_async(path)
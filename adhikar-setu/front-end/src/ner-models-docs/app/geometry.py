@@ -0,0 +1,260 @@
+import re
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple, Any, Iterable
+from shapely import wkt
+from shapely.geometry import shape, mapping, Polygon, MultiPolygon, Point, LineString
+from shapely.geometry.polygon import orient
+from shapely.geometry.base import BaseGeometry
+from shapely.ops import unary_union
+from pyproj import Geod
+from app.config import config
+from app.logger import setup_logger
+from app.postprocess import DEVANAGARI_DIGITS
+
+from shapely.validation import explain_validity
+
+try:
+    from shapely.validation import make_valid
+except ImportError:  # shapely < 1.8
+    make_valid = None
+
+logger = setup_logger(__name__)
+
+# Radius of the sphere with the same surface area as the WGS84 ellipsoid
+AUTHALIC_RADIUS_M = 6371007.181
+SQ_M_PER_HA = 10000.0
+WKT_PREFIXES = ('POLYGON', 'MULTIPOLYGON', 'POINT', 'LINESTRING', 'MULTIPOINT', 'GEOMETRYCOLLECTION')
+
+# A number with an optional hemisphere suffix, as in "21.10 N, 79.00 E"
+BARE_COORD_RE = re.compile(r'([-+]?\d*\.?\d+)\s*°?\s*([NSEW])?\b')
+
+geod = Geod(ellps='WGS84')
+
+def _bare_points(text: str) -> Optional[List[Tuple[float, float]]]:
+    """(lon, lat) points of a bare coordinate list
+
+    Pairs are read latitude first, as parse_coordinates does, unless their
+    N/S/E/W suffixes say otherwise; S and W are negative.
+    """
+    values = BARE_COORD_RE.findall(text)
+    if not values or len(values) % 2:
+        return None
+    points = []
+    for (first, first_hemisphere), (second, second_hemisphere) in zip(values[0::2], values[1::2]):
+        lat, lon = (float(first), first_hemisphere), (float(second), second_hemisphere)
+        if first_hemisphere in ('E', 'W') or second_hemisphere in ('N', 'S'):
+            lat, lon = lon, lat
+        points.append((
+            -lon[0] if lon[1] == 'W' else lon[0],
+            -lat[0] if lat[1] == 'S' else lat[0]
+        ))
+    return points
+
+def parse_geometry(value: Any) -> Optional[BaseGeometry]:
+    """Parse GeoJSON, WKT or a plain 'lat lon, lat lon, ...' list into a shapely geometry"""
+    if value is None:
+        return None
+
+    try:
+        if isinstance(value, BaseGeometry):
+            return value
+        if isinstance(value, dict):
+            return shape(value)
+        if not isinstance(value, str) or not value.strip():
+            return None
+
+        text = value.translate(DEVANAGARI_DIGITS).strip()
+        upper = text.upper()
+        for prefix in WKT_PREFIXES:
+            start = upper.find(prefix)
+            if start != -1:
+                return wkt.loads(text[start:])
+
+        # Bare coordinate list: lat/lon pairs, closed into a ring; one or two
+        # points are kept as such so they are reported as not polygons
+        points = _bare_points(text)
+        if not points:
+            return None
+        if len(points) == 1:
+            return Point(points[0])
+        if len(points) == 2:
+            return LineString(points)
+        return Polygon(points)
+
+    except Exception as e:
+        logger.warning(f"Could not parse geometry: {str(value)[:80]} - {str(e)}")
+        return None
+
+def parse_geometries(values: Iterable) -> List[Optional[BaseGeometry]]:
+    """Parse many coordinate texts or GeoJSON dicts"""
+    return [parse_geometry(value) for value in values]
+
+def _polygonal_part(geometry: BaseGeometry) -> Optional[BaseGeometry]:
+    """Keep only the polygonal part of a repaired geometry"""
+    if isinstance(geometry, (Polygon, MultiPolygon)):
+        return geometry
+    parts = [g for g in getattr(geometry, 'geoms', []) if isinstance(g, (Polygon, MultiPolygon))]
+    return unary_union(parts) if parts else None
+
+def repair_geometry(geometry: BaseGeometry) -> Optional[BaseGeometry]:
+    """Repair an invalid polygon (self-intersections, bad ring order)"""
+    repaired = make_valid(geometry) if make_valid else geometry.buffer(0)
+    repaired = _polygonal_part(repaired)
+    if repaired is None or repaired.is_empty:
+        return None
+    return repaired
+
+def validate_geometries(geometries: List[Optional[BaseGeometry]]) -> Tuple[List[Optional[BaseGeometry]], List[Dict]]:
+    """Validate and repair geometries; returns the usable geometries and a report per input"""
+    cleaned = []
+    reports = []
+    for geometry in geometries:
+        if geometry is None or geometry.is_empty:
+            cleaned.append(None)
+            reports.append({'valid': False, 'repaired': False, 'reason': 'missing'})
+            continue
+
+        if geometry.geom_type not in ('Polygon', 'MultiPolygon'):
+            # Points and lines carry no area; collections keep their polygonal part
+            geometry = _polygonal_part(geometry)
+            if geometry is None or geometry.is_empty:
+                cleaned.append(None)
+                reports.append({'valid': False, 'repaired': False, 'reason': 'not_polygon'})
+                continue
+
+        if geometry.is_valid:
+            cleaned.append(geometry)
+            reports.append({'valid': True, 'repaired': False, 'reason': None})
+            continue
+
+        reason = explain_validity(geometry)
+        repaired = repair_geometry(geometry) if geometry.geom_type in ('Polygon', 'MultiPolygon') else None
+        cleaned.append(repaired)
+        reports.append({'valid': repaired is not None, 'repaired': repaired is not None, 'reason': reason})
+
+    return cleaned, reports
+
+def _ring_arrays(geometries: List[Optional[BaseGeometry]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Flatten polygon rings into coordinate arrays with ring, owner and sign indexes"""
+    coords = []
+    ring_index = []
+    ring_owner = []
+    ring_sign = []
+    ring_count = 0
+    for geometry_index, geometry in enumerate(geometries):
+        if geometry is None or geometry.geom_type not in ('Polygon', 'MultiPolygon'):
+            continue
+        polygons = geometry.geoms if geometry.geom_type == 'MultiPolygon' else [geometry]
+        for polygon in polygons:
+            rings = [(polygon.exterior, 1.0)] + [(interior, -1.0) for interior in polygon.interiors]
+            for ring, sign in rings:
+                ring_coords = np.asarray(ring.coords, dtype=float)[:, :2]
+                coords.append(ring_coords)
+                ring_index.append(np.full(len(ring_coords), ring_count, dtype=np.int64))
+                ring_owner.append(geometry_index)
+                ring_sign.append(sign)
+                ring_count += 1
+
+    if not coords:
+        empty = np.empty(0)
+        return np.empty((0, 2)), empty.astype(np.int64), empty.astype(np.int64), empty
+    return (
+        np.concatenate(coords),
+        np.concatenate(ring_index),
+        np.asarray(ring_owner, dtype=np.int64),
+        np.asarray(ring_sign, dtype=float),
+    )
+
+def geodesic_areas_ha(geometries: List[Optional[BaseGeometry]], exact: bool = False) -> np.ndarray:
+    """Area of lon/lat polygons in hectares; NaN for missing or non-polygonal geometries
+
+    The default path evaluates the spherical-excess formula on the authalic
+    sphere for all rings at once. exact=True uses pyproj's ellipsoidal
+    computation polygon by polygon.
+    """
+    areas = np.full(len(geometries), np.nan)
+    if exact:
+        for i, geometry in enumerate(geometries):
+            if geometry is not None and geometry.geom_type in ('Polygon', 'MultiPolygon'):
+                # Holes must wind opposite to the shell to be subtracted
+                polygons = geometry.geoms if geometry.geom_type == 'MultiPolygon' else [geometry]
+                area = sum(geod.geometry_area_perimeter(orient(polygon))[0] for polygon in polygons)
+                areas[i] = abs(area) / SQ_M_PER_HA
+        return areas
+
+    coords, ring_index, ring_owner, ring_sign = _ring_arrays(geometries)
+    if len(coords) == 0:
+        return areas
+
+    lon = np.radians(coords[:, 0])
+    sin_lat = np.sin(np.radians(coords[:, 1]))
+
+    # One term per edge; edges that would join two different rings are masked out
+    same_ring = ring_index[1:] == ring_index[:-1]
+    d_lon = lon[1:] - lon[:-1]
+    d_lon = (d_lon + np.pi) % (2 * np.pi) - np.pi
+    terms = np.where(same_ring, d_lon * (2.0 + sin_lat[:-1] + sin_lat[1:]), 0.0)
+
+    ring_sums = np.bincount(ring_index[:-1], weights=terms, minlength=len(ring_owner))
+    ring_areas = np.abs(ring_sums) * AUTHALIC_RADIUS_M ** 2 / 2.0
+    owner_areas = np.bincount(ring_owner, weights=ring_sign * ring_areas, minlength=len(geometries))
+
+    polygonal = np.zeros(len(geometries), dtype=bool)
+    polygonal[np.unique(ring_owner)] = True
+    areas[polygonal] = owner_areas[polygonal] / SQ_M_PER_HA
+    return areas
+
+def area_deviation(stated_areas: Iterable, polygon_areas: np.ndarray, tolerance: float = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Relative deviation of stated area_ha from polygon area, and the mismatch flag"""
+    if tolerance is None:
+        tolerance = config.AREA_MISMATCH_TOLERANCE
+    # Non-numeric stated areas ('abc', '2.5 ha') count as not stated rather than failing the batch
+    stated = pd.to_numeric(pd.Series(list(stated_areas), dtype=object), errors='coerce').to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        deviation = np.abs(stated - polygon_areas) / polygon_areas
+    mismatch = np.nan_to_num(deviation, nan=0.0) > tolerance
+    return deviation, mismatch
+
+def process_geometries(records: List[Dict], tolerance: float = None, include_geometry: bool = False) -> List[Dict]:
+    """Batch geometry stage: parse, validate/repair, measure and compare with stated area
+
+    Each record needs 'coordinates' (GeoJSON, WKT or coordinate text) and
+    optionally 'area_ha'. Returns one result per record in the same order;
+    the GeoJSON geometry is included when requested or when it was repaired.
+    """
+    geometries = parse_geometries(record.get('coordinates') for record in records)
+    geometries, reports = validate_geometries(geometries)
+    areas = geodesic_areas_ha(geometries)
+    deviations, mismatches = area_deviation((record.get('area_ha') for record in records), areas, tolerance)
+
+    results = []
+    for geometry, report, area, deviation, mismatch in zip(geometries, reports, areas, deviations, mismatches):
+        results.append({
+            'geometry': mapping(geometry) if geometry is not None and (include_geometry or report['repaired']) else None,
+            'valid': report['valid'],
+            'repaired': report['repaired'],
+            'reason': report['reason'],
+            'polygon_area_ha': None if np.isnan(area) else round(float(area), 4),
+            'area_deviation': None if np.isnan(deviation) else round(float(deviation), 4),
+            'area_mismatch': bool(mismatch)
+        })
+
+    flagged = int(np.count_nonzero(mismatches))
+    if flagged:
+        logger.info(f"Geometry stage flagged {flagged}/{len(records)} claims for area mismatch")
+    return results
+
+def check_claim_geometry(extracted_fields: Dict) -> Optional[Dict]:
+    """Run the geometry stage for one document's extracted fields"""
+    coordinates = extracted_fields.get('coordinates_geojson')
+    if not coordinates:
+        return None
+
+    area = extracted_fields.get('area_ha') or {}
+    # The parsed GeoJSON first; the raw text only when nothing was parsed from it
+    record = {
+        'coordinates': coordinates.get('value') or coordinates.get('original_text'),
+        'area_ha': area.get('value')
+    }
+    return process_geometries([record], include_geometry=True)[0]
@@ -1,34 +1,137 @@
+import atexit
+import copy
+import json
 import logging
+import queue
 import sys
-from logging.handlers import RotatingFileHandler
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Optional
 from app.config import config
 
-def setup_logger(name: str) -> logging.Logger:
-    """Setup logger with consistent configuration"""
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
-    
-    # Remove existing handlers
-    logger.handlers.clear()
-    
-    # Create formatter
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-    
+# One process-wide queue: callers only enqueue records, a single listener
+# thread formats them and does the console/file I/O.
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_lock = threading.Lock()
+_queue_handler: Optional[QueueHandler] = None
+_listener: Optional[QueueListener] = None
+
+class TracebackQueueHandler(QueueHandler):
+    """QueueHandler that keeps the traceback as exc_text instead of folding it into the message
+
+    exc_info cannot cross the queue, and QueueHandler.prepare() formats it into
+    the message and drops it, so JSON output lost its 'exception' field.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including fields passed via `extra=`"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+def _formatter() -> logging.Formatter:
+    if config.LOG_FORMAT.lower() == "json":
+        return JsonFormatter()
+    return logging.Formatter(TEXT_FORMAT)
+
+def _output_handlers() -> list:
+    formatter = _formatter()
+
     # Console handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
-    
-    # File handler (only in production)
+    handlers = [console_handler]
+
+    # File handler (only in production), shared by every logger
     if config.ENVIRONMENT == "production":
         file_handler = RotatingFileHandler(
-            'app.log',
+            config.LOG_FILE,
             maxBytes=10485760,  # 10MB
             backupCount=5
         )
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
-    
-    return logger
\ No newline at end of file
+        handlers.append(file_handler)
+
+    return handlers
+
+def parse_log_levels(spec: str) -> Dict[str, int]:
+    """Parse "app.ocr_provider=WARNING,app.worker=DEBUG" into logger name -> level"""
+    levels = {}
+    for item in (spec or '').split(','):
+        name, _, level = item.partition('=')
+        if name.strip() and level.strip():
+            levels[name.strip()] = logging.getLevelName(level.strip().upper())
+    return {name: level for name, level in levels.items() if isinstance(level, int)}
+
+def level_for(name: str) -> int:
+    """Most specific LOG_LEVELS entry for a logger, else LOG_LEVEL"""
+    levels = parse_log_levels(config.LOG_LEVELS)
+    parts = name.split('.')
+    for i in range(len(parts), 0, -1):
+        prefix = '.'.join(parts[:i])
+        if prefix in levels:
+            return levels[prefix]
+    level = logging.getLevelName(config.LOG_LEVEL.upper())
+    return level if isinstance(level, int) else logging.INFO
+
+def _get_queue_handler() -> TracebackQueueHandler:
+    global _queue_handler, _listener
+    with _lock:
+        if _queue_handler is None:
+            log_queue = queue.SimpleQueue()
+            _listener = QueueListener(log_queue, *_output_handlers(), respect_handler_level=True)
+            _listener.start()
+            _queue_handler = TracebackQueueHandler(log_queue)
+            atexit.register(stop_logging)
+        return _queue_handler
+
+def stop_logging() -> None:
+    """Drain queued records and stop the listener thread"""
+    global _listener
+    with _lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+
+def setup_logger(name: str) -> logging.Logger:
+    """Setup logger with consistent configuration"""
+    logger = logging.getLogger(name)
+    # Level is checked before a record is built, so disabled debug calls stay cheap
+    logger.setLevel(level_for(name))
+
+    handler = _get_queue_handler()
+    if handler not in logger.handlers:
+        logger.addHandler(handler)
+    logger.propagate = False
+
+    return logger
@@ -1,8 +1,13 @@
+import asyncio
 from fastapi import FastAPI, Depends
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from app.config import config
 from app.api import router as api_router
 from app.logger import setup_logger
+from app.result_store import result_store
+from app.metrics import render_metrics, monitor_event_loop_lag
 
 # Setup logger
 logger = setup_logger(__name__)
@@ -22,13 +27,43 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class ResultGZipMiddleware(GZipMiddleware):
+    """GZip that leaves Server-Sent Event streams unbuffered"""
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].endswith("/events"):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+# Compress larger JSON responses (full results, page ranges)
+app.add_middleware(ResultGZipMiddleware, minimum_size=1000)
+
 # Include routers
 app.include_router(api_router, prefix="/api/v1")
 
+@app.on_event("startup")
+async def startup():
+    # Event-loop lag shows up in /metrics as fra_event_loop_lag_seconds
+    if config.EVENT_LOOP_PROBE_INTERVAL > 0:
+        app.state.lag_probe = asyncio.create_task(monitor_event_loop_lag(config.EVENT_LOOP_PROBE_INTERVAL))
+
+@app.on_event("shutdown")
+async def shutdown():
+    probe = getattr(app.state, 'lag_probe', None)
+    if probe:
+        probe.cancel()
+    # Write out any results still waiting for the next batch
+    result_store.close()
+
 @app.get("/")
 async def root():
     return {"message": "FRA Data Digitization API"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus-style metrics: stage latencies, jobs, queue depth, cache hit rates, throughput"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "version": "1.0.0"}
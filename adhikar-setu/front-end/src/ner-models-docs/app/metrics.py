@@ -0,0 +1,193 @@
+import asyncio
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+# Prometheus text exposition for the API process. Values live in memory,
+# so each worker process reports its own series.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+def _label_key(labels: Dict[str, str]) -> Tuple:
+    return tuple(sorted(labels.items()))
+
+def _format_labels(key: Tuple, extra: Tuple = ()) -> str:
+    items = list(key) + list(extra)
+    if not items:
+        return ""
+    escaped = ('{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"')) for k, v in items)
+    return "{" + ",".join(escaped) + "}"
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._lock = threading.Lock()
+        registry.append(self)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, description: str):
+        super().__init__(name, description)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{_format_labels(key)} {value}" for key, value in values.items()]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, description)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple, Dict] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0}
+            series['counts'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def mean(self, **labels) -> Optional[float]:
+        series = self._series.get(_label_key(labels))
+        if not series or not series['count']:
+            return None
+        return series['sum'] / series['count']
+
+    def render(self) -> List[str]:
+        with self._lock:
+            snapshot = {key: (list(s['counts']), s['sum'], s['count']) for key, s in self._series.items()}
+        lines = []
+        for key, (counts, total, count) in snapshot.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float('inf') else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(key, (('le', le),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+registry: List[Metric] = []
+
+STAGE_DURATION = Histogram("fra_stage_duration_seconds", "Wall time per pipeline stage (per page for page stages)")
+DOCUMENT_DURATION = Histogram("fra_document_duration_seconds", "End-to-end processing time per document")
+JOBS_TOTAL = Counter("fra_jobs_total", "Finished parse jobs by status")
+JOBS_ACTIVE = Gauge("fra_jobs_active", "Parse jobs currently being processed")
+QUEUE_DEPTH = Gauge("fra_queue_depth", "Parse jobs accepted but not yet started")
+PAGES_PROCESSED = Counter("fra_pages_processed_total", "Pages run through OCR")
+PAGES_PER_SECOND = Gauge("fra_pages_per_second", "Throughput of the most recently finished document")
+CACHE_REQUESTS = Counter("fra_cache_requests_total", "Cache lookups by cache and result (hit/miss)")
+EVENT_LOOP_LAG = Histogram("fra_event_loop_lag_seconds", "Delay of a periodic event-loop wakeup past its deadline", LAG_BUCKETS)
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Count a cache lookup"""
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+def _cache_hit_ratios() -> List[str]:
+    caches = {dict(key)['cache'] for key in list(CACHE_REQUESTS._values)}
+    lines = [
+        "# HELP fra_cache_hit_ratio Hits over lookups since start, by cache",
+        "# TYPE fra_cache_hit_ratio gauge",
+    ]
+    for cache in sorted(caches):
+        hits = CACHE_REQUESTS.value(cache=cache, result="hit")
+        total = hits + CACHE_REQUESTS.value(cache=cache, result="miss")
+        lines.append(f'fra_cache_hit_ratio{{cache="{cache}"}} {hits / total if total else 0.0}')
+    return lines
+
+async def monitor_event_loop_lag(interval: float = 0.5) -> None:
+    """Sleep in a loop and record how late each wakeup is; runs until cancelled"""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, loop.time() - start - interval))
+
+def render_metrics() -> str:
+    """All metrics in Prometheus text format"""
+    lines = []
+    for metric in registry:
+        lines.extend(metric.header())
+        lines.extend(metric.render())
+    lines.extend(_cache_hit_ratios())
+    return "\n".join(lines) + "\n"
+
+class StageTimer:
+    """Collects per-stage and per-page wall times for one document
+
+    CPU time is that of the calling thread, so it excludes subprocesses
+    such as tesseract.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.stage_cpu: Dict[str, float] = {}
+        self.pages: Dict[int, Dict[str, float]] = {}
+
+    @contextmanager
+    def stage(self, name: str, page: int = None):
+        start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed
+            self.stage_cpu[name] = self.stage_cpu.get(name, 0.0) + time.thread_time() - cpu_start
+            if page is not None:
+                self.pages.setdefault(page, {})[name] = round(elapsed, 4)
+            STAGE_DURATION.observe(elapsed, stage=name)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def breakdown(self) -> Dict:
+        """Wall and CPU seconds per stage"""
+        return {
+            name: {'wall': round(seconds, 4), 'cpu': round(self.stage_cpu.get(name, 0.0), 4)}
+            for name, seconds in self.stages.items()
+        }
+
+    def summary(self) -> Dict:
+        return {
+            'stage_timings': {name: round(seconds, 4) for name, seconds in self.stages.items()},
+            'page_timings': [{'page': page, **timings} for page, timings in sorted(self.pages.items())]
+        }
@@ -36,7 +36,8 @@ class Page(BaseModel):
     width: int
     height: int
     ocr_text: str
-    ocr_blocks: List[OCRBlock]
+    ocr_blocks: Optional[List[OCRBlock]] = None
+    ocr_blocks_ref: Optional[Dict] = None  # sidecar holding the per-word blocks
 
 class AuditLog(BaseModel):
     created_at: datetime
@@ -16,10 +16,10 @@ except:
     nlp = None
     model_available = False
 
-def extract_entities(text: str, blocks: List[Dict] = None) -> List[Dict]:
+def extract_entities(text: str, blocks: List[Dict] = None, rules_only: bool = False) -> List[Dict]:
     """Extract entities from text using available methods"""
     try:
-        if model_available and nlp:
+        if model_available and nlp and not rules_only:
             return extract_with_model(text, blocks)
         else:
             return extract_with_rules(text, blocks)
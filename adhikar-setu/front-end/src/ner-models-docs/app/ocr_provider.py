@@ -5,11 +5,15 @@ import numpy as np
 from typing import List, Dict
 from app.config import config
 from app.logger import setup_logger
+from app.layout import detect_layout
 
 logger = setup_logger(__name__)
 
-def ocr_tesseract(image: np.ndarray, lang: str = None, psm: int = 6) -> Dict:
-    """Perform OCR using Tesseract with improved configuration"""
+def ocr_tesseract(image: np.ndarray, lang: str = None, psm: int = 6, fallbacks: bool = True) -> Dict:
+    """Perform OCR using Tesseract with improved configuration
+
+    With fallbacks, an empty result is retried with PSM 8 and then the legacy engine.
+    """
     try:
         if lang is None:
             lang = config.TESSERACT_LANG
@@ -57,20 +61,20 @@ def ocr_tesseract(image: np.ndarray, lang: str = None, psm: int = 6) -> Dict:
         full_text = ' '.join([block['text'] for block in blocks if block['text']])
         
         # If no text found, try with different PSM mode
-        if not full_text.strip() and psm != 8:
-            logger.warning("No text found with PSM 6, trying PSM 8 (single word)")
+        if fallbacks and not full_text.strip() and psm != 8:
+            logger.debug("No text found with PSM %d, trying PSM 8 (single word)", psm)
             return ocr_tesseract(image, lang, psm=8)
         
         # If still no text, try with different OEM
-        if not full_text.strip():
-            logger.warning("No text found, trying different OEM")
+        if fallbacks and not full_text.strip():
+            logger.debug("No text found with PSM %d, trying legacy OEM", psm)
             custom_config = '--oem 1 --psm 6'  # Legacy engine
             full_text = pytesseract.image_to_string(pil_image, lang=lang, config=custom_config)
             if full_text.strip():
                 blocks = [{'bbox': [0, 0, pil_image.width, pil_image.height], 
                           'text': full_text, 'confidence': 0.3}]
         
-        logger.info(f"OCR extracted {len(full_text)} characters with {len(blocks)} blocks")
+        logger.debug("OCR extracted %d characters with %d blocks (PSM %d)", len(full_text), len(blocks), psm)
         return {
             'text': full_text,
             'blocks': blocks,
@@ -88,8 +92,9 @@ def ocr_tesseract(image: np.ndarray, lang: str = None, psm: int = 6) -> Dict:
             'error': str(e)
         }
 
-def perform_ocr(image: np.ndarray) -> Dict:
+def perform_ocr(image: np.ndarray, psm_modes: List[int] = None, fallbacks: bool = True) -> Dict:
     """Perform OCR using configured provider with enhanced preprocessing"""
+    psm_modes = psm_modes or config.OCR_PSM_MODES
     try:
         # Apply additional OCR-specific enhancement
         enhanced_image = enhance_for_ocr(image)
@@ -102,21 +107,21 @@ def perform_ocr(image: np.ndarray) -> Dict:
         # Fall back to Tesseract with multiple attempts
         results = []
         
-        # Try different PSM modes
-        for psm in [6, 8, 11, 13]:  # 6: uniform block, 8: single word, 11: sparse text, 13: raw line
-            result = ocr_tesseract(enhanced_image, psm=psm)
+        # Try the configured PSM modes (6: uniform block, 8: single word, 11: sparse text, 13: raw line)
+        for psm in psm_modes:
+            result = ocr_tesseract(enhanced_image, psm=psm, fallbacks=fallbacks)
             if result['text'].strip():
                 results.append(result)
-                logger.info(f"PSM {psm} found {len(result['text'])} characters")
+                logger.debug("PSM %d found %d characters", psm, len(result['text']))
         
         # Return the best result (most text)
         if results:
             best_result = max(results, key=lambda x: len(x['text']))
-            logger.info(f"Selected PSM {best_result.get('psm_mode', 6)} with {len(best_result['text'])} characters")
+            logger.info("Selected PSM %d with %d characters", best_result.get('psm_mode', 6), len(best_result['text']))
             return best_result
         
         # Final fallback
-        return ocr_tesseract(enhanced_image, psm=6)
+        return ocr_tesseract(enhanced_image, psm=psm_modes[0] if psm_modes else 6, fallbacks=fallbacks)
         
     except Exception as e:
         logger.error(f"OCR failed completely: {str(e)}")
@@ -127,6 +132,25 @@ def perform_ocr(image: np.ndarray) -> Dict:
             'error': str(e)
         }
 
+def perform_region_ocr(image: np.ndarray, psm_modes: List[int] = None, fallbacks: bool = True, margin: int = 10) -> Dict:
+    """OCR only the area covered by detected text blocks; boxes are returned in page coordinates"""
+    blocks = detect_layout(image)
+    if not blocks:
+        return perform_ocr(image, psm_modes, fallbacks)
+
+    height, width = image.shape[:2]
+    x0 = max(0, min(block['bbox'][0] for block in blocks) - margin)
+    y0 = max(0, min(block['bbox'][1] for block in blocks) - margin)
+    x1 = min(width, max(block['bbox'][2] for block in blocks) + margin)
+    y1 = min(height, max(block['bbox'][3] for block in blocks) + margin)
+
+    result = perform_ocr(image[y0:y1, x0:x1], psm_modes, fallbacks)
+    for block in result.get('blocks', []):
+        bbox = block['bbox']
+        block['bbox'] = [bbox[0] + x0, bbox[1] + y0, bbox[2] + x0, bbox[3] + y0]
+    result['region'] = [x0, y0, x1, y1]
+    return result
+
 def enhance_for_ocr(image: np.ndarray) -> np.ndarray:
     """Additional enhancement specifically for OCR"""
     try:
@@ -153,13 +177,14 @@ def enhance_for_ocr(image: np.ndarray) -> np.ndarray:
         # Use adaptive thresholding for better results
         image = cv2.adaptiveThreshold(
             image, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-            cv2.THRESH_BINARY, 11, 2
+            cv2.THRESH_BINARY, config.THRESHOLD_BLOCK_SIZE, config.THRESHOLD_C
         )
         
         # Morphological operations to clean up text
         kernel = np.ones((1, 1), np.uint8)
         image = cv2.morphologyEx(image, cv2.MORPH_CLOSE, kernel)
-        image = cv2.medianBlur(image, 3)
+        if config.MEDIAN_BLUR_KSIZE > 1:
+            image = cv2.medianBlur(image, config.MEDIAN_BLUR_KSIZE)
         
         return image
         
@@ -0,0 +1,83 @@
+import os
+import numpy as np
+from typing import Dict, List, Optional
+from app.config import config
+from app.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+SIDECAR_SUFFIX = ".ocr.npz"
+
+def sidecar_path(document_id: str) -> str:
+    """Location of a document's OCR sidecar"""
+    return os.path.join(config.OCR_SIDECAR_DIR, f"{document_id}{SIDECAR_SUFFIX}")
+
+def save_ocr_blocks(document_id: str, pages: List[Dict], output_path: str = None) -> str:
+    """Write per-word OCR blocks of all pages as compressed columnar arrays"""
+    output_path = output_path or sidecar_path(document_id)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+    blocks = [block for page in pages for block in page.get('ocr_blocks') or []]
+    block_offsets = np.cumsum([0] + [len(page.get('ocr_blocks') or []) for page in pages], dtype=np.int64)
+
+    bboxes = np.array([block.get('bbox') or [0, 0, 0, 0] for block in blocks], dtype=np.float64).reshape(-1, 4)
+    # Tesseract boxes are whole pixels; keep them integral when possible
+    if np.array_equal(bboxes, np.round(bboxes)):
+        bboxes = bboxes.astype(np.int32)
+    else:
+        bboxes = bboxes.astype(np.float32)
+
+    encoded = [str(block.get('text', '')).encode('utf-8') for block in blocks]
+    text_offsets = np.cumsum([0] + [len(text) for text in encoded], dtype=np.int64)
+
+    with open(output_path, 'wb') as f:
+        np.savez_compressed(
+            f,
+            page_numbers=np.array([page.get('page_number', i + 1) for i, page in enumerate(pages)], dtype=np.int32),
+            block_offsets=block_offsets,
+            bboxes=bboxes,
+            confidences=np.array([block.get('confidence', 0.0) for block in blocks], dtype=np.float32),
+            text_offsets=text_offsets,
+            text=np.frombuffer(b''.join(encoded), dtype=np.uint8),
+        )
+
+    logger.info(f"Saved {len(blocks)} OCR blocks to {output_path}")
+    return output_path
+
+def load_ocr_blocks(path: str, page_number: Optional[int] = None) -> Dict[int, List[Dict]]:
+    """Rebuild OCR block dicts from a sidecar, for one page or all pages"""
+    with np.load(path) as sidecar:
+        page_numbers = sidecar['page_numbers']
+        block_offsets = sidecar['block_offsets']
+        bboxes = sidecar['bboxes']
+        confidences = sidecar['confidences']
+        text_offsets = sidecar['text_offsets']
+        text = sidecar['text'].tobytes()
+
+    pages = {}
+    for index, number in enumerate(page_numbers.tolist()):
+        if page_number is not None and number != page_number:
+            continue
+        start, end = int(block_offsets[index]), int(block_offsets[index + 1])
+        pages[number] = [
+            {
+                'bbox': bboxes[i].tolist(),
+                'text': text[text_offsets[i]:text_offsets[i + 1]].decode('utf-8'),
+                'confidence': round(float(confidences[i]), 4)
+            }
+            for i in range(start, end)
+        ]
+    return pages
+
+def split_ocr_blocks(document_data: Dict) -> Dict:
+    """Move pages[].ocr_blocks into a sidecar and leave a reference in each page"""
+    pages = document_data.get('pages', [])
+    if not any('ocr_blocks' in page for page in pages):
+        return document_data
+
+    path = save_ocr_blocks(document_data['document_id'], pages)
+    for page in pages:
+        blocks = page.pop('ocr_blocks', None) or []
+        page['ocr_blocks_ref'] = {'sidecar': path, 'count': len(blocks)}
+    document_data['ocr_sidecar'] = path
+    return document_data
@@ -0,0 +1,203 @@
+import threading
+from typing import Dict, List, Optional
+from PIL import Image
+from app.config import config
+from app.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# A4 page area in square inches, used when the page size is unknown
+A4_SQ_INCHES = 8.27 * 11.69
+
+# Prior unit costs (seconds per megapixel, per page for NER), replaced by observations
+PRIOR_UNIT_COSTS = {
+    'rasterize': 0.05,
+    'preprocess': 0.07,
+    'ocr': 0.17,          # per megapixel and PSM pass
+    'ner_model': 0.3,
+    'ner_rules': 0.02,
+}
+
+# Expected extra OCR passes from the empty-result fallbacks (PSM 8, legacy OEM)
+FALLBACK_PASSES = 0.1
+# Share of the page area left after cropping to detected text regions
+REGION_AREA_FACTOR = 0.6
+
+class PipelinePlan:
+    """Settings one job runs with, and the degradations that produced them"""
+
+    def __init__(self, dpi: int = None, psm_modes: List[int] = None, fallbacks: bool = True,
+                 rules_only_ner: bool = False, region_ocr: bool = False, budget: Optional[float] = None):
+        self.dpi = dpi or config.DPI
+        self.psm_modes = list(psm_modes or config.OCR_PSM_MODES)
+        self.fallbacks = fallbacks
+        self.rules_only_ner = rules_only_ner
+        self.region_ocr = region_ocr
+        self.budget = budget
+        self.degradations: List[str] = []
+        self.estimated_seconds: Optional[float] = None
+
+    @property
+    def degraded(self) -> bool:
+        return bool(self.degradations)
+
+    @property
+    def scale(self) -> float:
+        """Linear scale of page images relative to full quality"""
+        return self.dpi / config.DPI
+
+    def to_dict(self) -> Dict:
+        return {
+            'budget_s': self.budget,
+            'estimated_s': None if self.estimated_seconds is None else round(self.estimated_seconds, 3),
+            'dpi': self.dpi,
+            'psm_modes': self.psm_modes,
+            'fallbacks': self.fallbacks,
+            'ner': 'rules' if self.rules_only_ner else 'auto',
+            'region_ocr': self.region_ocr,
+            'degradations': list(self.degradations),
+        }
+
+class CostModel:
+    """Per-unit stage costs, updated from the stage timings of finished documents"""
+
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+        self.unit_costs = dict(PRIOR_UNIT_COSTS)
+        self.observations = {name: 0 for name in PRIOR_UNIT_COSTS}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, seconds: float, units: float) -> None:
+        """Fold one measurement (seconds for the given units of work) into the estimate"""
+        if units <= 0:
+            return
+        unit_cost = seconds / units
+        with self._lock:
+            # First observation replaces the prior, later ones are smoothed
+            if self.observations[name] == 0:
+                self.unit_costs[name] = unit_cost
+            else:
+                self.unit_costs[name] += self.alpha * (unit_cost - self.unit_costs[name])
+            self.observations[name] += 1
+
+    def estimate(self, plan: PipelinePlan, pages: int, megapixels: float) -> float:
+        """Predicted seconds for a document; megapixels is per page at full quality"""
+        pixels = megapixels * plan.scale ** 2
+        ocr_pixels = pixels * (REGION_AREA_FACTOR if plan.region_ocr else 1.0)
+        passes = len(plan.psm_modes) + (FALLBACK_PASSES if plan.fallbacks else 0.0)
+        ner = self.unit_costs['ner_rules' if plan.rules_only_ner or not model_available() else 'ner_model']
+        per_page = (
+            (self.unit_costs['rasterize'] + self.unit_costs['preprocess']) * pixels
+            + self.unit_costs['ocr'] * ocr_pixels * passes
+            + ner
+        )
+        return per_page * pages
+
+    def observe_document(self, plan: PipelinePlan, timings: Dict, megapixels: float) -> None:
+        """Learn from a finished document's stage timings (StageTimer.summary())"""
+        pixels = megapixels * plan.scale ** 2
+        ocr_pixels = pixels * (REGION_AREA_FACTOR if plan.region_ocr else 1.0)
+        passes = len(plan.psm_modes) + (FALLBACK_PASSES if plan.fallbacks else 0.0)
+        ner = 'ner_rules' if plan.rules_only_ner or not model_available() else 'ner_model'
+        page_timings = timings.get('page_timings', [])
+        if 'rasterize' in timings.get('stage_timings', {}):
+            self.observe('rasterize', timings['stage_timings']['rasterize'], pixels * len(page_timings))
+        for page in page_timings:
+            if 'preprocess' in page:
+                self.observe('preprocess', page['preprocess'], pixels)
+            if 'ocr' in page:
+                self.observe('ocr', page['ocr'], ocr_pixels * passes)
+            if 'ner' in page:
+                self.observe(ner, page['ner'], 1)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {'unit_costs': dict(self.unit_costs), 'observations': dict(self.observations)}
+
+def model_available() -> bool:
+    from app.ner.predict_ner import model_available as available
+    return available
+
+def document_shape(path: str) -> Dict:
+    """Page count and megapixels per page at full quality, read without rasterizing"""
+    full_pixels = A4_SQ_INCHES * config.DPI ** 2 / 1e6
+    try:
+        if path.lower().endswith('.pdf'):
+            from pdf2image import pdfinfo_from_path
+            info = pdfinfo_from_path(path)
+            pages = int(info.get('Pages', 1))
+            # "Page size: 595 x 842 pts (A4)"
+            size = str(info.get('Page size', '')).split()
+            if len(size) >= 3 and size[1] == 'x':
+                full_pixels = float(size[0]) / 72 * float(size[2]) / 72 * config.DPI ** 2 / 1e6
+            return {'pages': pages, 'megapixels': full_pixels}
+        with Image.open(path) as image:
+            return {'pages': 1, 'megapixels': image.width * image.height / 1e6}
+    except Exception as e:
+        logger.warning(f"Could not read document shape of {path}: {str(e)}")
+        return {'pages': 1, 'megapixels': full_pixels}
+
+# Degradations in the order they are applied: cheapest loss of quality first
+def _single_psm(plan: PipelinePlan) -> bool:
+    if len(plan.psm_modes) <= 1:
+        return False
+    plan.psm_modes = plan.psm_modes[:1]
+    return True
+
+def _no_fallbacks(plan: PipelinePlan) -> bool:
+    if not plan.fallbacks:
+        return False
+    plan.fallbacks = False
+    return True
+
+def _rule_ner(plan: PipelinePlan) -> bool:
+    if plan.rules_only_ner or not model_available():
+        return False
+    plan.rules_only_ner = True
+    return True
+
+def _region_ocr(plan: PipelinePlan) -> bool:
+    if plan.region_ocr:
+        return False
+    plan.region_ocr = True
+    return True
+
+def _lower_dpi(dpi: int):
+    def degrade(plan: PipelinePlan) -> bool:
+        if plan.dpi <= dpi:
+            return False
+        plan.dpi = dpi
+        return True
+    return degrade
+
+DEGRADATIONS = [
+    ('single_psm', _single_psm),
+    ('no_ocr_fallbacks', _no_fallbacks),
+    ('rule_only_ner', _rule_ner),
+    ('region_ocr', _region_ocr),
+    ('dpi_200', _lower_dpi(200)),
+    ('dpi_150', _lower_dpi(150)),
+]
+
+def plan_pipeline(budget: Optional[float], pages: int, megapixels: float) -> PipelinePlan:
+    """Full-quality plan, degraded step by step until its estimate fits the budget"""
+    plan = PipelinePlan(budget=budget)
+    plan.estimated_seconds = cost_model.estimate(plan, pages, megapixels)
+    if budget is None:
+        return plan
+
+    for name, degrade in DEGRADATIONS:
+        if plan.estimated_seconds <= budget:
+            break
+        if degrade(plan):
+            plan.degradations.append(name)
+            plan.estimated_seconds = cost_model.estimate(plan, pages, megapixels)
+
+    if plan.estimated_seconds > budget:
+        logger.warning(f"Budget {budget}s not reachable; cheapest plan is estimated at {plan.estimated_seconds:.2f}s")
+    elif plan.degraded:
+        logger.info(f"Planned {plan.degradations} to fit {budget}s budget (estimated {plan.estimated_seconds:.2f}s)")
+    return plan
+
+# Global cost model, shared by all jobs of the process
+cost_model = CostModel()
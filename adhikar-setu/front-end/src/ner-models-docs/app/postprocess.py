@@ -1,26 +1,81 @@
 import re
 from datetime import datetime
 from dateutil import parser
-from typing import Optional, Tuple, Any
+from typing import Optional, Tuple, Any, Iterable
+import numpy as np
+import pandas as pd
 from app.config import config
 from app.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Devanagari digits (U+0966..U+096F) to ASCII
+DEVANAGARI_DIGITS = str.maketrans('०१२३४५६७८९', '0123456789')
+
+# Precompiled patterns for the formats that occur in FRA registers
+DATE_CLEAN_RE = re.compile(r'[^\d/\-\.]')
+DATE_DMY_RE = re.compile(r'^\s*(\d{1,2})[/\-\.](\d{1,2})[/\-\.](\d{4}|\d{2})\s*$')
+DATE_YMD_RE = re.compile(r'^\s*(\d{4})-(\d{1,2})-(\d{1,2})\s*$')
+AREA_NUMBER_RE = re.compile(r'(\d+\.?\d*)')
+KHASRA_CLEAN_RE = re.compile(r'[^\d/]')
+COORD_PATTERNS = [
+    re.compile(r'(\d+\.\d+)[°\s]*[NS]?[\s,]+(\d+\.\d+)[°\s]*[EW]?'),  # Decimal degrees
+    re.compile(r'(\d+)°\s*(\d+)\'\s*(\d+\.?\d*)"\s*[NS],\s*(\d+)°\s*(\d+)\'\s*(\d+\.?\d*)"\s*[EW]'),  # DMS
+]
+WKT_NUMBER_RE = re.compile(r'[-+]?\d*\.\d+|\d+')
+
+ACRE_TO_HA = 0.404686
+BIGHA_TO_HA = 0.25  # approximate conversion (varies by region)
+
+def expand_two_digit_year(year: int) -> int:
+    """Place a two-digit year within 50 years of today, as dateutil does"""
+    current_year = datetime.now().year
+    year += current_year // 100 * 100
+    if year >= current_year + 50:
+        year -= 100
+    elif year < current_year - 50:
+        year += 100
+    return year
+
+def _fast_parse_date(date_str: str) -> Optional[str]:
+    """Parse DD-MM-YYYY, DD/MM/YY and YYYY-MM-DD without dateutil"""
+    match = DATE_YMD_RE.match(date_str)
+    if match:
+        year, month, day = match.groups()
+    else:
+        match = DATE_DMY_RE.match(date_str)
+        if not match:
+            return None
+        day, month, year = match.groups()
+
+    year = int(year)
+    if year < 100:
+        year = expand_two_digit_year(year)
+    try:
+        return datetime(year, int(month), int(day)).strftime('%Y-%m-%d')
+    except ValueError:
+        # Let dateutil decide on ambiguous values such as month > 12
+        return None
+
 def normalize_date(date_str: str) -> Optional[str]:
     """Normalize date string to ISO 8601 format"""
     if not date_str or not isinstance(date_str, str):
         return None
     
+    date_str = date_str.translate(DEVANAGARI_DIGITS)
+    fast_result = _fast_parse_date(date_str)
+    if fast_result:
+        return fast_result
+    
     try:
         # Clean the date string
-        date_str = re.sub(r'[^\d/\-\.]', ' ', date_str.strip())
+        date_str = DATE_CLEAN_RE.sub(' ', date_str.strip())
         
-        # Try parsing with dateutil
+        # Fall back to dateutil for anything unusual
         parsed_date = parser.parse(date_str, dayfirst=True, fuzzy=True)
         return parsed_date.strftime('%Y-%m-%d')
         
-    except (ValueError, TypeError) as e:
+    except (ValueError, TypeError, OverflowError) as e:
         logger.warning(f"Could not parse date: {date_str} - {str(e)}")
         return None
 
@@ -30,22 +85,25 @@ def parse_area(area_text: str) -> Optional[float]:
         return None
     
     try:
-        # Extract numbers from text
-        numbers = re.findall(r'\d+\.?\d*', area_text)
-        if not numbers:
+        area_text = area_text.translate(DEVANAGARI_DIGITS)
+        
+        # Extract the first number from text
+        number = AREA_NUMBER_RE.search(area_text)
+        if not number:
             return None
         
-        area_value = float(numbers[0])
+        area_value = float(number.group())
         
         # Check for common area units and convert to hectares
-        if 'acre' in area_text.lower():
-            area_value *= 0.404686  # acres to hectares
-        elif 'bigha' in area_text.lower():
-            area_value *= 0.25  # approximate conversion (varies by region)
+        unit_text = area_text.lower()
+        if 'acre' in unit_text:
+            area_value *= ACRE_TO_HA
+        elif 'bigha' in unit_text:
+            area_value *= BIGHA_TO_HA
         
         return round(area_value, 3)
         
-    except (ValueError, TypeError) as e:
+    except (ValueError, TypeError, AttributeError) as e:
         logger.warning(f"Could not parse area: {area_text} - {str(e)}")
         return None
 
@@ -56,13 +114,10 @@ def parse_coordinates(coord_text: str) -> Optional[dict]:
     
     try:
         # Try to extract coordinates using various patterns
-        patterns = [
-            r'(\d+\.\d+)[°\s]*[NS]?[\s,]+(\d+\.\d+)[°\s]*[EW]?',  # Decimal degrees
-            r'(\d+)°\s*(\d+)\'\s*(\d+\.?\d*)"\s*[NS],\s*(\d+)°\s*(\d+)\'\s*(\d+\.?\d*)"\s*[EW]',  # DMS
-        ]
+        coord_text = coord_text.translate(DEVANAGARI_DIGITS)
         
-        for pattern in patterns:
-            matches = re.findall(pattern, coord_text)
+        for pattern in COORD_PATTERNS:
+            matches = pattern.findall(coord_text)
             if matches:
                 if len(matches[0]) == 2:  # Decimal degrees
                     lat, lon = float(matches[0][0]), float(matches[0][1])
@@ -86,7 +141,7 @@ def parse_coordinates(coord_text: str) -> Optional[dict]:
         # Try to extract from WKT format
         if 'POLYGON' in coord_text.upper():
             # Extract coordinates from WKT
-            coords = re.findall(r'[-+]?\d*\.\d+|\d+', coord_text)
+            coords = WKT_NUMBER_RE.findall(coord_text)
             if len(coords) >= 4 and len(coords) % 2 == 0:
                 polygon_coords = []
                 for i in range(0, len(coords), 2):
@@ -103,7 +158,7 @@ def parse_coordinates(coord_text: str) -> Optional[dict]:
         
         return None
         
-    except (ValueError, TypeError) as e:
+    except (ValueError, TypeError, AttributeError) as e:
         logger.warning(f"Could not parse coordinates: {coord_text} - {str(e)}")
         return None
 
@@ -119,7 +174,7 @@ def normalize_khasra(khasra_text: str) -> Optional[str]:
     
     try:
         # Clean and standardize khasra format
-        khasra_text = re.sub(r'[^\d/]', '', khasra_text.strip())
+        khasra_text = KHASRA_CLEAN_RE.sub('', khasra_text.translate(DEVANAGARI_DIGITS).strip())
         if '/' not in khasra_text and len(khasra_text) > 3:
             # Insert slash if missing (e.g., "12345" -> "123/45")
             khasra_text = f"{khasra_text[:3]}/{khasra_text[3:]}"
@@ -128,4 +183,62 @@ def normalize_khasra(khasra_text: str) -> Optional[str]:
         
     except Exception as e:
         logger.warning(f"Could not normalize khasra: {khasra_text} - {str(e)}")
-        return khasra_text
\ No newline at end of file
+        return khasra_text
+
+# Batch variants for register backfills: take a column of strings, return an array.
+# Register columns repeat heavily, so each distinct value is parsed once and broadcast back.
+
+def _map_unique(values: Iterable, func, missing: Any = None, dtype=object) -> np.ndarray:
+    """Apply func once per distinct value of a column"""
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=True)
+    parsed = [func(value) for value in uniques]
+    # Trailing slot is picked by the missing-value code (-1)
+    lookup = np.array([missing if v is None else v for v in parsed] + [missing], dtype=dtype)
+    return lookup[codes]
+
+def normalize_date_batch(date_strs: Iterable) -> np.ndarray:
+    """Vectorized normalize_date; returns an object array of ISO dates or None"""
+    return _map_unique(date_strs, normalize_date)
+
+def parse_area_batch(area_texts: Iterable) -> np.ndarray:
+    """Vectorized parse_area; returns a float array in hectares with NaN for unparsed rows"""
+    return _map_unique(area_texts, parse_area, missing=np.nan, dtype=float)
+
+def _join_column(texts: list) -> Optional[str]:
+    """The column as one newline-separated string, or None if a row is not a string or has a newline"""
+    try:
+        column = '\n'.join(texts)
+    except TypeError:
+        return None
+    return column if column.count('\n') == len(texts) - 1 else None
+
+def normalize_khasra_batch(khasra_texts: Iterable) -> np.ndarray:
+    """Vectorized normalize_khasra; returns an object array with None for empty rows
+
+    Khasra numbers are mostly distinct, so instead of parsing each distinct value
+    the column is joined into one string and cleaned as an array of code points.
+    """
+    texts = list(khasra_texts)
+    column = _join_column(texts)
+    if column is None:
+        texts = ['' if text is None or text != text else text for text in texts]
+        column = _join_column(texts)
+    if column is None:
+        return _map_unique(texts, normalize_khasra)
+
+    chars = np.frombuffer(column.encode('utf-32-le'), dtype=np.uint32).copy()
+    devanagari = (chars >= ord('०')) & (chars <= ord('९'))
+    chars[devanagari] -= ord('०') - ord('0')
+    # Same characters as KHASRA_CLEAN_RE keeps (any Unicode digit, '/'), plus the row separator
+    keep = ((chars >= ord('0')) & (chars <= ord('9'))) | (chars == ord('/')) | (chars == ord('\n'))
+    other_digits = [c for c in np.unique(chars[chars > 0x7F]).tolist() if chr(c).isdecimal()]
+    if other_digits:
+        keep |= np.isin(chars, other_digits)
+    cleaned = chars[keep].tobytes().decode('utf-32-le').split('\n')
+
+    normalized = np.empty(len(texts), dtype=object)
+    normalized[:] = [
+        None if not text else khasra if '/' in khasra or len(khasra) <= 3 else f"{khasra[:3]}/{khasra[3:]}"
+        for text, khasra in zip(texts, cleaned)
+    ]
+    return normalized
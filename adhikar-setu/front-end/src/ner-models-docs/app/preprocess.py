@@ -42,11 +42,12 @@ def preprocess_image(image: np.ndarray, target_dpi: int = 300) -> np.ndarray:
         # Use adaptive thresholding instead of global threshold
         binary_image = cv2.adaptiveThreshold(
             np_image, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-            cv2.THRESH_BINARY, 11, 2
+            cv2.THRESH_BINARY, config.THRESHOLD_BLOCK_SIZE, config.THRESHOLD_C
         )
         
         # Denoise using median blur
-        binary_image = cv2.medianBlur(binary_image, 3)
+        if config.MEDIAN_BLUR_KSIZE > 1:
+            binary_image = cv2.medianBlur(binary_image, config.MEDIAN_BLUR_KSIZE)
         
         # Deskew the image
         binary_image = deskew_image(binary_image)
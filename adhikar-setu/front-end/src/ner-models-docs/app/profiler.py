@@ -0,0 +1,94 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+from app.config import config
+from app.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+def profile_path(document_id: str) -> str:
+    """Collapsed-stack profile stored next to the document's exported result"""
+    return os.path.join(config.DATA_PROCESSED, f"{document_id}.profile.collapsed.txt")
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class SamplingProfiler:
+    """Samples the stack of one thread at a fixed interval into collapsed-stack counts
+
+    Output is in the collapsed format (root;...;leaf count) that speedscope
+    and flamegraph.pl read directly.
+    """
+
+    def __init__(self, interval_ms: float = None, thread_id: int = None):
+        self.interval = (interval_ms or config.PROFILE_INTERVAL_MS) / 1000.0
+        self.thread_id = thread_id or threading.get_ident()
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._started = None
+        self._cpu_started = None
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> 'SamplingProfiler':
+        self._started = time.perf_counter()
+        self._cpu_started = time.thread_time()
+        self._thread = threading.Thread(target=self._sample, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.wall_time = time.perf_counter() - self._started
+        # Thread CPU of the profiled thread is only readable from that thread
+        if threading.get_ident() == self.thread_id:
+            self.cpu_time = time.thread_time() - self._cpu_started
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def save(self, path: str) -> str:
+        """Write collapsed stacks, heaviest first"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        logger.info(f"Saved profile with {self.samples} samples to {path}")
+        return path
+
+    def stop_and_save(self, path: str, stage_breakdown: Optional[Dict] = None) -> Dict:
+        """Stop sampling, write the profile and return its audit record"""
+        self.stop()
+        return {
+            'event': 'profile',
+            'format': 'collapsed',
+            'path': self.save(path),
+            'samples': self.samples,
+            'interval_ms': round(self.interval * 1000, 3),
+            'wall_time': round(self.wall_time, 4),
+            'cpu_time': round(self.cpu_time, 4),
+            'stages': stage_breakdown or {}
+        }
@@ -0,0 +1,92 @@
+import asyncio
+import threading
+import time
+from typing import AsyncIterator, Dict, List, Set, Tuple
+from app.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+TERMINAL_EVENTS = ('completed', 'failed')
+
+class ProgressChannel:
+    """Per-job event history that worker threads publish to and async clients stream from"""
+
+    def __init__(self, job_id: str = ""):
+        self.job_id = job_id
+        self.events: List[Dict] = []
+        self._lock = threading.Lock()
+        self._waiters: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+
+    @property
+    def finished(self) -> bool:
+        return bool(self.events) and self.events[-1]['type'] in TERMINAL_EVENTS
+
+    @property
+    def idle(self) -> bool:
+        """Finished with no subscriber left to stream it"""
+        with self._lock:
+            return self.finished and not self._waiters
+
+    def publish(self, event: Dict) -> None:
+        """Record an event and wake subscribers; safe to call from any thread"""
+        event = {'timestamp': time.time(), **event}
+        with self._lock:
+            self.events.append(event)
+            waiters = list(self._waiters)
+        for loop, waiter in waiters:
+            try:
+                loop.call_soon_threadsafe(waiter.set)
+            except RuntimeError:
+                # Subscriber's loop already closed
+                pass
+
+    async def subscribe(self, keepalive: float = 15.0) -> AsyncIterator[Dict]:
+        """Yield past and future events until a terminal event; None marks a keepalive"""
+        waiter = asyncio.Event()
+        entry = (asyncio.get_running_loop(), waiter)
+        with self._lock:
+            self._waiters.add(entry)
+        position = 0
+        try:
+            while True:
+                # Clear before reading so a publish in between is not missed
+                waiter.clear()
+                with self._lock:
+                    pending = self.events[position:]
+                position += len(pending)
+                for event in pending:
+                    yield event
+                    if event['type'] in TERMINAL_EVENTS:
+                        return
+                try:
+                    await asyncio.wait_for(waiter.wait(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            with self._lock:
+                self._waiters.discard(entry)
+            if self.idle:
+                release_channel(self)
+
+# Progress channels by job ID, kept alongside the in-memory job store until the job
+# has finished and its last subscriber has gone; the job store then holds the outcome
+channels: Dict[str, ProgressChannel] = {}
+
+def get_channel(job_id: str) -> ProgressChannel:
+    """Get or create the progress channel of a job"""
+    channel = channels.get(job_id)
+    if channel is None:
+        channel = channels.setdefault(job_id, ProgressChannel(job_id))
+    return channel
+
+def release_channel(channel: ProgressChannel) -> None:
+    """Drop a finished channel, unless it has already been replaced"""
+    if channels.get(channel.job_id) is channel:
+        channels.pop(channel.job_id, None)
+
+def publish(job_id: str, event_type: str, **details) -> None:
+    """Publish a progress event for a job"""
+    channel = get_channel(job_id)
+    channel.publish({'type': event_type, 'job_id': job_id, **details})
+    if channel.idle:
+        release_channel(channel)
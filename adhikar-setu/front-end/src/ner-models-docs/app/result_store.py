@@ -0,0 +1,289 @@
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+from app.config import config
+from app.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Extracted fields stored as their own columns
+FIELD_COLUMNS = [
+    'claimant_name', 'guardian_name', 'village', 'district', 'state',
+    'claim_type', 'area_ha', 'occupation_date', 'issue_date',
+    'khasra_number', 'title_no', 'annexure_type', 'claim_status'
+]
+
+COLUMNS = (
+    ['document_id', 'source_file', 'processing_date']
+    + FIELD_COLUMNS
+    + ['coordinates_geojson', 'area_mismatch', 'gazetteer_version', 'confidences', 'audit']
+)
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS results (
+    document_id TEXT PRIMARY KEY,
+    source_file TEXT,
+    processing_date TEXT,
+    {', '.join(f'{name} {"REAL" if name == "area_ha" else "TEXT"}' for name in FIELD_COLUMNS)},
+    coordinates_geojson TEXT,
+    area_mismatch INTEGER,
+    gazetteer_version TEXT,
+    confidences TEXT,
+    audit TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_results_state_district ON results (state, district);
+"""
+
+_STOP = object()
+
+def document_row(document_data: Dict) -> tuple:
+    """Flatten a processed document into a result row"""
+    fields = document_data.get('extracted_fields', {})
+
+    def value(name):
+        field = fields.get(name)
+        return field.get('value') if isinstance(field, dict) else field
+
+    coordinates = value('coordinates_geojson')
+    village_match = (fields.get('village') or {}).get('gazetteer_match') or {}
+    area_mismatch = (fields.get('area_ha') or {}).get('area_mismatch')
+    row = {
+        'document_id': document_data.get('document_id'),
+        'source_file': document_data.get('source_file', ''),
+        'processing_date': datetime.now().isoformat(),
+        'coordinates_geojson': json.dumps(coordinates) if coordinates else None,
+        'area_mismatch': None if area_mismatch is None else int(area_mismatch),
+        'gazetteer_version': village_match.get('gazetteer_version'),
+        'confidences': json.dumps({
+            name: field.get('confidence') for name, field in fields.items()
+            if isinstance(field, dict) and 'confidence' in field
+        }),
+        # Audit record with the job profile link, kept even when no per-document files are written
+        'audit': json.dumps(document_data['audit']) if document_data.get('audit') else None
+    }
+    for name in FIELD_COLUMNS:
+        field_value = value(name)
+        row[name] = field_value if field_value is None or isinstance(field_value, (str, int, float)) else json.dumps(field_value)
+    # Partition keys fall back to the gazetteer match when not read from the form
+    for name in ('state', 'district'):
+        row[name] = row[name] or village_match.get(name) or None
+    return tuple(row[name] for name in COLUMNS)
+
+class ResultStore:
+    """Append-only SQLite result table fed by a single batching writer thread"""
+
+    def __init__(self, path: str = None, batch_size: int = None, flush_interval: float = None,
+                 retries: int = None, fallback_path: str = None, retry_delay: float = 0.5):
+        self.path = path or config.RESULT_STORE_PATH
+        self.batch_size = batch_size or config.RESULT_STORE_BATCH_SIZE
+        self.flush_interval = flush_interval or config.RESULT_STORE_FLUSH_INTERVAL
+        self.retries = config.RESULT_STORE_WRITE_RETRIES if retries is None else retries
+        self.fallback_path = fallback_path or config.RESULT_STORE_FALLBACK_PATH
+        self.retry_delay = retry_delay
+        self._queue = queue.Queue()
+        self._writer = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(SCHEMA)
+        # Tables created before a column was added get it now
+        existing = {row[1] for row in connection.execute("PRAGMA table_info(results)")}
+        for name in COLUMNS:
+            if name not in existing:
+                connection.execute(f"ALTER TABLE results ADD COLUMN {name} TEXT")
+        connection.commit()
+        return connection
+
+    def _ensure_writer(self) -> None:
+        # Called with _lock held
+        if self._writer is None or not self._writer.is_alive():
+            self._writer = threading.Thread(target=self._run, name="result-store-writer", daemon=True)
+            self._writer.start()
+
+    def append(self, document_data: Dict) -> None:
+        """Queue one processed document for the next batch"""
+        row = document_row(document_data)
+        # Queued under the lock, so a writer that gives up cannot miss the row
+        with self._lock:
+            self._ensure_writer()
+            self._queue.put(row)
+
+    def flush(self) -> None:
+        """Block until everything queued so far is written"""
+        if self._writer is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        """Flush pending rows and stop the writer"""
+        with self._lock:
+            writer = self._writer
+            self._writer = None
+        if writer is not None and writer.is_alive():
+            self._queue.put(_STOP)
+            writer.join()
+        # Left behind by a writer that could not open the database
+        with self._lock:
+            self._drain_to_fallback()
+
+    def _insert(self, connection: sqlite3.Connection, rows: List[tuple], newer_only: bool = False) -> None:
+        placeholders = ', '.join('?' for _ in COLUMNS)
+        if newer_only:
+            # Replayed rows never replace a result written after them
+            updates = ', '.join(f"{name} = excluded.{name}" for name in COLUMNS[1:])
+            sql = (f"INSERT INTO results ({', '.join(COLUMNS)}) VALUES ({placeholders}) "
+                   f"ON CONFLICT(document_id) DO UPDATE SET {updates} "
+                   f"WHERE excluded.processing_date > results.processing_date")
+        else:
+            sql = f"INSERT OR REPLACE INTO results ({', '.join(COLUMNS)}) VALUES ({placeholders})"
+        with connection:
+            connection.executemany(sql, rows)
+
+    def _write(self, connection: sqlite3.Connection, rows: List[tuple], newer_only: bool = False) -> bool:
+        """Insert a batch, retrying with exponential backoff; rows that still fail go to the fallback file"""
+        for attempt in range(self.retries + 1):
+            try:
+                self._insert(connection, rows, newer_only)
+                logger.info(f"Result store flushed {len(rows)} rows")
+                return True
+            except sqlite3.Error as e:
+                if attempt == self.retries:
+                    logger.error(f"Error writing {len(rows)} rows to result store after {attempt + 1} attempts: {str(e)}")
+                    break
+                delay = self.retry_delay * 2 ** attempt
+                logger.warning(f"Result store write failed ({str(e)}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+        self._save_fallback(rows)
+        return False
+
+    def _open(self) -> Optional[sqlite3.Connection]:
+        """Connect, retrying with exponential backoff; None if the database stays unavailable"""
+        for attempt in range(self.retries + 1):
+            try:
+                return self._connect()
+            except (sqlite3.Error, OSError) as e:
+                if attempt == self.retries:
+                    logger.error(f"Could not open result store {self.path} after {attempt + 1} attempts: {str(e)}")
+                    return None
+                delay = self.retry_delay * 2 ** attempt
+                logger.warning(f"Result store open failed ({str(e)}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def _drain_to_fallback(self) -> None:
+        """Move everything queued to the fallback file and mark it done, so flush() returns"""
+        rows, items = [], 0
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            items += 1
+            if item is not _STOP:
+                rows.append(item)
+        try:
+            if rows:
+                self._save_fallback(rows)
+        except OSError as e:
+            logger.error(f"Could not keep {len(rows)} unwritten rows in {self.fallback_path}: {str(e)}")
+        finally:
+            for _ in range(items):
+                self._queue.task_done()
+
+    def _save_fallback(self, rows: List[tuple]) -> None:
+        directory = os.path.dirname(self.fallback_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.fallback_path, 'a', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps(dict(zip(COLUMNS, row)), ensure_ascii=False) + '\n')
+        logger.warning(f"Kept {len(rows)} unwritten rows in {self.fallback_path}; they are written after the next successful flush")
+
+    def _replay_fallback(self, connection: sqlite3.Connection) -> None:
+        """Write rows kept by an earlier failed flush, then drop the file"""
+        if not os.path.exists(self.fallback_path):
+            return
+        replaying = f"{self.fallback_path}.replay"
+        os.replace(self.fallback_path, replaying)
+        with open(replaying, encoding='utf-8') as f:
+            rows = [tuple(record.get(name) for name in COLUMNS) for record in map(json.loads, filter(str.strip, f))]
+        # A failed replay is saved back to the fallback file by _write
+        if rows and self._write(connection, rows, newer_only=True):
+            logger.info(f"Replayed {len(rows)} rows from {self.fallback_path}")
+        os.remove(replaying)
+
+    def _run(self) -> None:
+        connection = self._open()
+        if connection is None:
+            # Hand the queue back; the next append starts a new writer that tries again
+            with self._lock:
+                if self._writer is threading.current_thread():
+                    self._writer = None
+                self._drain_to_fallback()
+            return
+        self._replay_fallback(connection)
+        pending = []
+        deadline = None
+        stopping = False
+        try:
+            while not stopping:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+
+                if item is _STOP:
+                    stopping = True
+                    self._queue.task_done()
+                elif item is not None:
+                    pending.append(item)
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_interval
+
+                if pending and (stopping or item is None or len(pending) >= self.batch_size):
+                    if self._write(connection, pending):
+                        # The database is writable again; pick up rows kept by an earlier failure
+                        self._replay_fallback(connection)
+                    for _ in pending:
+                        self._queue.task_done()
+                    pending = []
+                    deadline = None
+        finally:
+            connection.close()
+
+    def query(self, state: str = None, district: str = None, limit: int = 1000) -> List[Dict]:
+        """Read stored results, optionally filtered by state/district"""
+        if not os.path.exists(self.path):
+            return []
+        clauses, params = [], []
+        if state:
+            clauses.append("state = ?")
+            params.append(state)
+        if district:
+            clauses.append("district = ?")
+            params.append(district)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.row_factory = sqlite3.Row
+        try:
+            rows = connection.execute(
+                f"SELECT * FROM results {where} ORDER BY processing_date LIMIT ?", params + [limit]
+            ).fetchall()
+            return [dict(row) for row in rows]
+        finally:
+            connection.close()
+
+# Global result store instance
+result_store = ResultStore()
+atexit.register(result_store.close)
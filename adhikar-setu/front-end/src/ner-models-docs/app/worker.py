@@ -1,12 +1,13 @@
 import os
+from contextlib import nullcontext
 from pdf2image import convert_from_path
 import cv2
 import numpy as np
-from typing import Dict
+from typing import Callable, Dict, List, Optional
 from app.config import config
 from app.logger import setup_logger
 from app.preprocess import preprocess_image
-from app.ocr_provider import perform_ocr
+from app.ocr_provider import perform_ocr, perform_region_ocr
 from app.layout import detect_layout, detect_tables
 from app.ner.predict_ner import extract_entities
 from app.postprocess import (
@@ -14,39 +15,115 @@ from app.postprocess import (
     normalize_khasra, combine_confidences
 )
 from app.gazetteer import match_village
-from app.exporter import export_all_formats
+from app.geometry import check_claim_geometry
+from app.exporter import export_all_formats, audit_record
+from app.ocr_store import split_ocr_blocks, load_ocr_blocks
+from app.metrics import StageTimer, DOCUMENT_DURATION, PAGES_PROCESSED, PAGES_PER_SECOND
+from app.profiler import SamplingProfiler, profile_path
+from app.planner import PipelinePlan, plan_pipeline, document_shape, cost_model
 
 logger = setup_logger(__name__)
 
-def process_document(document_id: str) -> Dict:
-    """Main pipeline to process a document"""
+# Resolution of the page previews used to order pages for early exit
+PREVIEW_DPI = 36
+# NER label behind each extracted field whose name is not just the upper-cased label
+FIELD_LABELS = {'coordinates_geojson': 'COORDINATES', 'khasra_number': 'KHASRA'}
+
+def emit_progress(progress_callback: Optional[Callable[[Dict], None]], stage: str, **details) -> None:
+    """Report pipeline progress without letting a listener break processing"""
+    if progress_callback is None:
+        return
+    try:
+        progress_callback({'stage': stage, **details})
+    except Exception as e:
+        logger.warning(f"Progress callback failed: {str(e)}")
+
+def process_document(
+    document_id: str,
+    progress_callback: Optional[Callable[[Dict], None]] = None,
+    profile: bool = False,
+    budget: Optional[float] = None,
+    plan: Optional[PipelinePlan] = None,
+    early_exit: Optional[bool] = None,
+    resume: Optional[Dict] = None
+) -> Dict:
+    """Main pipeline to process a document
+
+    With a latency budget (seconds) the pipeline is planned to fit it and
+    the degradations applied are recorded in processing_summary['plan'].
+
+    With early exit (default config.EARLY_EXIT) pages are processed in
+    priority order and processing stops once every required field clears
+    NER_CONFIDENCE_THRESHOLD; the pages left over are listed in
+    processing_summary['early_exit'] and the plan gets an 'early_exit'
+    degradation. Passing that result back as resume processes only the
+    left-over pages and merges them with the pages already done.
+    """
+    # Sampling profiler only when asked for; nothing runs otherwise
+    profiler = SamplingProfiler().start() if (profile or config.PROFILE_JOBS) else None
     try:
         logger.info(f"Starting processing for document: {document_id}")
+        emit_progress(progress_callback, 'rasterize')
+        timer = StageTimer()
         
         # Find the document file
         document_path = find_document_file(document_id)
         if not document_path:
             raise FileNotFoundError(f"Document {document_id} not found")
         
+        # Fit the pipeline to the latency budget, if any; the document shape needs a
+        # pdfinfo call, so it is only read when there is a budget to plan for
+        shape = None
+        if plan is None and budget is not None:
+            shape = document_shape(document_path)
+            plan = plan_pipeline(budget, shape['pages'], shape['megapixels'])
+        plan = plan or PipelinePlan()
+        
+        early_exit = config.EARLY_EXIT if early_exit is None else early_exit
+        is_pdf = document_path.lower().endswith('.pdf')
+        # Pages to go through now: a resumed job only processes what was left over
+        done_pages = reusable_pages(resume) if resume else {}
+        
         # Convert PDF to images or load image
-        if document_path.lower().endswith('.pdf'):
-            images = convert_from_path(document_path, dpi=config.DPI)
-            logger.info(f"Converted PDF to {len(images)} pages")
-        else:
-            # Load single image
-            image = cv2.imread(document_path)
-            images = [image] if image is not None else []
-            logger.info("Loaded image document")
+        images, previews = [], None
+        with timer.stage('rasterize'):
+            if is_pdf and (early_exit or resume):
+                # Low-resolution previews rank the pages; full pages are rasterized only when reached
+                previews = convert_from_path(document_path, dpi=PREVIEW_DPI)
+                logger.info(f"Rendered {len(previews)} page previews")
+            elif is_pdf:
+                images = convert_from_path(document_path, dpi=plan.dpi)
+                logger.info(f"Converted PDF to {len(images)} pages")
+            else:
+                # Load single image; lower DPI plans downscale it as if scanned coarser
+                image = cv2.imread(document_path)
+                if image is not None and plan.scale < 1:
+                    image = cv2.resize(image, None, fx=plan.scale, fy=plan.scale, interpolation=cv2.INTER_AREA)
+                images = [image] if image is not None else []
+                logger.info("Loaded image document")
         
-        if not images:
+        total_pages = len(previews) if previews is not None else len(images)
+        if not total_pages:
             raise ValueError("No pages/images found in document")
         
+        def load_page(index: int):
+            if previews is None:
+                return images[index]
+            with timer.stage('rasterize', page=index + 1):
+                return convert_from_path(document_path, dpi=plan.dpi, first_page=index + 1, last_page=index + 1)[0]
+        
+        order = page_priority(previews) if previews is not None and early_exit else list(range(total_pages))
+        order = [index for index in order if index + 1 not in done_pages]
+        
         # Process each page
-        pages_data = []
-        all_entities = []  # Collect entities from all pages
+        pages_data = list(done_pages.values())
+        all_entities = [entity for page in pages_data for entity in page['entities']]  # Collect entities from all pages
+        satisfied_after = None
         
-        for page_num, image in enumerate(images):
+        for position, page_num in enumerate(order):
             logger.info(f"Processing page {page_num + 1}")
+            emit_progress(progress_callback, 'preprocess', page=page_num + 1, total_pages=total_pages)
+            image = load_page(page_num)
             
             # Convert to numpy array if needed (PIL Image to numpy)
             if hasattr(image, 'size'):  # PIL Image
@@ -58,13 +135,22 @@ def process_document(document_id: str) -> Dict:
                 image_np = image
             
             # Preprocess image
-            processed_image = preprocess_image(image_np)
+            with timer.stage('preprocess', page=page_num + 1):
+                processed_image = preprocess_image(image_np)
             
             # Perform OCR - CRITICAL: Pass numpy array, not PIL image
-            ocr_result = perform_ocr(processed_image)
+            emit_progress(progress_callback, 'ocr', page=page_num + 1, total_pages=total_pages)
+            with timer.stage('ocr', page=page_num + 1):
+                if plan.region_ocr:
+                    ocr_result = perform_region_ocr(processed_image, plan.psm_modes, plan.fallbacks)
+                else:
+                    ocr_result = perform_ocr(processed_image, plan.psm_modes, plan.fallbacks)
+            PAGES_PROCESSED.inc()
             
             # Extract entities using NER
-            entities = extract_entities(ocr_result['text'], ocr_result['blocks'])
+            emit_progress(progress_callback, 'ner', page=page_num + 1, total_pages=total_pages)
+            with timer.stage('ner', page=page_num + 1):
+                entities = extract_entities(ocr_result['text'], ocr_result['blocks'], rules_only=plan.rules_only_ner)
             
             # Store entities with page context
             for entity in entities:
@@ -81,17 +167,30 @@ def process_document(document_id: str) -> Dict:
                 'entities': entities
             }
             pages_data.append(page_data)
+            emit_progress(progress_callback, 'page_done', page=page_num + 1, total_pages=total_pages)
+            
+            # Stop once every required field is confident; the rest of the bundle is left over
+            if early_exit and position < len(order) - 1 and not missing_required_fields(all_entities):
+                satisfied_after = [index + 1 for index in order[:position + 1]]
+                break
+        
+        pages_data.sort(key=lambda page: page['page_number'])
+        done = {page['page_number'] for page in pages_data}
+        remaining = [number for number in range(1, total_pages + 1) if number not in done]
+        # The plan may belong to the caller; the early exit is recorded on its summary only
+        plan_summary = plan.to_dict()
+        if remaining:
+            plan_summary['degradations'] = plan_summary['degradations'] + ['early_exit']
+            logger.info(f"Required fields satisfied after pages {satisfied_after}; "
+                        f"{config.EARLY_EXIT_REMAINDER} pages {remaining}")
         
         # Group entities by type across all pages
-        extracted_entities = {}
-        for entity in all_entities:
-            entity_type = entity['label']
-            if entity_type not in extracted_entities:
-                extracted_entities[entity_type] = []
-            extracted_entities[entity_type].append(entity)
+        extracted_entities = group_entities(all_entities)
         
         # Post-process and normalize extracted data
-        processed_data = process_extracted_entities(extracted_entities)
+        emit_progress(progress_callback, 'postprocess')
+        with timer.stage('postprocess'):
+            processed_data = process_extracted_entities(extracted_entities, timer=timer)
         
         # Build final document structure
         document_data = {
@@ -102,14 +201,48 @@ def process_document(document_id: str) -> Dict:
             'processing_summary': {
                 'total_pages': len(pages_data),
                 'entities_found': len(all_entities),
-                'processing_time': 'TODO'
+                'processing_time': round(timer.elapsed, 3),
+                'plan': plan_summary,
+                'early_exit': {
+                    'document_pages': total_pages,
+                    'required_fields': list(config.EARLY_EXIT_REQUIRED_FIELDS),
+                    'satisfied_after_pages': satisfied_after,
+                    'remainder': config.EARLY_EXIT_REMAINDER,
+                    'deferred_pages': remaining,
+                } if early_exit else None,
+                **timer.summary()
             }
         }
         
+        # Profile covers everything up to export so it can be linked from the audit record
+        if profiler:
+            document_data['profile'] = profiler.stop_and_save(profile_path(document_id), timer.breakdown())
+        # Built here, not at file export, so the result store keeps it too
+        document_data['audit'] = audit_record(document_data.get('profile'))
+        
+        # Per-word OCR blocks go to a compressed sidecar, loaded on demand
+        split_ocr_blocks(document_data)
+        
         # Export to all formats
-        export_results = export_all_formats(document_data)
+        emit_progress(progress_callback, 'export')
+        with timer.stage('export'):
+            export_results = export_all_formats(document_data)
         document_data['export_paths'] = export_results
         
+        # Exported files carry the pre-export summary; the returned result is complete
+        total_time = timer.elapsed
+        document_data['processing_summary'].update(processing_time=round(total_time, 3), **timer.summary())
+        DOCUMENT_DURATION.observe(total_time)
+        if shape is not None:
+            megapixels = shape['megapixels']
+        else:
+            # Full-quality megapixels per page, measured on the pages themselves
+            sizes = [page['width'] * page['height'] for page in pages_data]
+            megapixels = sum(sizes) / len(sizes) / 1e6 / plan.scale ** 2
+        cost_model.observe_document(plan, timer.summary(), megapixels)
+        if total_time > 0:
+            PAGES_PER_SECOND.set(len(pages_data) / total_time)
+        
         logger.info(f"Completed processing for document: {document_id}")
         logger.info(f"Extracted fields: {list(processed_data.keys())}")
         
@@ -120,6 +253,9 @@ def process_document(document_id: str) -> Dict:
         import traceback
         logger.error(traceback.format_exc())
         raise
+    finally:
+        if profiler and profiler.running:
+            profiler.stop()
 
 def find_document_file(document_id: str) -> str:
     """Find the document file by ID"""
@@ -135,7 +271,55 @@ def find_document_file(document_id: str) -> str:
     
     return None
 
-def process_extracted_entities(entities: Dict) -> Dict:
+def page_priority(previews: List) -> List[int]:
+    """Page indices in processing order: the title form first, then pages by how text-like they look
+
+    Text pages binarize into many glyph-sized components, photos into a few
+    large blobs, so the share of ink in small components ranks evidence
+    photos and blank pages last.
+    """
+    scores = {}
+    for index, preview in enumerate(previews[1:], start=1):
+        gray = cv2.cvtColor(np.array(preview.convert('RGB')), cv2.COLOR_RGB2GRAY)
+        _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        count, _, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+        areas = stats[1:count, cv2.CC_STAT_AREA]
+        glyph_limit = max(4, gray.size // 500)
+        scores[index] = float(areas[areas <= glyph_limit].sum()) / gray.size
+    return [0] + sorted(scores, key=lambda index: (-scores[index], index)) if previews else []
+
+def missing_required_fields(entities: List[Dict]) -> List[str]:
+    """Required fields without an entity at or above NER_CONFIDENCE_THRESHOLD
+
+    Looks at raw entity labels and confidences only; normalization, gazetteer
+    matching and geometry run once after the page loop.
+    """
+    best = {}
+    for entity in entities:
+        if (entity.get('text') or '').strip():
+            best[entity['label']] = max(best.get(entity['label'], 0), entity.get('confidence', 0.8))
+    return [name for name in config.EARLY_EXIT_REQUIRED_FIELDS
+            if best.get(FIELD_LABELS.get(name, name.upper()), 0) < config.NER_CONFIDENCE_THRESHOLD]
+
+def reusable_pages(result: Dict) -> Dict[int, Dict]:
+    """Processed pages of an earlier result by page number, with their OCR blocks reloaded"""
+    sidecar = result.get('ocr_sidecar')
+    blocks = load_ocr_blocks(sidecar) if sidecar and os.path.exists(sidecar) else {}
+    pages = {}
+    for page in result.get('pages', []):
+        page = {key: value for key, value in page.items() if key != 'ocr_blocks_ref'}
+        page.setdefault('ocr_blocks', blocks.get(page['page_number'], []))
+        pages[page['page_number']] = page
+    return pages
+
+def group_entities(entities: List[Dict]) -> Dict[str, List[Dict]]:
+    """Group entities by label"""
+    grouped = {}
+    for entity in entities:
+        grouped.setdefault(entity['label'], []).append(entity)
+    return grouped
+
+def process_extracted_entities(entities: Dict, timer: StageTimer = None) -> Dict:
     """Process and normalize extracted entities"""
     processed = {}
     
@@ -172,7 +356,8 @@ def process_extracted_entities(entities: Dict) -> Dict:
         
         elif entity_type == 'VILLAGE':
             # Match with gazetteer
-            match_result = match_village(text)
+            with timer.stage('gazetteer') if timer else nullcontext():
+                match_result = match_village(text)
             processed['village'] = {
                 'value': match_result['village'] if match_result else text,
                 'confidence': combine_confidences(confidence, match_result['score']/100 if match_result else 0.5),
@@ -253,4 +438,14 @@ def process_extracted_entities(entities: Dict) -> Dict:
         
         # Add more entity type processing as needed
     
+    # Validate the claim polygon and compare it with the stated area
+    geometry_check = check_claim_geometry(processed)
+    if geometry_check:
+        geometry = geometry_check.pop('geometry')
+        if geometry:
+            processed['coordinates_geojson']['value'] = geometry
+        processed['coordinates_geojson']['geometry_check'] = geometry_check
+        if 'area_ha' in processed:
+            processed['area_ha']['area_mismatch'] = geometry_check['area_mismatch']
+    
     return processed
\ No newline at end of file
@@ -0,0 +1,88 @@
+"""
+Benchmark scalar vs batch normalization on a synthetic register column.
+
+Usage: python -m benchmarks.bench_postprocess --rows 1000000
+"""
+import argparse
+import json
+import random
+import time
+from typing import Callable, Dict, List
+
+from app.postprocess import (
+    normalize_date, parse_area, normalize_khasra,
+    normalize_date_batch, parse_area_batch, normalize_khasra_batch
+)
+
+DEVANAGARI = str.maketrans('0123456789', '०१२३४५६७८९')
+
+def synthetic_dates(rows: int, rng: random.Random) -> List[str]:
+    """Date column mixing the formats seen in FRA registers"""
+    values = []
+    for _ in range(rows):
+        day, month, year = rng.randint(1, 28), rng.randint(1, 12), rng.randint(1960, 2025)
+        kind = rng.random()
+        if kind < 0.4:
+            values.append(f"{day:02d}-{month:02d}-{year}")
+        elif kind < 0.65:
+            values.append(f"{day:02d}/{month:02d}/{year % 100:02d}")
+        elif kind < 0.85:
+            values.append(f"{year}-{month:02d}-{day:02d}")
+        elif kind < 0.95:
+            values.append(f"{day:02d}-{month:02d}-{year}".translate(DEVANAGARI))
+        elif kind < 0.99:
+            values.append(f"{day} {month} {year}")
+        else:
+            values.append("")
+    return values
+
+def synthetic_areas(rows: int, rng: random.Random) -> List[str]:
+    units = ["ha", "hectares", "acres", "bigha", ""]
+    return [f"{rng.uniform(0.1, 4):.2f} {rng.choice(units)}" for _ in range(rows)]
+
+def synthetic_khasras(rows: int, rng: random.Random) -> List[str]:
+    return [
+        f"{rng.randint(1, 999)}/{rng.randint(1, 99)}" if rng.random() < 0.7 else str(rng.randint(1000, 99999))
+        for _ in range(rows)
+    ]
+
+def time_call(func: Callable, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+def run(rows: int, scalar_rows: int, seed: int = 42) -> Dict:
+    """Time scalar (on a sample) and batch (on the full column) normalization"""
+    rng = random.Random(seed)
+    columns = {
+        'date': (synthetic_dates(rows, rng), normalize_date, normalize_date_batch),
+        'area': (synthetic_areas(rows, rng), parse_area, parse_area_batch),
+        'khasra': (synthetic_khasras(rows, rng), normalize_khasra, normalize_khasra_batch),
+    }
+
+    report = {'rows': rows, 'scalar_rows': scalar_rows, 'results': {}}
+    for name, (values, scalar, batch) in columns.items():
+        sample = values[:scalar_rows]
+        scalar_seconds = time_call(lambda v: [scalar(x) for x in v], sample)
+        batch_seconds = time_call(batch, values)
+        scalar_rate = len(sample) / scalar_seconds if scalar_seconds else 0.0
+        batch_rate = len(values) / batch_seconds if batch_seconds else 0.0
+        report['results'][name] = {
+            'scalar_rows_per_sec': round(scalar_rate),
+            'batch_rows_per_sec': round(batch_rate),
+            'batch_seconds': round(batch_seconds, 3),
+            'speedup': round(batch_rate / scalar_rate, 2) if scalar_rate else None,
+        }
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark postprocess normalization")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Rows in the synthetic column")
+    parser.add_argument("--scalar-rows", type=int, default=100_000, help="Rows timed through the scalar functions")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.rows, min(args.scalar_rows, args.rows), args.seed), indent=2))
+
+if __name__ == "__main__":
+    main()
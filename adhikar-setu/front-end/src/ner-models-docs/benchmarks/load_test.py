@@ -0,0 +1,306 @@
+"""
+HTTP load test for the parse API with synthetic documents.
+
+Uploads synthetic forms to /api/v1/parse at Poisson arrival times (or as
+fast as the concurrency limit allows), follows each job to completion via
+its SSE stream or by polling the status endpoint, and reports throughput,
+end-to-end latency percentiles, error rate and event-loop lag.
+
+Latency is measured from each request's scheduled arrival, so time spent
+waiting for a free concurrency slot counts against the server.
+
+Without --url the app is started in-process under uvicorn on a free port,
+sharing this process (and its GIL) with the load generator; point --url at
+a separately started uvicorn for numbers closer to production.
+
+Usage:
+    python -m benchmarks.load_test --requests 50 --concurrency 8 --rate 2
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --mode poll --requests 100
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import shutil
+import socket
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+
+from benchmarks.synthetic import generate_corpus
+
+API_PREFIX = "/api/v1"
+LAG_METRIC = "fra_event_loop_lag_seconds"
+METRIC_LINE_RE = re.compile(r'^([a-zA-Z_:][\w:]*)(\{[^}]*\})?\s+(\S+)$')
+
+def percentiles(values: List[float]) -> Dict:
+    """p50/p95/p99/max in milliseconds"""
+    if not values:
+        return {'count': 0}
+    ms = np.array(values) * 1000.0
+    return {
+        'count': len(values),
+        'mean_ms': round(float(ms.mean()), 2),
+        'p50_ms': round(float(np.percentile(ms, 50)), 2),
+        'p95_ms': round(float(np.percentile(ms, 95)), 2),
+        'p99_ms': round(float(np.percentile(ms, 99)), 2),
+        'max_ms': round(float(ms.max()), 2),
+    }
+
+def parse_metrics(text: str) -> Dict[str, float]:
+    """Prometheus text format into {'name{labels}': value}"""
+    samples = {}
+    for line in text.splitlines():
+        match = METRIC_LINE_RE.match(line.strip())
+        if match:
+            name, labels, value = match.groups()
+            try:
+                samples[name + (labels or '')] = float(value)
+            except ValueError:
+                continue
+    return samples
+
+def histogram_delta(before: Dict[str, float], after: Dict[str, float], name: str) -> Dict:
+    """Mean and bucket-bound p99/max of a histogram over the run"""
+    count = after.get(f"{name}_count", 0.0) - before.get(f"{name}_count", 0.0)
+    total = after.get(f"{name}_sum", 0.0) - before.get(f"{name}_sum", 0.0)
+    if count <= 0:
+        return {'samples': 0}
+
+    buckets = []
+    prefix = f'{name}_bucket{{le="'
+    for key, value in after.items():
+        if key.startswith(prefix):
+            bound = key[len(prefix):-2]
+            upper = float('inf') if bound == '+Inf' else float(bound)
+            buckets.append((upper, value - before.get(key, 0.0)))
+    buckets.sort()
+
+    def bound_for(fraction: float) -> Optional[float]:
+        for upper, cumulative in buckets:
+            if cumulative >= fraction * count:
+                return None if upper == float('inf') else round(upper * 1000.0, 2)
+        return None
+
+    return {
+        'samples': int(count),
+        'mean_ms': round(total / count * 1000.0, 3),
+        # Upper bucket bounds, so these are ceilings rather than exact values
+        'p99_le_ms': bound_for(0.99),
+        'max_le_ms': bound_for(1.0),
+    }
+
+async def client_lag_probe(samples: List[float], stop: asyncio.Event, interval: float = 0.1) -> None:
+    """Lag of the load generator's own loop; high values mean the client is the bottleneck"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - start - interval))
+
+class InProcessServer:
+    """The API under uvicorn in a background thread"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = None):
+        import uvicorn
+        from app.main import app
+
+        if port is None:
+            with socket.socket() as sock:
+                sock.bind((host, 0))
+                port = sock.getsockname()[1]
+        self.url = f"http://{host}:{port}"
+        self.server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+        self.thread = threading.Thread(target=self.server.run, name="load-test-server", daemon=True)
+
+    def __enter__(self) -> 'InProcessServer':
+        self.thread.start()
+        deadline = time.monotonic() + 30
+        while not self.server.started:
+            if time.monotonic() > deadline or not self.thread.is_alive():
+                raise RuntimeError("In-process server did not start")
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.should_exit = True
+        self.thread.join(timeout=30)
+
+async def wait_sse(client: httpx.AsyncClient, job_id: str) -> str:
+    """Follow the job's event stream until completed/failed"""
+    event_type = None
+    async with client.stream("GET", f"{API_PREFIX}/parse/{job_id}/events") as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if line.startswith("event:"):
+                event_type = line[len("event:"):].strip()
+                if event_type in ("completed", "failed"):
+                    return event_type
+    raise RuntimeError("Event stream ended without a terminal event")
+
+async def wait_poll(client: httpx.AsyncClient, job_id: str, interval: float) -> str:
+    """Poll the status endpoint (conditional GET on a small projection) until the job finishes"""
+    etag = None
+    while True:
+        headers = {"If-None-Match": etag} if etag else {}
+        response = await client.get(f"{API_PREFIX}/parse/{job_id}", params={"fields": "processing_summary"},
+                                    headers=headers)
+        if response.status_code != 304:
+            response.raise_for_status()
+            etag = response.headers.get("ETag")
+            status = response.json()["status"]
+            if status in ("completed", "failed"):
+                return status
+        await asyncio.sleep(interval)
+
+async def run_request(client: httpx.AsyncClient, slots: asyncio.Semaphore, document: Dict,
+                      scheduled: float, args: argparse.Namespace, results: List[Dict]) -> None:
+    record = {'document': document['name'], 'scheduled': scheduled}
+    async with slots:
+        started = time.perf_counter()
+        record['queued_s'] = started - scheduled
+        try:
+            response = await client.post(
+                f"{API_PREFIX}/parse",
+                files={"file": (document['name'], document['content'], document['content_type'])}
+            )
+            record['upload_s'] = time.perf_counter() - scheduled
+            response.raise_for_status()
+            job_id = response.json()["job_id"]
+            if args.mode == "sse":
+                status = await asyncio.wait_for(wait_sse(client, job_id), args.timeout)
+            else:
+                status = await asyncio.wait_for(wait_poll(client, job_id, args.poll_interval), args.timeout)
+            record['status'] = status
+        except asyncio.TimeoutError:
+            record['status'] = 'timeout'
+        except Exception as e:
+            record['status'] = 'error'
+            record['error'] = f"{type(e).__name__}: {e}"
+        record['end_to_end_s'] = time.perf_counter() - scheduled
+    results.append(record)
+
+def load_documents(corpus_dir: str, manifest: List[Dict]) -> List[Dict]:
+    documents = []
+    for entry in manifest:
+        with open(os.path.join(corpus_dir, entry['file']), 'rb') as f:
+            content = f.read()
+        documents.append({
+            'name': entry['file'],
+            'content': content,
+            'content_type': 'application/pdf' if entry['format'] == 'pdf' else 'image/jpeg',
+        })
+    return documents
+
+async def drive(base_url: str, documents: List[Dict], args: argparse.Namespace) -> Dict:
+    """Issue args.requests jobs and collect per-request records and metric snapshots"""
+    rng = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=args.concurrency * 2 + 4, max_keepalive_connections=args.concurrency * 2)
+    timeout = httpx.Timeout(args.timeout, connect=10.0)
+    results: List[Dict] = []
+    client_lag: List[float] = []
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        before = parse_metrics((await client.get("/metrics")).text)
+        stop = asyncio.Event()
+        probe = asyncio.create_task(client_lag_probe(client_lag, stop))
+        slots = asyncio.Semaphore(args.concurrency)
+
+        started = time.perf_counter()
+        next_arrival = started
+        tasks = []
+        for index in range(args.requests):
+            if args.rate > 0:
+                # Poisson process: exponential gaps between arrivals
+                next_arrival += rng.expovariate(args.rate)
+                await asyncio.sleep(max(0.0, next_arrival - time.perf_counter()))
+            scheduled = time.perf_counter()
+            document = documents[index % len(documents)]
+            tasks.append(asyncio.create_task(run_request(client, slots, document, scheduled, args, results)))
+        await asyncio.gather(*tasks)
+        duration = time.perf_counter() - started
+
+        stop.set()
+        await probe
+        after = parse_metrics((await client.get("/metrics")).text)
+
+    return {'results': results, 'duration': duration, 'client_lag': client_lag,
+            'metrics_before': before, 'metrics_after': after}
+
+def build_report(run: Dict, args: argparse.Namespace, base_url: str, in_process: bool) -> Dict:
+    results = run['results']
+    completed = [r for r in results if r.get('status') == 'completed']
+    errors = [r for r in results if r.get('status') != 'completed']
+    statuses: Dict[str, int] = {}
+    for r in results:
+        statuses[r.get('status', 'unknown')] = statuses.get(r.get('status', 'unknown'), 0) + 1
+
+    duration = run['duration']
+    return {
+        'target': base_url,
+        'in_process': in_process,
+        'settings': {
+            'requests': args.requests, 'concurrency': args.concurrency, 'rate': args.rate,
+            'mode': args.mode, 'documents': args.documents, 'seed': args.seed,
+        },
+        'duration_s': round(duration, 3),
+        'throughput_per_s': round(len(completed) / duration, 3) if duration else None,
+        'error_rate': round(len(errors) / len(results), 4) if results else None,
+        'statuses': statuses,
+        'latency': {
+            'end_to_end': percentiles([r['end_to_end_s'] for r in completed]),
+            'upload': percentiles([r['upload_s'] for r in results if 'upload_s' in r]),
+            'queued_for_slot': percentiles([r['queued_s'] for r in results]),
+        },
+        'event_loop_lag': {
+            'server': histogram_delta(run['metrics_before'], run['metrics_after'], LAG_METRIC),
+            'client': percentiles(run['client_lag']),
+        },
+        'errors': [{'document': r['document'], 'status': r['status'], 'error': r.get('error')} for r in errors][:20],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the parse API with synthetic documents")
+    parser.add_argument("--url", help="Base URL of a running API (default: start it in-process)")
+    parser.add_argument("--requests", type=int, default=50, help="Jobs to submit")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum jobs in flight")
+    parser.add_argument("--rate", type=float, default=0.0, help="Mean arrivals per second (0: closed loop)")
+    parser.add_argument("--mode", choices=["sse", "poll"], default="sse", help="How to wait for completion")
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    parser.add_argument("--timeout", type=float, default=600.0, help="Per-job timeout in seconds")
+    parser.add_argument("--documents", type=int, default=8, help="Distinct synthetic documents to cycle through")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout)")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="fra-load-")
+    try:
+        corpus_dir = os.path.join(work_dir, 'corpus')
+        documents = load_documents(corpus_dir, generate_corpus(corpus_dir, args.documents, args.seed))
+
+        if args.url:
+            run = asyncio.run(drive(args.url.rstrip('/'), documents, args))
+            report = build_report(run, args, args.url, in_process=False)
+        else:
+            from benchmarks.run_benchmarks import configure
+            # Uploads land in a scratch DATA_RAW; the gazetteer covers the synthetic villages
+            configure(work_dir, corpus_dir)
+            with InProcessServer() as server:
+                run = asyncio.run(drive(server.url, documents, args))
+            report = build_report(run, args, server.url, in_process=True)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+Sweep OCR/preprocessing settings for accuracy against CPU cost.
+
+Annotated documents from data/annotations (optionally topped up with
+synthetic forms) are rendered as degraded scans at each DPI, preprocessed
+with each threshold/denoise setting and OCR'd with each PSM set. Extracted
+fields go through process_extracted_entities and are compared with the
+fields the same function derives from the annotated spans. CPU time per
+page includes tesseract subprocesses.
+
+The report lists every configuration, the Pareto frontier (no other
+configuration is both cheaper and more accurate) and a recommended profile:
+the cheapest frontier point within --tolerance of the best accuracy,
+printed as .env settings.
+
+Usage:
+    python -m benchmarks.ocr_pareto --synthetic 10 --output pareto.json
+    python -m benchmarks.ocr_pareto --dpi 200,300 --psm "6|6,11" --block-size 11,31 --c 2,8 --median 1,3
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import tempfile
+import time
+from itertools import product
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from app.config import config
+from benchmarks.synthetic import (
+    annotation_lines, degrade, form_annotation, generate_record, layout_entities, render_page, write_gazetteer
+)
+
+try:
+    import resource
+except ImportError:  # Windows: no child CPU accounting
+    resource = None
+
+# Knob name -> config attribute
+KNOBS = {
+    'dpi': 'DPI',
+    'psm_modes': 'OCR_PSM_MODES',
+    'block_size': 'THRESHOLD_BLOCK_SIZE',
+    'c': 'THRESHOLD_C',
+    'median': 'MEDIAN_BLUR_KSIZE',
+}
+
+def cpu_seconds() -> float:
+    """CPU time of this process plus its finished children (tesseract)"""
+    total = time.process_time()
+    if resource is not None:
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        total += children.ru_utime + children.ru_stime
+    return total
+
+def align_entities(text: str, entities: List[List]) -> Tuple[List[List], int]:
+    """Replace annotated spans that disagree with the form layout; returns spans and how many moved"""
+    layout = {label: [start, end, label] for start, end, label in layout_entities(text)}
+    aligned, moved = [], 0
+    for start, end, label in entities:
+        if label in layout and layout[label][:2] != [start, end]:
+            aligned.append(layout[label])
+            moved += 1
+        else:
+            aligned.append([start, end, label])
+    return aligned, moved
+
+def load_annotations(directory: str) -> List[Dict]:
+    """Every {text, entities} document in the annotation JSON files"""
+    documents = []
+    for path in sorted(glob.glob(os.path.join(directory, '*.json'))):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        for item in data if isinstance(data, list) else [data]:
+            if isinstance(item, dict) and item.get('text') and item.get('entities'):
+                # Some hand-made annotations have offsets shifted off their values
+                entities, realigned = align_entities(item['text'], item['entities'])
+                documents.append({'source': os.path.basename(path), 'text': item['text'],
+                                  'entities': entities, 'realigned_spans': realigned})
+    return documents
+
+def synthetic_annotations(count: int, seed: int) -> List[Dict]:
+    rng = random.Random(seed)
+    return [{'source': f'synthetic_{seed}_{i:04d}', **form_annotation(generate_record(rng, i))}
+            for i in range(count)]
+
+def truth_fields(document: Dict) -> Dict:
+    """Fields derived from the annotated spans by the production post-processing"""
+    from app.worker import group_entities, process_extracted_entities
+
+    text = document['text']
+    entities = [
+        {'text': text[start:end], 'label': label, 'confidence': 1.0, 'page': 1}
+        for start, end, label in document['entities']
+    ]
+    return process_extracted_entities(group_entities(entities))
+
+def field_matches(predicted: Dict, truth: Dict) -> bool:
+    """Compare normalized values; polygons by area"""
+    if isinstance(truth.get('value'), dict):
+        expected = (truth.get('geometry_check') or {}).get('polygon_area_ha')
+        actual = (predicted.get('geometry_check') or {}).get('polygon_area_ha')
+        return expected is not None and actual is not None and abs(actual - expected) <= 0.01 * expected
+    expected, actual = truth.get('value'), predicted.get('value')
+    if isinstance(expected, float) and isinstance(actual, (int, float)):
+        return abs(actual - expected) < 1e-6
+    return expected is not None and str(actual).strip().lower() == str(expected).strip().lower()
+
+def render(document: Dict, dpi: int, seed: int, noise: float, skew: float) -> np.ndarray:
+    page = render_page(annotation_lines(document['text']), dpi)
+    return np.array(degrade(page, np.random.default_rng(seed), noise, skew))
+
+def apply_settings(settings: Dict) -> None:
+    for knob, value in settings.items():
+        setattr(config, KNOBS[knob], value)
+
+def evaluate(documents: List[Dict], truths: List[Dict], grid: Dict, seed: int,
+             noise: float, skew: float) -> List[Dict]:
+    """Accuracy and CPU per page for every configuration in the grid"""
+    from app.preprocess import preprocess_image
+    from app.ocr_provider import perform_ocr
+    from app.ner.predict_ner import extract_entities
+    from app.worker import group_entities, process_extracted_entities
+
+    results = []
+    for dpi in grid['dpi']:
+        pages = [render(document, dpi, seed + i, noise, skew) for i, document in enumerate(documents)]
+
+        for block_size, c, median in product(grid['block_size'], grid['c'], grid['median']):
+            apply_settings({'dpi': dpi, 'block_size': block_size, 'c': c, 'median': median})
+            # Preprocessing does not depend on the PSM set, so it runs once per setting
+            cpu_start, wall_start = cpu_seconds(), time.perf_counter()
+            processed = [preprocess_image(page) for page in pages]
+            preprocess_cpu, preprocess_wall = cpu_seconds() - cpu_start, time.perf_counter() - wall_start
+
+            for psm_modes in grid['psm_modes']:
+                apply_settings({'psm_modes': psm_modes})
+                cpu_start, wall_start = cpu_seconds(), time.perf_counter()
+                correct, total = {}, {}
+                for image, truth in zip(processed, truths):
+                    ocr_result = perform_ocr(image)
+                    entities = extract_entities(ocr_result['text'], ocr_result['blocks'])
+                    for entity in entities:
+                        entity['page'] = 1
+                    predicted = process_extracted_entities(group_entities(entities))
+                    for name, expected in truth.items():
+                        total[name] = total.get(name, 0) + 1
+                        if name in predicted and field_matches(predicted[name], expected):
+                            correct[name] = correct.get(name, 0) + 1
+                ocr_cpu, ocr_wall = cpu_seconds() - cpu_start, time.perf_counter() - wall_start
+
+                fields = sum(total.values())
+                results.append({
+                    'settings': {'dpi': dpi, 'psm_modes': psm_modes, 'block_size': block_size,
+                                 'c': c, 'median': median},
+                    'accuracy': round(sum(correct.values()) / fields, 4) if fields else 0.0,
+                    'field_accuracy': {name: round(correct.get(name, 0) / count, 4) for name, count in total.items()},
+                    'cpu_per_page_s': round((preprocess_cpu + ocr_cpu) / len(pages), 4),
+                    'wall_per_page_s': round((preprocess_wall + ocr_wall) / len(pages), 4),
+                })
+    return results
+
+def pareto_frontier(results: List[Dict]) -> List[Dict]:
+    """Configurations not beaten on both CPU and accuracy, cheapest first"""
+    frontier = []
+    best_accuracy = -1.0
+    for result in sorted(results, key=lambda r: (r['cpu_per_page_s'], -r['accuracy'])):
+        if result['accuracy'] > best_accuracy:
+            frontier.append(result)
+            best_accuracy = result['accuracy']
+    return frontier
+
+def recommend(frontier: List[Dict], tolerance: float) -> Dict:
+    """Cheapest frontier point within tolerance of the best accuracy"""
+    if not frontier:
+        return {}
+    best = max(result['accuracy'] for result in frontier)
+    chosen = next(result for result in frontier if result['accuracy'] >= best - tolerance)
+    settings = chosen['settings']
+    return {
+        'settings': settings,
+        'accuracy': chosen['accuracy'],
+        'cpu_per_page_s': chosen['cpu_per_page_s'],
+        'env': {
+            'DPI': str(settings['dpi']),
+            'OCR_PSM_MODES': ','.join(str(mode) for mode in settings['psm_modes']),
+            'THRESHOLD_BLOCK_SIZE': str(settings['block_size']),
+            'THRESHOLD_C': f"{settings['c']:g}",
+            'MEDIAN_BLUR_KSIZE': str(settings['median']),
+        },
+    }
+
+def parse_list(value: str, cast=int) -> List:
+    return [cast(item) for item in value.split(',') if item.strip()]
+
+def main():
+    parser = argparse.ArgumentParser(description="Pareto sweep of OCR settings: accuracy vs CPU per page")
+    parser.add_argument("--annotations", default=config.DATA_ANNOTATIONS, help="Directory of annotation JSON files")
+    parser.add_argument("--synthetic", type=int, default=10, help="Synthetic annotated forms to add")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--noise", type=float, default=0.05)
+    parser.add_argument("--skew", type=float, default=1.5)
+    parser.add_argument("--dpi", default="150,200,300")
+    parser.add_argument("--psm", default="6|6,11|6,8,11,13", help="PSM sets separated by |")
+    parser.add_argument("--block-size", default="11,31", help="Adaptive threshold block sizes (odd)")
+    parser.add_argument("--c", default="2,8", help="Adaptive threshold constants")
+    parser.add_argument("--median", default="1,3", help="Median blur kernel sizes (1 disables)")
+    parser.add_argument("--tolerance", type=float, default=0.02, help="Accuracy given up for a cheaper profile")
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout)")
+    args = parser.parse_args()
+
+    grid = {
+        'dpi': parse_list(args.dpi),
+        'psm_modes': [parse_list(modes) for modes in args.psm.split('|') if modes.strip()],
+        'block_size': parse_list(args.block_size),
+        'c': parse_list(args.c, float),
+        'median': parse_list(args.median),
+    }
+    invalid = [size for size in grid['block_size'] if size < 3 or size % 2 == 0]
+    invalid += [size for size in grid['median'] if size > 1 and size % 2 == 0]
+    if invalid:
+        parser.error(f"Kernel sizes must be odd: {invalid}")
+
+    documents = load_annotations(args.annotations) + synthetic_annotations(args.synthetic, args.seed)
+    if not documents:
+        parser.error("No annotated documents")
+
+    from app.gazetteer import gazetteer
+    # Village matching needs the synthetic villages; the sample annotation uses one of them too
+    with tempfile.TemporaryDirectory(prefix="fra-pareto-") as scratch:
+        gazetteer.load_gazetteer(write_gazetteer(os.path.join(scratch, 'gazetteer.csv')))
+
+    original = {knob: getattr(config, attribute) for knob, attribute in KNOBS.items()}
+    try:
+        truths = [truth_fields(document) for document in documents]
+        results = evaluate(documents, truths, grid, args.seed, args.noise, args.skew)
+    finally:
+        apply_settings(original)
+
+    frontier = pareto_frontier(results)
+    report = {
+        'documents': len(documents),
+        'sources': sorted({document['source'] for document in documents if not document['source'].startswith('synthetic_')}),
+        'realigned_spans': sum(document.get('realigned_spans', 0) for document in documents),
+        'grid': grid,
+        'configurations': sorted(results, key=lambda r: (-r['accuracy'], r['cpu_per_page_s'])),
+        'frontier': frontier,
+        'recommended': recommend(frontier, args.tolerance),
+        'defaults': original,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    print(f"{'dpi':>5} {'psm':<12}{'block':>6}{'c':>5}{'median':>7}{'accuracy':>10}{'cpu/page':>10}")
+    for result in frontier:
+        s = result['settings']
+        print(f"{s['dpi']:>5} {','.join(map(str, s['psm_modes'])):<12}{s['block_size']:>6}{s['c']:>5g}"
+              f"{s['median']:>7}{result['accuracy']:>10.2%}{result['cpu_per_page_s']:>9.3f}s")
+    if report['recommended']:
+        print("Recommended profile:")
+        for key, value in report['recommended']['env'].items():
+            print(f"{key}={value}")
+
+if __name__ == "__main__":
+    main()
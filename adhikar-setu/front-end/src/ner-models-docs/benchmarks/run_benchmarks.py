@@ -0,0 +1,320 @@
+"""
+Per-stage and end-to-end pipeline benchmarks on the synthetic corpus.
+
+Generates a deterministic corpus (see benchmarks/synthetic.py) in a scratch
+directory, times preprocess_image, perform_ocr, extract_entities,
+match_village and process_document on it, scores extracted fields against
+the ground truth and writes a JSON report. Two reports can be diffed.
+
+Usage:
+    python -m benchmarks.run_benchmarks --count 20 --output bench.json
+    python -m benchmarks.run_benchmarks --count 20 --output bench.json --compare baseline.json
+    python -m benchmarks.run_benchmarks --diff baseline.json bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+import cv2
+import numpy as np
+
+from app.config import config
+from benchmarks.synthetic import generate_corpus
+
+STAGES = ['rasterize', 'preprocess_image', 'perform_ocr', 'extract_entities', 'match_village', 'process_document']
+
+# Field name -> check of the extracted value against the ground truth record
+FIELD_CHECKS: Dict[str, Callable[[Dict, Dict], bool]] = {
+    'claimant_name': lambda field, truth: str(field.get('value', '')).lower() == truth['claimant_name'].lower(),
+    'guardian_name': lambda field, truth: str(field.get('value', '')).lower() == truth['guardian_name'].lower(),
+    'village': lambda field, truth: str(field.get('value', '')).lower() == truth['village'].lower(),
+    'district': lambda field, truth: str(field.get('value', '')).lower() == truth['district'].lower(),
+    'title_no': lambda field, truth: field.get('value') == truth['title_no'],
+    'khasra_number': lambda field, truth: field.get('value') == truth['khasra_number'],
+    'occupation_date': lambda field, truth: field.get('value') == truth['occupation_date'],
+    'area_ha': lambda field, truth: field.get('value') is not None and abs(field['value'] - truth['area_ha']) < 0.01,
+    'coordinates_geojson': lambda field, truth: (
+        (field.get('geometry_check') or {}).get('polygon_area_ha') is not None
+        and abs(field['geometry_check']['polygon_area_ha'] - truth['area_ha']) <= 0.05 * truth['area_ha']
+    ),
+}
+
+def score_fields(extracted_fields: Dict, truth: Dict) -> Dict[str, bool]:
+    """Per-field correctness of one document's extracted fields"""
+    scores = {}
+    for name, check in FIELD_CHECKS.items():
+        field = extracted_fields.get(name)
+        try:
+            scores[name] = bool(field) and check(field, truth)
+        except (TypeError, ValueError, KeyError):
+            scores[name] = False
+    return scores
+
+def accuracy_summary(scores: List[Dict[str, bool]]) -> Dict:
+    """Field-level and document-level accuracy over scored documents"""
+    if not scores:
+        return {'documents': 0, 'fields': {}, 'field_accuracy': None, 'documents_all_correct': None}
+    fields = {name: round(sum(s[name] for s in scores) / len(scores), 4) for name in FIELD_CHECKS}
+    return {
+        'documents': len(scores),
+        'fields': fields,
+        'field_accuracy': round(sum(fields.values()) / len(fields), 4),
+        'documents_all_correct': round(sum(all(s.values()) for s in scores) / len(scores), 4),
+    }
+
+def summarize(durations: List[float]) -> Dict:
+    """Timing statistics in milliseconds, plus throughput per second"""
+    if not durations:
+        return {'calls': 0}
+    values = np.array(durations) * 1000.0
+    total = float(np.sum(durations))
+    return {
+        'calls': len(durations),
+        'total_s': round(total, 4),
+        'mean_ms': round(float(values.mean()), 3),
+        'p50_ms': round(float(np.percentile(values, 50)), 3),
+        'p95_ms': round(float(np.percentile(values, 95)), 3),
+        'max_ms': round(float(values.max()), 3),
+        'per_second': round(len(durations) / total, 3) if total else None,
+    }
+
+def timed(func: Callable, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def configure(work_dir: str, corpus_dir: str) -> None:
+    """Point the pipeline's inputs and outputs at the scratch directory"""
+    from app.gazetteer import gazetteer
+    from app.result_store import result_store
+
+    config.DATA_RAW = corpus_dir
+    config.DATA_PROCESSED = os.path.join(work_dir, 'processed')
+    config.OCR_SIDECAR_DIR = os.path.join(work_dir, 'processed', 'ocr')
+    config.RESULT_STORE_PATH = os.path.join(work_dir, 'processed', 'results.db')
+    result_store.path = config.RESULT_STORE_PATH
+    gazetteer.load_gazetteer(os.path.join(corpus_dir, 'gazetteer.csv'))
+
+def rasterize(path: str) -> List[np.ndarray]:
+    """Pages of a document as BGR arrays, the way the worker loads them"""
+    if path.lower().endswith('.pdf'):
+        from pdf2image import convert_from_path
+        return [cv2.cvtColor(np.array(page.convert('RGB')), cv2.COLOR_RGB2BGR)
+                for page in convert_from_path(path, dpi=config.DPI)]
+    image = cv2.imread(path)
+    return [image] if image is not None else []
+
+def ocr_noise(name: str, index: int) -> str:
+    """Deterministic single-character corruption, as OCR would produce"""
+    if len(name) < 4:
+        return name
+    position = index % (len(name) - 1) + 1
+    return name[:position] + name[position + 1:]
+
+def bench_stages(manifest: List[Dict], corpus_dir: str) -> Dict:
+    """Time each stage in isolation on every page of the corpus"""
+    from app.preprocess import preprocess_image
+    from app.ocr_provider import perform_ocr
+    from app.ner.predict_ner import extract_entities
+    from app.gazetteer import match_village
+
+    durations = {stage: [] for stage in STAGES[:-1]}
+    pages = 0
+    for index, document in enumerate(manifest):
+        images, seconds = timed(rasterize, os.path.join(corpus_dir, document['file']))
+        durations['rasterize'].append(seconds)
+        for image in images:
+            pages += 1
+            processed, seconds = timed(preprocess_image, image)
+            durations['preprocess_image'].append(seconds)
+            ocr_result, seconds = timed(perform_ocr, processed)
+            durations['perform_ocr'].append(seconds)
+            _, seconds = timed(extract_entities, ocr_result['text'], ocr_result['blocks'])
+            durations['extract_entities'].append(seconds)
+
+        village = document['ground_truth']['village']
+        for name in (village, ocr_noise(village, index)):
+            _, seconds = timed(match_village, name)
+            durations['match_village'].append(seconds)
+
+    stats = {stage: summarize(values) for stage, values in durations.items()}
+    stats['rasterize']['pages'] = pages
+    return stats
+
+def bench_end_to_end(manifest: List[Dict], warmup: bool = True) -> Dict:
+    """Run process_document on every document and score the results"""
+    from app.worker import process_document
+    from app.result_store import result_store
+
+    if warmup and manifest:
+        process_document(manifest[0]['document_id'])
+
+    durations, scores, failures = [], [], []
+    pages = 0
+    for document in manifest:
+        try:
+            result, seconds = timed(process_document, document['document_id'])
+        except Exception as e:
+            failures.append({'document_id': document['document_id'], 'error': str(e)})
+            continue
+        durations.append(seconds)
+        pages += result['processing_summary']['total_pages']
+        scores.append(score_fields(result['extracted_fields'], document['ground_truth']))
+    result_store.flush()
+
+    stats = summarize(durations)
+    stats['pages'] = pages
+    stats['pages_per_second'] = round(pages / stats['total_s'], 3) if durations and stats['total_s'] else None
+    stats['failures'] = failures
+    return {'timing': stats, 'accuracy': accuracy_summary(scores)}
+
+def environment() -> Dict:
+    """Versions that explain differences between reports"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                timeout=10).stdout.strip() or None
+    except Exception:
+        commit = None
+    try:
+        import pytesseract
+        tesseract = str(pytesseract.get_tesseract_version())
+    except Exception:
+        tesseract = None
+    return {
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'tesseract': tesseract,
+        'ocr_provider': config.OCR_PROVIDER,
+        'dpi': config.DPI,
+    }
+
+def run(count: int = 20, seed: int = 42, work_dir: str = None, stages: bool = True,
+        end_to_end: bool = True, noise: float = 0.05, skew: float = 1.5) -> Dict:
+    """Generate the corpus and run the requested benchmarks"""
+    corpus_dir = os.path.join(work_dir, 'raw')
+    started = time.perf_counter()
+    manifest = generate_corpus(corpus_dir, count, seed, noise=noise, skew=skew)
+    generation_seconds = time.perf_counter() - started
+    configure(work_dir, corpus_dir)
+
+    report = {
+        'created_at': datetime.now().isoformat(),
+        'environment': environment(),
+        'corpus': {
+            'documents': len(manifest),
+            'pages': sum(document['pages'] for document in manifest),
+            'seed': seed, 'noise': noise, 'skew': skew,
+            'generation_s': round(generation_seconds, 3),
+        },
+        'stages': {},
+    }
+    if stages:
+        report['stages'] = bench_stages(manifest, corpus_dir)
+    if end_to_end:
+        result = bench_end_to_end(manifest)
+        report['stages']['process_document'] = result['timing']
+        report['accuracy'] = result['accuracy']
+    return report
+
+def compare_reports(baseline: Dict, current: Dict, threshold: float = 0.1) -> Dict:
+    """Relative timing change per stage and accuracy deltas; flags regressions beyond threshold"""
+    stages = {}
+    regressions = []
+    for stage in STAGES:
+        old, new = baseline.get('stages', {}).get(stage), current.get('stages', {}).get(stage)
+        if not old or not new or not old.get('calls') or not new.get('calls'):
+            continue
+        row = {}
+        for metric in ('mean_ms', 'p95_ms'):
+            change = (new[metric] - old[metric]) / old[metric] if old[metric] else None
+            row[metric] = {'baseline': old[metric], 'current': new[metric],
+                           'change': None if change is None else round(change, 4)}
+            if change is not None and change > threshold:
+                regressions.append(f"{stage}.{metric} +{change:.1%}")
+        stages[stage] = row
+
+    accuracy = {}
+    old_fields = (baseline.get('accuracy') or {}).get('fields', {})
+    new_fields = (current.get('accuracy') or {}).get('fields', {})
+    for name in sorted(set(old_fields) & set(new_fields)):
+        delta = round(new_fields[name] - old_fields[name], 4)
+        accuracy[name] = {'baseline': old_fields[name], 'current': new_fields[name], 'delta': delta}
+        if delta < 0:
+            regressions.append(f"accuracy.{name} {delta:+.2%}")
+
+    return {
+        'baseline_commit': baseline.get('environment', {}).get('git_commit'),
+        'current_commit': current.get('environment', {}).get('git_commit'),
+        'threshold': threshold,
+        'stages': stages,
+        'accuracy': accuracy,
+        'regressions': regressions,
+    }
+
+def print_comparison(comparison: Dict) -> None:
+    print(f"{'stage':<20}{'metric':<10}{'baseline':>12}{'current':>12}{'change':>10}")
+    for stage, row in comparison['stages'].items():
+        for metric, values in row.items():
+            change = '' if values['change'] is None else f"{values['change']:+.1%}"
+            print(f"{stage:<20}{metric:<10}{values['baseline']:>12.2f}{values['current']:>12.2f}{change:>10}")
+    for name, values in comparison['accuracy'].items():
+        print(f"{name:<20}{'accuracy':<10}{values['baseline']:>12.2%}{values['current']:>12.2%}{values['delta']:>+10.2%}")
+    if comparison['regressions']:
+        print("Regressions: " + ", ".join(comparison['regressions']))
+
+def load_report(path: str) -> Dict:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the FRA pipeline on synthetic forms")
+    parser.add_argument("--count", type=int, default=20, help="Synthetic documents to generate")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--noise", type=float, default=0.05)
+    parser.add_argument("--skew", type=float, default=1.5)
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--work-dir", help="Scratch directory for corpus and outputs (default: temporary)")
+    parser.add_argument("--skip-stages", action="store_true", help="Only run the end-to-end benchmark")
+    parser.add_argument("--skip-end-to-end", action="store_true", help="Only run the per-stage benchmarks")
+    parser.add_argument("--compare", metavar="BASELINE", help="Compare the new report with a baseline report")
+    parser.add_argument("--diff", nargs=2, metavar=("BASELINE", "CURRENT"), help="Compare two existing reports")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative slowdown counted as regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 on regressions")
+    args = parser.parse_args()
+
+    if args.diff:
+        report = load_report(args.diff[1])
+        baseline = load_report(args.diff[0])
+    else:
+        work_dir = args.work_dir or tempfile.mkdtemp(prefix="fra-bench-")
+        try:
+            report = run(args.count, args.seed, work_dir, not args.skip_stages, not args.skip_end_to_end,
+                         args.noise, args.skew)
+        finally:
+            if not args.work_dir:
+                shutil.rmtree(work_dir, ignore_errors=True)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+        else:
+            print(json.dumps(report, indent=2))
+        baseline = load_report(args.compare) if args.compare else None
+
+    if baseline is not None:
+        comparison = compare_reports(baseline, report, args.threshold)
+        print_comparison(comparison)
+        if args.fail_on_regression and comparison['regressions']:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
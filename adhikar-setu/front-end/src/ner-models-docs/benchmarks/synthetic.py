@@ -0,0 +1,324 @@
+"""
+Deterministic generator of synthetic FRA title forms with ground truth.
+
+Each record is rendered in the Annexure layout of the sample training data,
+degraded with noise and skew, and written as a JPEG (single page) or a
+two-page PDF (personal details, then land details). The same seed always
+gives the same records and the same pixels.
+
+Usage: python -m benchmarks.synthetic --count 20 --output data/synthetic
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import random
+import re
+import textwrap
+import time
+from datetime import date, timedelta
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+FIRST_NAMES = [
+    "Ram", "Sita", "Mohan", "Lakshmi", "Budhram", "Sukhmati", "Ramesh", "Kamla",
+    "Dinesh", "Phoolmati", "Birsa", "Sunita", "Gopal", "Janki", "Shankar", "Radha"
+]
+SURNAMES = [
+    "Singh", "Markam", "Dhurve", "Uikey", "Netam", "Majhi", "Oraon", "Munda",
+    "Soren", "Tudu", "Debbarma", "Reang", "Gond", "Baiga", "Koya", "Lal"
+]
+
+# (village, district, state, centroid lon, centroid lat)
+VILLAGES = [
+    ("Kusmi", "Mandla", "Madhya Pradesh", 80.37, 22.60),
+    ("Bichhiya", "Mandla", "Madhya Pradesh", 80.67, 22.45),
+    ("Niwas", "Mandla", "Madhya Pradesh", 80.12, 22.91),
+    ("Baihar", "Balaghat", "Madhya Pradesh", 80.55, 22.10),
+    ("Paraswada", "Balaghat", "Madhya Pradesh", 80.30, 22.05),
+    ("Dindori", "Dindori", "Madhya Pradesh", 81.08, 22.94),
+    ("Bhanpur", "Sundargarh", "Odisha", 84.03, 22.12),
+    ("Lahunipara", "Sundargarh", "Odisha", 85.02, 21.82),
+    ("Thuamul Rampur", "Kalahandi", "Odisha", 83.12, 19.56),
+    ("Jampui", "North Tripura", "Tripura", 92.27, 23.95),
+    ("Gandacherra", "Dhalai", "Tripura", 91.87, 23.70),
+    ("Eturnagaram", "Mulugu", "Telangana", 80.42, 18.33),
+    ("Utnoor", "Adilabad", "Telangana", 78.77, 19.36),
+]
+
+CLAIM_TYPES = [
+    ("Annexure II", "Individual Forest Rights (Title)", "IFR"),
+    ("Annexure III", "Community Forest Rights (Title)", "CFR"),
+    ("Annexure IV", "Community Forest Resource (Title)", "CFRR"),
+]
+
+STATE_CODES = {
+    "Madhya Pradesh": "MP", "Odisha": "OD", "Tripura": "TR", "Telangana": "TG"
+}
+
+FONT_CANDIDATES = [
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/dejavu/DejaVuSans.ttf",
+    "/Library/Fonts/Arial.ttf",
+    "C:\\Windows\\Fonts\\arial.ttf",
+]
+
+A4_INCHES = (8.27, 11.69)
+
+def load_font(size: int) -> ImageFont.ImageFont:
+    """First available TrueType font, else PIL's built-in one"""
+    for path in FONT_CANDIDATES:
+        if os.path.exists(path):
+            return ImageFont.truetype(path, size)
+    return ImageFont.load_default()
+
+def square_polygon(lon: float, lat: float, area_ha: float) -> List[Tuple[float, float]]:
+    """Closed lon/lat square of roughly the given area"""
+    side_m = math.sqrt(area_ha * 10000.0)
+    dlat = side_m / 111320.0
+    dlon = side_m / (111320.0 * math.cos(math.radians(lat)))
+    ring = [(lon, lat), (lon + dlon, lat), (lon + dlon, lat + dlat), (lon, lat + dlat)]
+    return [(round(x, 6), round(y, 6)) for x, y in ring + ring[:1]]
+
+def generate_record(rng: random.Random, index: int) -> Dict:
+    """Ground truth of one synthetic title, keyed like extracted_fields"""
+    village, district, state, lon, lat = rng.choice(VILLAGES)
+    annexure, claim_type, claim_code = rng.choice(CLAIM_TYPES)
+    area_ha = round(rng.uniform(0.2, 4.0), 2)
+    # Claim sits within ~5 km of the village centroid
+    ring = square_polygon(lon + rng.uniform(-0.05, 0.05), lat + rng.uniform(-0.05, 0.05), area_ha)
+    occupation = date(1975, 1, 1) + timedelta(days=rng.randint(0, 365 * 30))
+    issue = date(2008, 1, 1) + timedelta(days=rng.randint(0, 365 * 17))
+    gender = rng.choice(["Male", "Female"])
+
+    return {
+        'annexure_type': annexure,
+        'claim_type': claim_type,
+        'title_no': f"{STATE_CODES[state]}-{district[:3].upper()}-{issue.year}-{index:06d}",
+        'claimant_name': f"{rng.choice(FIRST_NAMES)} {rng.choice(SURNAMES)}",
+        'guardian_name': f"{rng.choice(FIRST_NAMES)} {rng.choice(SURNAMES)}",
+        'age': rng.randint(21, 85),
+        'gender': gender,
+        'village': village,
+        'district': district,
+        'state': state,
+        'khasra_number': f"{rng.randint(1, 999)}/{rng.randint(1, 20)}",
+        'area_ha': area_ha,
+        'coordinates': "POLYGON((" + ",".join(f"{x} {y}" for x, y in ring) + "))",
+        'occupation_date': occupation.isoformat(),
+        'issue_date': issue.isoformat(),
+        'claim_code': claim_code,
+    }
+
+def form_pages(record: Dict) -> List[List[str]]:
+    """Form text as pages of lines: title and personal details, then land details"""
+    header = [
+        f"{record['annexure_type']} - {record['claim_type']}",
+        "Forest Rights Act, 2006 - Title to Forest Land",
+        "",
+        f"Title No.: {record['title_no']}",
+    ]
+    personal = [
+        f"Name of Title Holder: {record['claimant_name']}",
+        f"Father's / Husband's Name: {record['guardian_name']}",
+        f"Age: {record['age']}",
+        f"Gender: {record['gender']}",
+        f"Village / Gram Panchayat: {record['village']}",
+        f"District: {record['district']}",
+        f"State: {record['state']}",
+    ]
+    land = [
+        f"Khasra No.: {record['khasra_number']}",
+        f"Area (ha): {record['area_ha']:.2f}",
+        f"Coordinates / WKT: {record['coordinates']}",
+        f"Date of Occupation (claimed): {record['occupation_date']}",
+        f"Date of Issue (DLC): {record['issue_date']}",
+        "Remarks / Conditions: Subject to preservation of existing forest cover; non-transferable",
+    ]
+    return [header + personal, ["Schedule of Land"] + land]
+
+# Form line prefixes and the entity label of the value that follows them
+FIELD_PREFIXES = [
+    ("Title No.: ", "TITLE_NO"),
+    ("Name of Title Holder: ", "CLAIMANT_NAME"),
+    ("Father's / Husband's Name: ", "GUARDIAN_NAME"),
+    ("Age: ", "AGE"),
+    ("Gender: ", "GENDER"),
+    ("Village / Gram Panchayat: ", "VILLAGE"),
+    ("District: ", "DISTRICT"),
+    ("State: ", "STATE"),
+    ("Khasra No.: ", "KHASRA"),
+    ("Area (ha): ", "AREA_HA"),
+    ("Coordinates / WKT: ", "COORDINATES"),
+    ("Date of Occupation (claimed): ", "OCCUPATION_DATE"),
+    ("Date of Issue (DLC): ", "ISSUE_DATE"),
+]
+
+# Unlabelled lines of the form that also start a new line
+SECTION_HEADINGS = ["Forest Rights Act", "Schedule of Land", "Remarks / Conditions:"]
+
+LINE_BREAK_RE = re.compile(
+    r'\s+(?=' + '|'.join(re.escape(prefix.strip()) for prefix in [p for p, _ in FIELD_PREFIXES] + SECTION_HEADINGS) + ')'
+)
+
+def form_annotation(record: Dict) -> Dict:
+    """Form text with entity spans, in the data/annotations training format"""
+    lines = [line for page in form_pages(record) for line in page if line]
+    text, entities = "", []
+    for line in lines:
+        offset = len(text) + (1 if text else 0)
+        text = f"{text} {line}" if text else line
+        for prefix, label in FIELD_PREFIXES:
+            if line.startswith(prefix):
+                entities.append([offset + len(prefix), offset + len(line), label])
+                break
+    return {'text': text, 'entities': entities}
+
+def annotation_lines(text: str) -> List[str]:
+    """Split single-line annotated form text back into one line per field"""
+    return [line.strip() for line in LINE_BREAK_RE.split(text) if line.strip()]
+
+def layout_entities(text: str) -> List[List]:
+    """Entity spans implied by the form layout: each field value runs to the end of its line"""
+    breaks = list(LINE_BREAK_RE.finditer(text))
+    line_starts = [0] + [match.end() for match in breaks]
+    line_ends = [match.start() for match in breaks] + [len(text)]
+    entities = []
+    for start, end in zip(line_starts, line_ends):
+        for prefix, label in FIELD_PREFIXES:
+            if text.startswith(prefix, start):
+                entities.append([start + len(prefix), end, label])
+                break
+    return entities
+
+def render_page(lines: Sequence[str], dpi: int = 150) -> Image.Image:
+    """Clean grayscale A4 page with a framed field layout"""
+    width, height = int(A4_INCHES[0] * dpi), int(A4_INCHES[1] * dpi)
+    page = Image.new('L', (width, height), 255)
+    draw = ImageDraw.Draw(page)
+    font = load_font(max(10, dpi * 11 // 72))
+    title_font = load_font(max(12, dpi * 14 // 72))
+
+    margin = int(0.8 * dpi)
+    draw.rectangle([margin // 2, margin // 2, width - margin // 2, height - margin // 2], outline=0, width=2)
+
+    line_height = int(font.size * 1.9) if hasattr(font, 'size') else 24
+    char_width = max(1.0, font.getlength("n")) if hasattr(font, 'getlength') else 8.0
+    wrap_at = max(20, int((width - 2 * margin) / char_width))
+
+    y = margin
+    for i, line in enumerate(lines):
+        if i == 0:
+            draw.text((margin, y), line, fill=0, font=title_font)
+            y += int(line_height * 1.4)
+            draw.line([margin, y - line_height // 3, width - margin, y - line_height // 3], fill=0, width=2)
+            continue
+        for part in textwrap.wrap(line, wrap_at) or [""]:
+            draw.text((margin, y), part, fill=0, font=font)
+            y += line_height
+        # Light rule under each field, like the printed forms
+        if line:
+            draw.line([margin, y - line_height // 4, width - margin, y - line_height // 4], fill=190, width=1)
+    return page
+
+def degrade(page: Image.Image, rng: np.random.Generator, noise: float = 0.05, skew: float = 1.5) -> Image.Image:
+    """Scan-like degradation: rotation, blur, gaussian and salt-and-pepper noise"""
+    angle = float(rng.uniform(-skew, skew)) if skew else 0.0
+    if angle:
+        page = page.rotate(angle, resample=Image.BICUBIC, expand=False, fillcolor=255)
+    if noise:
+        page = page.filter(ImageFilter.GaussianBlur(radius=0.4 + 4 * noise))
+        pixels = np.asarray(page, dtype=np.float32)
+        pixels = pixels + rng.normal(0.0, 255.0 * noise, pixels.shape)
+        speckle = rng.random(pixels.shape)
+        pixels[speckle < noise / 20] = 0
+        pixels[speckle > 1 - noise / 20] = 255
+        page = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+    return page
+
+def write_document(pages: List[Image.Image], path: str, quality: int = 85) -> str:
+    """Write pages as a JPEG (pages stacked vertically) or a multi-page PDF"""
+    if path.lower().endswith('.pdf'):
+        rgb = [page.convert('RGB') for page in pages]
+        # Fixed dates keep the PDF bytes reproducible
+        fixed = time.gmtime(1735689600)
+        rgb[0].save(path, save_all=True, append_images=rgb[1:], resolution=150.0,
+                    creationDate=fixed, modDate=fixed)
+    else:
+        if len(pages) == 1:
+            image = pages[0]
+        else:
+            image = Image.new('L', (pages[0].width, sum(page.height for page in pages)), 255)
+            offset = 0
+            for page in pages:
+                image.paste(page, (0, offset))
+                offset += page.height
+        image.save(path, quality=quality)
+    return path
+
+def generate_document(record: Dict, path: str, seed: int, dpi: int = 150,
+                      noise: float = 0.05, skew: float = 1.5) -> str:
+    """Render one record to a JPEG or PDF at path"""
+    rng = np.random.default_rng(seed)
+    page_lines = form_pages(record)
+    if not path.lower().endswith('.pdf'):
+        page_lines = [page_lines[0] + [""] + page_lines[1]]
+    pages = [degrade(render_page(lines, dpi), rng, noise, skew) for lines in page_lines]
+    return write_document(pages, path)
+
+def write_gazetteer(path: str) -> str:
+    """Gazetteer CSV covering every synthetic village"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['village', 'district', 'state', 'code'])
+        for code, (village, district, state, _, _) in enumerate(VILLAGES, start=1):
+            writer.writerow([village, district, state, code])
+    return path
+
+def generate_corpus(output_dir: str, count: int = 20, seed: int = 42, formats: Sequence[str] = ('jpeg', 'pdf'),
+                    dpi: int = 150, noise: float = 0.05, skew: float = 1.5) -> List[Dict]:
+    """Write count documents plus ground_truth.json and gazetteer.csv; formats are cycled"""
+    os.makedirs(output_dir, exist_ok=True)
+    rng = random.Random(seed)
+    manifest = []
+    for index in range(count):
+        record = generate_record(rng, index)
+        fmt = formats[index % len(formats)]
+        extension = '.pdf' if fmt == 'pdf' else '.jpg'
+        document_id = f"synthetic_{seed}_{index:04d}"
+        path = os.path.join(output_dir, document_id + extension)
+        generate_document(record, path, seed * 100003 + index, dpi, noise, skew)
+        manifest.append({
+            'document_id': document_id,
+            'file': os.path.basename(path),
+            'format': fmt,
+            'pages': 2 if fmt == 'pdf' else 1,
+            'ground_truth': record
+        })
+
+    with open(os.path.join(output_dir, 'ground_truth.json'), 'w', encoding='utf-8') as f:
+        json.dump({'seed': seed, 'dpi': dpi, 'noise': noise, 'skew': skew, 'documents': manifest}, f, indent=2)
+    write_gazetteer(os.path.join(output_dir, 'gazetteer.csv'))
+    return manifest
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic FRA forms with ground truth")
+    parser.add_argument("--output", default="data/synthetic", help="Output directory")
+    parser.add_argument("--count", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--formats", default="jpeg,pdf", help="Comma-separated formats, cycled per document")
+    parser.add_argument("--dpi", type=int, default=150)
+    parser.add_argument("--noise", type=float, default=0.05, help="Noise strength (0 for clean pages)")
+    parser.add_argument("--skew", type=float, default=1.5, help="Maximum rotation in degrees")
+    args = parser.parse_args()
+
+    manifest = generate_corpus(args.output, args.count, args.seed, args.formats.split(','),
+                               args.dpi, args.noise, args.skew)
+    print(json.dumps({'output': args.output, 'documents': len(manifest)}, indent=2))
+
+if __name__ == "__main__":
+    main()
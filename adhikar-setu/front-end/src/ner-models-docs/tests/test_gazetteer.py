@@ -0,0 +1,54 @@
+import pandas as pd
+import pytest
+
+from app.gazetteer import Gazetteer
+
+def write_csv(path, villages):
+    pd.DataFrame(villages, columns=['village', 'district', 'state', 'code']).to_csv(path, index=False)
+    return str(path)
+
+@pytest.fixture
+def gazetteer_csv(tmp_path):
+    return write_csv(tmp_path / "gazetteer.csv", [
+        ("Rampur", "Ranchi", "Jharkhand", "V001"),
+        ("Sonpur", "Khunti", "Jharkhand", "V002"),
+    ])
+
+@pytest.fixture
+def gazetteer(gazetteer_csv, monkeypatch):
+    monkeypatch.setattr("app.gazetteer.config.GAZETTEER_PATH", gazetteer_csv)
+    return Gazetteer()
+
+def test_match_reports_snapshot_version(gazetteer):
+    match = gazetteer.match_village("Rampur", district="Ranchi")
+    assert match['id'] == "V001"
+    assert match['gazetteer_version'] == gazetteer.version
+    assert gazetteer.match_village("Rampur", district="Dumka") is None
+
+def test_reload_skips_unchanged_file(gazetteer, gazetteer_csv):
+    version = gazetteer.version
+    assert gazetteer.load_gazetteer(gazetteer_csv) == {'version': version, 'reloaded': False}
+
+def test_reload_swaps_snapshot_and_keeps_pinned_one(gazetteer, gazetteer_csv):
+    old = gazetteer.snapshot
+    write_csv(gazetteer_csv, [("Rampur", "Ranchi", "Jharkhand", "V101"), ("Basia", "Gumla", "Jharkhand", "V103")])
+
+    result = gazetteer.load_gazetteer(gazetteer_csv)
+    assert result['reloaded'] and result['previous_version'] == old.version
+    assert gazetteer.version == result['version'] != old.version
+    assert gazetteer.match_village("Rampur")['id'] == "V101"
+    # A match that started on the old snapshot still sees its data
+    assert old.data['code'].tolist() == ["V001", "V002"]
+
+def test_failed_reload_keeps_current_snapshot(gazetteer, tmp_path):
+    version = gazetteer.version
+    assert gazetteer.load_gazetteer(str(tmp_path / "missing.csv"))['reloaded'] is False
+    assert gazetteer.version == version
+    assert gazetteer.match_village("Sonpur")['id'] == "V002"
+
+def test_reload_async(gazetteer, gazetteer_csv):
+    write_csv(gazetteer_csv, [("Basia", "Gumla", "Jharkhand", "V103")])
+    assert gazetteer.reload_async(gazetteer_csv)
+    gazetteer._reload_thread.join(timeout=10)
+    assert not gazetteer.reloading
+    assert gazetteer.match_village("Basia")['id'] == "V103"
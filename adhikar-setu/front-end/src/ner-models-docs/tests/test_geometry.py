@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+from pyproj import Geod
+from shapely.geometry import MultiPolygon, Polygon, box
+from shapely.geometry.polygon import orient
+
+from app.geometry import (area_deviation, check_claim_geometry, geodesic_areas_ha, parse_geometry, process_geometries,
+                          validate_geometries)
+
+WGS84 = Geod(ellps='WGS84')
+
+def pyproj_area_ha(geometry):
+    # pyproj only subtracts holes that wind opposite to their shell
+    polygons = geometry.geoms if isinstance(geometry, MultiPolygon) else [geometry]
+    return sum(abs(WGS84.geometry_area_perimeter(orient(polygon))[0]) for polygon in polygons) / 10000.0
+
+POLYGONS = [
+    box(77.20, 28.60, 77.21, 28.61),                                         # ~1 km square near Delhi
+    Polygon([(85.3, 23.3), (85.32, 23.31), (85.31, 23.33), (85.29, 23.32)]),  # Jharkhand, irregular
+    Polygon(box(80.0, 20.0, 80.05, 20.05).exterior.coords,
+            [box(80.01, 20.01, 80.02, 20.02).exterior.coords]),               # with a hole
+    MultiPolygon([box(75.0, 15.0, 75.01, 15.01), box(75.02, 15.0, 75.03, 15.01)]),
+]
+
+def test_geodesic_area_matches_pyproj():
+    expected = [pyproj_area_ha(polygon) for polygon in POLYGONS]
+    # Spherical (authalic) approximation of the ellipsoidal area
+    np.testing.assert_allclose(geodesic_areas_ha(POLYGONS), expected, rtol=5e-3)
+    np.testing.assert_allclose(geodesic_areas_ha(POLYGONS, exact=True), expected, rtol=1e-9)
+
+def test_geodesic_area_missing_geometries():
+    areas = geodesic_areas_ha([None, POLYGONS[0], None])
+    assert np.isnan(areas[0]) and np.isnan(areas[2])
+    assert areas[1] == pytest.approx(pyproj_area_ha(POLYGONS[0]), rel=5e-3)
+
+def test_validate_geometries_reasons():
+    bowtie = Polygon([(0, 0), (1, 1), (1, 0), (0, 1)])
+    geometries, reports = validate_geometries([POLYGONS[0], bowtie, None])
+    assert reports[0]['valid'] and not reports[0]['repaired']
+    assert reports[1]['repaired'] and geometries[1].is_valid
+    assert reports[2]['reason'] == 'missing'
+
+def test_area_deviation_ignores_non_numeric_stated_areas():
+    deviation, mismatch = area_deviation([1.0, 'abc', '2.5 ha', None, 1.5], np.array([1.0, 1.0, 1.0, 1.0, 1.0]),
+                                         tolerance=0.2)
+    assert deviation[0] == 0.0 and np.isnan(deviation[1:4]).all()
+    assert mismatch.tolist() == [False, False, False, False, True]
+
+def test_process_geometries_point_is_not_polygon():
+    result = process_geometries([{'coordinates': '28.6 77.2'}])[0]
+    assert result['reason'] == 'not_polygon'
+    assert result['polygon_area_ha'] is None
+
+def test_bare_coordinates_are_read_lat_first():
+    ring = ((79.0, 21.1), (79.1, 21.2), (79.2, 21.15), (79.0, 21.1))
+    for text in ("21.10 N, 79.00 E, 21.20 N, 79.10 E, 21.15 N, 79.20 E",
+                 "21.10 79.00, 21.20 79.10, 21.15 79.20",
+                 "79.00 E 21.10 N, 79.10 E 21.20 N, 79.20 E 21.15 N"):
+        assert tuple(parse_geometry(text).exterior.coords) == ring
+    assert tuple(parse_geometry("10.5 S, 40.25 W").coords) == ((-40.25, -10.5),)
+
+def test_claim_geometry_prefers_parsed_value():
+    text = "21.10 N, 79.00 E, 21.20 N, 79.10 E, 21.15 N, 79.20 E"
+    polygon = {'type': 'Polygon', 'coordinates': [[[79.0, 21.1], [79.1, 21.2], [79.2, 21.15], [79.0, 21.1]]]}
+    area = geodesic_areas_ha([parse_geometry(polygon)])[0]
+    fields = {'coordinates_geojson': {'value': polygon, 'original_text': "garbled"}, 'area_ha': {'value': area}}
+    result = check_claim_geometry(fields)
+    assert result['valid'] and not result['area_mismatch']
+    assert result['polygon_area_ha'] == pytest.approx(area, rel=1e-3)
+
+    # Text is only the fallback, and is read with the same axis order
+    fallback = check_claim_geometry({'coordinates_geojson': {'value': None, 'original_text': text},
+                                     'area_ha': {'value': area}})
+    assert fallback['polygon_area_ha'] == pytest.approx(area, rel=1e-3)
+    assert not fallback['area_mismatch']
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from app.postprocess import (
+    normalize_date, parse_area, normalize_khasra,
+    normalize_date_batch, parse_area_batch, normalize_khasra_batch
+)
+
+@pytest.mark.parametrize("text, expected", [
+    ("15-08-2008", "2008-08-15"),
+    ("15/08/2008", "2008-08-15"),
+    ("15.08.2008", "2008-08-15"),
+    ("2008-08-15", "2008-08-15"),
+    ("१५-०८-२००८", "2008-08-15"),
+    ("dated 15 08 2008", "2008-08-15"),
+    ("", None),
+    (None, None),
+    ("not a date", None),
+])
+def test_normalize_date(text, expected):
+    assert normalize_date(text) == expected
+
+def test_normalize_date_two_digit_year():
+    assert normalize_date("01/02/08") == "2008-02-01"
+
+@pytest.mark.parametrize("text, expected", [
+    ("2.5 ha", 2.5),
+    ("2.5 hectares", 2.5),
+    ("10 acres", 4.047),
+    ("4 bigha", 1.0),
+    ("२.५ हेक्टेयर", 2.5),
+    ("no area", None),
+    ("", None),
+])
+def test_parse_area(text, expected):
+    assert parse_area(text) == expected
+
+@pytest.mark.parametrize("text, expected", [
+    ("123/45", "123/45"),
+    ("12345", "123/45"),
+    ("Khasra No. 12/3", "12/3"),
+    ("१२३४५", "123/45"),
+    ("123", "123"),
+    ("", None),
+])
+def test_normalize_khasra(text, expected):
+    assert normalize_khasra(text) == expected
+
+def test_batches_match_scalar():
+    dates = ["15-08-2008", "15-08-2008", "2008-08-15", "१५-०८-२००८", "", None]
+    areas = ["2.5 ha", "10 acres", "10 acres", "no area", None]
+    khasras = ["123/45", "12345", "१२३४५", "Khasra No. 12/3", "abc", "", None, float("nan")]
+
+    assert list(normalize_date_batch(dates)) == [normalize_date(text) for text in dates]
+    np.testing.assert_array_equal(parse_area_batch(areas),
+                                  [np.nan if parse_area(text) is None else parse_area(text) for text in areas])
+    assert list(normalize_khasra_batch(khasras)) == ["123/45", "123/45", "123/45", "12/3", "", None, None, None]
+
+def test_khasra_batch_falls_back_for_non_strings():
+    assert list(normalize_khasra_batch(["1\n2345", "12345"])) == ["123/45", "123/45"]
+    assert len(normalize_khasra_batch([])) == 0
@@ -0,0 +1,83 @@
+import json
+import sqlite3
+import threading
+
+from app.result_store import ResultStore
+
+def document(document_id, **fields):
+    return {
+        'document_id': document_id,
+        'source_file': f"{document_id}.pdf",
+        'extracted_fields': {name: {'value': value, 'confidence': 0.9} for name, value in fields.items()},
+        'audit': {'logs': []},
+    }
+
+def make_store(tmp_path, **options):
+    options.setdefault('batch_size', 100)
+    options.setdefault('flush_interval', 0.05)
+    return ResultStore(path=str(tmp_path / "results.sqlite"), fallback_path=str(tmp_path / "pending.jsonl"),
+                       retry_delay=0.0, **options)
+
+def test_flush_writes_queued_rows(tmp_path):
+    store = make_store(tmp_path)
+    store.append(document("a", district="Ranchi", state="Jharkhand", area_ha=1.5))
+    store.append(document("b", district="Khunti", state="Jharkhand"))
+    store.flush()
+    try:
+        rows = {row['document_id']: row for row in store.query()}
+        assert set(rows) == {"a", "b"}
+        assert rows["a"]['area_ha'] == 1.5
+        assert json.loads(rows["a"]['confidences'])['district'] == 0.9
+        assert [row['document_id'] for row in store.query(district="Khunti")] == ["b"]
+    finally:
+        store.close()
+
+def test_close_writes_pending_rows_and_store_reopens(tmp_path):
+    store = make_store(tmp_path)
+    store.append(document("a"))
+    store.close()
+    assert [row['document_id'] for row in store.query()] == ["a"]
+
+    # A later append starts a new writer
+    store.append(document("a", district="Gumla"))
+    store.close()
+    assert [row['district'] for row in store.query()] == ["Gumla"]
+
+def test_failed_write_is_kept_and_replayed(tmp_path, monkeypatch):
+    store = make_store(tmp_path, retries=1)
+    insert = ResultStore._insert
+
+    def locked(self, connection, rows, newer_only=False):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(ResultStore, "_insert", locked)
+    store.append(document("a"))
+    store.flush()
+    assert store.query() == []
+    assert (tmp_path / "pending.jsonl").exists()
+
+    monkeypatch.setattr(ResultStore, "_insert", insert)
+    store.append(document("b"))
+    store.close()
+    assert sorted(row['document_id'] for row in store.query()) == ["a", "b"]
+    assert not (tmp_path / "pending.jsonl").exists()
+
+def test_unavailable_database_keeps_rows_and_flush_returns(tmp_path, monkeypatch):
+    store = make_store(tmp_path, retries=1)
+    connect = ResultStore._connect
+
+    def unavailable(self):
+        raise sqlite3.OperationalError("unable to open database file")
+
+    monkeypatch.setattr(ResultStore, "_connect", unavailable)
+    store.append(document("a"))
+    flushing = threading.Thread(target=store.flush, daemon=True)
+    flushing.start()
+    flushing.join(timeout=10)
+    assert not flushing.is_alive()
+    assert [json.loads(line)['document_id'] for line in (tmp_path / "pending.jsonl").read_text().splitlines()] == ["a"]
+
+    monkeypatch.setattr(ResultStore, "_connect", connect)
+    store.append(document("b"))
+    store.close()
+    assert sorted(row['document_id'] for row in store.query()) == ["a", "b"]
@@ -3,7 +3,6 @@ import requests
 import json
 import os
 from datetime import datetime
-import time
 
 # Configuration
 API_URL = os.getenv("API_URL", "http://localhost:8000")
@@ -43,37 +42,68 @@ if uploaded_file:
             except Exception as e:
                 st.error(f"Request failed: {e}")
 
+def iter_sse(response):
+    """Yield (event, data) pairs from a Server-Sent Events response"""
+    event_type, data_lines = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if line is None:
+            continue
+        if not line:
+            if data_lines:
+                yield event_type, json.loads("\n".join(data_lines))
+            event_type, data_lines = "message", []
+        elif line.startswith("event:"):
+            event_type = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:"):].strip())
+
+STAGE_LABELS = {
+    "rasterize": "Loading document",
+    "preprocess": "Preprocessing",
+    "ocr": "Running OCR",
+    "ner": "Extracting entities",
+    "page_done": "Page done",
+    "postprocess": "Normalizing fields",
+    "export": "Saving results",
+}
+
 # Check job status and display results
 if "job_id" in st.session_state:
     job_id = st.session_state.job_id
-    with st.spinner("Checking job status..."):
-        try:
-            completed = False
-            for _ in range(20):  # poll up to 20 times (~40 seconds if 2s interval)
-                response = requests.get(f"{API_URL}/api/v1/parse/{job_id}")
-                if response.status_code != 200:
-                    st.error(f"Error checking job status: {response.text}")
-                    break
-
-                data = response.json()
-                st.write("DEBUG: backend response", data)
-
-                if data.get("status") == "completed":
-                    completed = True
-                    st.success("Processing completed!")
-                    result = data.get("result", {})
-                    break
-                elif data.get("status") == "failed":
-                    st.error(f"Processing failed: {data.get('message', 'Unknown error')}")
-                    break
-                else:
-                    st.info("Document is still being processed...")
-                    time.sleep(2)  # wait before polling again
-
-            if not completed:
-                st.warning("Processing is taking longer than expected. Please try again later.")
-        except Exception as e:
-            st.error(f"Failed to fetch job status: {e}")
+    completed = False
+    result = None
+    progress_bar = st.progress(0.0)
+    status_text = st.empty()
+    # Pages can finish out of order (early exit runs the likeliest pages first), so the bar counts them
+    pages_done = set()
+    try:
+        # The API pushes progress events; the last one carries the result
+        with requests.get(f"{API_URL}/api/v1/parse/{job_id}/events", stream=True, timeout=(10, 300)) as response:
+            if response.status_code != 200:
+                st.error(f"Error checking job status: {response.text}")
+            else:
+                for event_type, event in iter_sse(response):
+                    if event_type == "progress":
+                        stage = event.get("stage", "")
+                        label = STAGE_LABELS.get(stage, stage)
+                        if event.get("total_pages"):
+                            if stage == "page_done":
+                                pages_done.add(event["page"])
+                            progress_bar.progress(min(len(pages_done) / event["total_pages"], 1.0))
+                            label = (f"{label} (page {event['page']}; "
+                                     f"{len(pages_done)}/{event['total_pages']} pages done)")
+                        status_text.info(label)
+                    elif event_type == "completed":
+                        completed = True
+                        result = event.get("result", {})
+                        progress_bar.progress(1.0)
+                        status_text.success("Processing completed!")
+                        break
+                    elif event_type == "failed":
+                        status_text.error(f"Processing failed: {event.get('error', 'Unknown error')}")
+                        break
+    except Exception as e:
+        st.error(f"Failed to fetch job status: {e}")
 
     # Display extracted fields if available
     if completed and result: